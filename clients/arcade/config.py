@@ -19,6 +19,13 @@ def _env_str(key: str, default: str) -> str:
     return default if v is None or v.strip() == "" else v
 
 
+def _env_bool(key: str, default: bool) -> bool:
+    v = os.getenv(key)
+    if v is None or v.strip() == "":
+        return default
+    return v.strip().lower() in ("1", "true", "yes", "on")
+
+
 @dataclass(frozen=True)
 class Settings:
     # Window
@@ -34,5 +41,13 @@ class Settings:
     SEASON: int = _env_int("SEASON", 2023)
     ROUND: int = _env_int("ROUND", 1)
 
+    # Offline playback: download each race once as a bundle, then
+    # play it locally with no further requests
+    OFFLINE_REPLAY: bool = _env_bool("OFFLINE_REPLAY", False)
+    REPLAY_CACHE_DIR: str = _env_str(
+        "REPLAY_CACHE_DIR",
+        os.path.join(os.path.expanduser("~"), ".cache", "f1-replay"),
+    )
+
 
 settings = Settings()
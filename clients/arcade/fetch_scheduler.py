@@ -0,0 +1,100 @@
+# clients/arcade/fetch_scheduler.py
+
+# Round-trip estimate: exponentially weighted moving average
+RTT_SMOOTHING = 0.2
+
+# Until the server reports its telemetry rate (ms between samples)
+DEFAULT_SAMPLE_MS = 250
+
+# Frame spacing: at least one data sample apart (denser frames only
+# repeat the same positions), in STEP_QUANTUM_MS multiples. Dots move
+# in straight lines between frames, so the spacing is capped in race
+# time whatever the speed: a car covers ~80 m in MAX_STEP_MS, short
+# enough to follow corners. High speed means bigger batches instead
+STEP_QUANTUM_MS = 50
+MAX_STEP_MS = 1_000
+
+# Buffered wall time ahead of the playhead: enough to ride out
+# LEAD_RTTS round trips, within [MIN_LEAD_WALL_S, MAX_LEAD_WALL_S]
+MIN_LEAD_WALL_S = 3.0
+MAX_LEAD_WALL_S = 10.0
+LEAD_RTTS = 8
+
+# Race time kept ahead while paused (ready to resume, nothing more)
+PAUSED_LEAD_MS = 2_000
+
+# Refill once this fraction of the lead has played out, so requests
+# are a few large batches instead of many small ones
+REFILL_FRACTION = 0.5
+
+# Clock sync: ticks while playing, slow polling while paused
+CLOCK_SYNC_PLAYING_S = 0.25
+CLOCK_SYNC_PAUSED_S = 2.0
+
+
+class FetchScheduler:
+    """
+    Decides what ReplayStream fetches and when, from measured
+    round-trip latency, the race's telemetry sample rate and the
+    playback speed, so server load follows new information rather
+    than the display refresh rate:
+
+    - step_ms: frames no denser than the data, never more than
+      MAX_STEP_MS of race time apart
+    - lead_ms: how far ahead to buffer; grows with speed and latency
+      (so more frames per batch at high speed)
+    - refill_below_ms: buffered time below which the next batch is
+      requested
+    - clock_interval_s: how often to sync the server clock
+    """
+
+    def __init__(self):
+        self.rtt_s: float | None = None
+        self.sample_ms = DEFAULT_SAMPLE_MS
+
+        # Stats for the HUD
+        self.requests = 0
+        self.frames = 0
+
+    def observe(self, rtt_s: float, frames: int, sample_ms: int | None = None):
+        """
+        Record one completed /replay/range request.
+        """
+        self.rtt_s = (
+            rtt_s if self.rtt_s is None
+            else self.rtt_s + RTT_SMOOTHING * (rtt_s - self.rtt_s)
+        )
+        if sample_ms:
+            self.sample_ms = int(sample_ms)
+
+        self.requests += 1
+        self.frames += frames
+
+    def step_ms(self) -> int:
+        step = max(self.sample_ms, STEP_QUANTUM_MS)
+        step = -(-int(step) // STEP_QUANTUM_MS) * STEP_QUANTUM_MS
+        return min(step, MAX_STEP_MS)
+
+    def lead_ms(self, speed: float, playing: bool) -> int:
+        if not playing:
+            return PAUSED_LEAD_MS
+
+        rtt_s = self.rtt_s or 0.0
+        lead_wall_s = min(max(MIN_LEAD_WALL_S, rtt_s * LEAD_RTTS), MAX_LEAD_WALL_S)
+        return max(PAUSED_LEAD_MS, int(lead_wall_s * 1000 * speed))
+
+    def refill_below_ms(self, speed: float, playing: bool) -> int:
+        lead = self.lead_ms(speed, playing)
+        if not playing:
+            return lead
+        return int(lead * REFILL_FRACTION)
+
+    def clock_interval_s(self, playing: bool) -> float:
+        return CLOCK_SYNC_PLAYING_S if playing else CLOCK_SYNC_PAUSED_S
+
+    def summary(self) -> str:
+        rtt = f"{self.rtt_s * 1000:.0f} ms" if self.rtt_s is not None else "-"
+        return (
+            f"rtt {rtt}  step {self.step_ms()} ms  "
+            f"{self.requests} req / {self.frames} frames"
+        )
@@ -0,0 +1,43 @@
+# clients/arcade/frame_timer.py
+
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Frames kept for the rolling statistics (~4 s at 60 FPS)
+DEFAULT_WINDOW = 240
+
+
+class FrameTimer:
+    """
+    Rolling CPU time of one per-frame section (on_update, on_draw),
+    in milliseconds. Measures the Python / draw-call submission side;
+    GPU work is asynchronous and not included.
+    """
+
+    def __init__(self, window: int = DEFAULT_WINDOW):
+        self.samples: deque = deque(maxlen=window)
+
+    @contextmanager
+    def measure(self):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.samples.append((time.perf_counter() - start) * 1000)
+
+    @property
+    def avg_ms(self) -> float:
+        if not self.samples:
+            return 0.0
+        return sum(self.samples) / len(self.samples)
+
+    @property
+    def p95_ms(self) -> float:
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+    def summary(self) -> str:
+        return f"{self.avg_ms:.2f} ms avg / {self.p95_ms:.2f} ms p95"
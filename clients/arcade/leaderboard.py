@@ -1,56 +1,107 @@
 import arcade
-from clients.arcade.driver_status import resolve_driver_status
+import pyglet
+
 from clients.arcade.colors import get_team_color
 
+HEADER = "POS   NAME     STATUS"
+HEADER_FONT_SIZE = 14
+ROW_FONT_SIZE = 12
+HEADER_GAP = 24
+ROW_HEIGHT = 20
+
+# Same default font as arcade.draw_text
+FONT_NAME = ("calibri", "arial")
+
 
 class LeaderboardRenderer:
     """
     Render-only leaderboard.
-    Ordering is authoritative from backend frame.
+    Ordering and driver status are authoritative from backend frame.
+
+    Retained mode: one persistent text label per row, all in a single
+    batch. A frame only re-lays out the rows whose text or color
+    changed; an unchanged order costs a list comparison, and drawing
+    is one batched call whatever the row count.
     """
 
     def __init__(self):
-        self.entries: list[dict] = []
+        # (line, color) per row, in race order
+        self.rows: list[tuple[str, tuple]] = []
+
+        self._batch = pyglet.graphics.Batch()
+        self._header: pyglet.text.Label | None = None
+        self._labels: list[pyglet.text.Label] = []
+
+        self._origin = None
+        self._dirty = False
 
     def update_from_frame(self, driver_states: list[dict], time_ms: int):
-        self.entries = []
+        rows = [
+            (
+                f"P{idx:>2}   "
+                f"{d.get('driver_code', d['driver_id']):<7}   "
+                f"{d.get('status', 'Racing'):<8}",
+                get_team_color(d.get("team", "Unknown")),
+            )
+            for idx, d in enumerate(driver_states, start=1)
+        ]
 
-        for idx, d in enumerate(driver_states, start=1):
-            self.entries.append({
-                "position": idx,
-                "name": d.get("driver_code", d["driver_id"]),
-                "status": resolve_driver_status(d["driver_id"], time_ms),
-                "team": d.get("team", "Unknown"),
-            })
+        if rows != self.rows:
+            self.rows = rows
+            self._dirty = True
 
     def draw(self, x: int, y: int):
-        # Header
-        arcade.draw_text(
-            "POS   NAME     STATUS",
-            x,
-            y,
-            arcade.color.WHITE,
-            14,
-            bold=True,
-        )
+        if self._header is None:
+            self._header = self._label(HEADER, arcade.color.WHITE, HEADER_FONT_SIZE, bold=True)
 
-        y -= 24
+        if (x, y) != self._origin:
+            self._origin = (x, y)
+            self._header.position = (x, y)
+            for i, label in enumerate(self._labels):
+                label.position = self._row_position(i)
 
-        for e in self.entries:
-            line = (
-                f"P{e['position']:>2}   "
-                f"{e['name']:<7}   "
-                f"{e['status']:<8}"
-            )
+        if self._dirty:
+            self._sync_labels()
+            self._dirty = False
 
-            color = get_team_color(e["team"])
+        # Raw pyglet drawing needs arcade's pyglet context
+        with arcade.get_window().ctx.pyglet_rendering():
+            self._batch.draw()
 
-            arcade.draw_text(
-                line,
-                x,
-                y,
-                color,
-                12,
-            )
+    # --------------------------------------------------
+    # Internals
+    # --------------------------------------------------
+    def _sync_labels(self):
+        for i, (line, color) in enumerate(self.rows):
+            color = arcade.get_four_byte_color(color)
+
+            if i == len(self._labels):
+                label = self._label(line, color, ROW_FONT_SIZE)
+                label.position = self._row_position(i)
+                self._labels.append(label)
+                continue
+
+            label = self._labels[i]
+            if label.text != line:
+                label.text = line
+            if label.color != color:
+                label.color = color
 
-            y -= 20
+        # Fewer drivers than rows (e.g. after a seek)
+        for label in self._labels[len(self.rows):]:
+            label.delete()
+        del self._labels[len(self.rows):]
+
+    def _row_position(self, i: int) -> tuple[int, int]:
+        x, y = self._origin
+        return x, y - HEADER_GAP - i * ROW_HEIGHT
+
+    def _label(self, text: str, color, font_size: int, bold: bool = False):
+        return pyglet.text.Label(
+            text=text,
+            font_name=FONT_NAME,
+            font_size=font_size,
+            bold=bold,
+            color=arcade.get_four_byte_color(color),
+            batch=self._batch,
+        )
@@ -1,16 +1,24 @@
+import time
+
 import arcade
 
-from clients.arcade.replay_api_client import ReplayAPIClient
+from clients.arcade.replay_bundle import LocalReplay
+from clients.arcade.replay_stream import ReplayStream
+from clients.arcade.s3_track_loader import load_track_async
 from clients.arcade.track import TrackRenderer
 from clients.arcade.driver import DriverDot
 from clients.arcade.colors import get_team_color
 from clients.arcade.config import settings
+from clients.arcade.frame_timer import FrameTimer
+from clients.arcade.race_catalog import RaceCatalog
 from clients.arcade.selector import ReplaySelector
 from clients.arcade.leaderboard import LeaderboardRenderer
 
 BACKGROUND_COLOR = arcade.color.BLACK
 TARGET_FPS = 60
 SEEK_DELTA_MS = 5_000
+# Wait before loading the track again after a failed load
+TRACK_RETRY_S = 5.0
 
 
 class F1ReplayApp(arcade.Window):
@@ -25,18 +33,23 @@ class F1ReplayApp(arcade.Window):
         arcade.set_background_color(BACKGROUND_COLOR)
 
         # --------------------------------------------------
-        # Selector
+        # Selector (races from the server catalog, prewarmed on selection)
         # --------------------------------------------------
-        self.selector = ReplaySelector()
+        self.catalog = RaceCatalog(settings.REPLAY_API_BASE_URL)
+        self.selector = ReplaySelector(self.catalog)
 
         # --------------------------------------------------
-        # API + renderers
+        # Replay source (opened once a race is selected) + renderers
         # --------------------------------------------------
-        self.api = ReplayAPIClient(settings.REPLAY_API_BASE_URL)
+        self.stream = None
         self.track_renderer = TrackRenderer()
+        # Track points loading in the background (online mode)
+        self.track_future = None
+        # Last failed track load (shown in the HUD) and when to retry
+        self.track_error = None
+        self.track_retry_at = None
 
         self.backend_ready = False
-        self.backend_init_attempted = False
 
         self.drivers = {}
         self.leaderboard = LeaderboardRenderer()
@@ -46,6 +59,8 @@ class F1ReplayApp(arcade.Window):
         # --------------------------------------------------
         self.clock_state = None
         self.client_playing = False
+        # Time of the frame the driver dots are heading to
+        self.target_frame_ms = None
 
         # 🔥 PLAYBACK SPEED (CLIENT-ONLY)
         # 1.0 = real time
@@ -55,10 +70,21 @@ class F1ReplayApp(arcade.Window):
         self.ui_race_time_hms = "00:00:00"
         self.last_api_error = None
 
+        # Per-frame CPU time ([F] shows it in the HUD)
+        self.update_timer = FrameTimer()
+        self.draw_timer = FrameTimer()
+        # Leaderboard share of the draw time
+        self.leaderboard_timer = FrameTimer()
+        self.show_timings = False
+
     # ==========================================================
-    # Update
+    # Update (no network I/O: frames come from the stream buffer)
     # ==========================================================
     def on_update(self, delta_time: float):
+        with self.update_timer.measure():
+            self._update_frame(delta_time)
+
+    def _update_frame(self, delta_time: float):
         if self.selector.active:
             return
 
@@ -66,93 +92,110 @@ class F1ReplayApp(arcade.Window):
             self._init_backend()
             return
 
-        try:
-            # ------------------------------
-            # CLOCK STATE
-            # ------------------------------
-            self.clock_state = self.api.get_clock_state()
+        # ------------------------------
+        # ADVANCE PLAYHEAD (SCALED)
+        # ------------------------------
+        self.stream.speed = self.playback_speed
+        self.stream.advance(int(delta_time * 1000 * self.playback_speed))
 
-            if not self.clock_state:
-                return
-
-            self.ui_race_time_hms = self.clock_state["current_time_hms"]
+        self.clock_state = self.stream.clock_state
+        self.last_api_error = self.stream.last_error or self.track_error
+        self.ui_race_time_hms = _hms(self.stream.time_ms)
 
-            # ------------------------------
-            # TICK CLOCK (SCALED)
-            # ------------------------------
-            if self.client_playing:
-                delta_ms = int(delta_time * 1000 * self.playback_speed)
+        # Track arrives in the background (S3 load or offline bundle)
+        if not self.track_renderer.points:
+            points = self._loaded_track_points()
+            if not points:
+                return
+            self.track_renderer.load_points(points)
+            self.track_renderer.fit_to_view(self.width, self.height)
 
-                if delta_ms > 0:
-                    self.api.tick(delta_ms)
-                    self.clock_state = self.api.get_clock_state()
+        # ------------------------------
+        # FRAMES AROUND THE PLAYHEAD
+        # ------------------------------
+        current, upcoming = self.stream.frames()
+        target = upcoming or current
 
-            # ------------------------------
-            # FRAME FETCH
-            # ------------------------------
-            frame = self.api.get_frame()
-            driver_states = frame.get("driver_states", [])
+        if target is None or target["time_ms"] == self.target_frame_ms:
+            return
 
-            if not driver_states:
-                return
+        self.target_frame_ms = target["time_ms"]
 
-            # ------------------------------
-            # LEADERBOARD
-            # ------------------------------
+        # ------------------------------
+        # LEADERBOARD
+        # ------------------------------
+        if current and current.get("driver_states"):
             self.leaderboard.update_from_frame(
-                driver_states,
-                self.clock_state["current_time_ms"],
+                current["driver_states"],
+                current["time_ms"],
             )
 
-            # ------------------------------
-            # DRIVERS
-            # ------------------------------
-            for d in driver_states:
-                driver_id = d["driver_id"]
-                team = d.get("team", "Unknown")
-                x = d["x"]
-                y = d["y"]
-
-                if driver_id not in self.drivers:
-                    self.drivers[driver_id] = DriverDot(
-                        color=get_team_color(team)
-                    )
-
-                sx, sy = self.track_renderer.to_screen(x, y)
-
-                self.drivers[driver_id].update(
-                    sx,
-                    sy,
-                    self.clock_state["current_time_ms"],
+        # ------------------------------
+        # DRIVERS (interpolate towards the upcoming frame)
+        # ------------------------------
+        for d in target.get("driver_states", []):
+            driver_id = d["driver_id"]
+            team = d.get("team", "Unknown")
+
+            if driver_id not in self.drivers:
+                self.drivers[driver_id] = DriverDot(
+                    color=get_team_color(team)
                 )
 
-            self.last_api_error = None
+            sx, sy = self.track_renderer.to_screen(d["x"], d["y"])
+
+            self.drivers[driver_id].update(sx, sy, target["time_ms"])
+
+    def _loaded_track_points(self):
+        if self.track_retry_at is not None:
+            if time.monotonic() < self.track_retry_at:
+                return None
+            self.track_retry_at = None
+            self._load_track()
+
+        if self.track_future is None:
+            bundle = getattr(self.stream, "bundle", None)
+            return bundle.track if bundle else None
 
+        if not self.track_future.done():
+            return None
+
+        future, self.track_future = self.track_future, None
+        try:
+            points = future.result()
         except Exception as e:
-            print("[ERROR] on_update:", e)
-            self.last_api_error = str(e)
+            print("[ERROR] track load:", e)
+            self.track_error = f"track: {e}"
+            self.track_retry_at = time.monotonic() + TRACK_RETRY_S
+            return None
+
+        self.track_error = None
+        return points
+
+    def _load_track(self):
+        # Off the render thread (disk cache by ETag); picked up in on_update
+        self.track_future = load_track_async(
+            settings.CURATED_BUCKET,
+            self.selected_season,
+            self.selected_round,
+        )
 
     # ==========================================================
     # Backend init
     # ==========================================================
     def _init_backend(self):
-        if self.backend_init_attempted:
-            return
-
-        self.backend_init_attempted = True
-
-        try:
-            self.api.reset()
-            self.client_playing = False
-            self.backend_ready = True
-        except Exception as e:
-            self.last_api_error = str(e)
-            self.backend_init_attempted = False
+        self.stream.reset()
+        self.client_playing = False
+        self.backend_ready = True
 
     # ==========================================================
     # Draw
     # ==========================================================
     def on_draw(self):
+        with self.draw_timer.measure():
+            self._draw_frame()
+
+    def _draw_frame(self):
         self.clear()
 
         if self.selector.active:
@@ -161,11 +204,7 @@ class F1ReplayApp(arcade.Window):
 
         self.track_renderer.draw()
 
-        render_time_ms = (
-            self.clock_state["current_time_ms"]
-            if self.clock_state
-            else 0
-        )
+        render_time_ms = self.stream.time_ms
 
         for driver in self.drivers.values():
             driver.draw(render_time_ms)
@@ -186,6 +225,8 @@ class F1ReplayApp(arcade.Window):
             if self.clock_state
             else "CONNECTING..."
         )
+        if self.client_playing and self.stream.buffered_ms == 0:
+            phase += " (buffering)"
 
         arcade.draw_text(
             f"phase: {phase}",
@@ -203,13 +244,45 @@ class F1ReplayApp(arcade.Window):
             14,
         )
 
-        self.leaderboard.draw(
-            x=self.width - 420,
-            y=self.height - 80,
-        )
+        if self.last_api_error:
+            arcade.draw_text(
+                f"error: {self.last_api_error}",
+                20,
+                55,
+                arcade.color.RED,
+                12,
+            )
+
+        with self.leaderboard_timer.measure():
+            self.leaderboard.draw(
+                x=self.width - 420,
+                y=self.height - 80,
+            )
+
+        if self.show_timings:
+            arcade.draw_text(
+                f"cpu  update {self.update_timer.summary()}   "
+                f"draw {self.draw_timer.summary()}   "
+                f"leaderboard {self.leaderboard_timer.summary()}",
+                20,
+                self.height - 130,
+                arcade.color.LIGHT_GRAY,
+                12,
+            )
+
+            # Online only (offline playback makes no requests)
+            scheduler = getattr(self.stream, "scheduler", None)
+            if scheduler:
+                arcade.draw_text(
+                    f"fetch  {scheduler.summary()}",
+                    20,
+                    self.height - 150,
+                    arcade.color.LIGHT_GRAY,
+                    12,
+                )
 
         arcade.draw_text(
-            "[SPACE] Play/Pause   [←/→] Seek ±5s   [ / ] Speed   [R] Reset",
+            "[SPACE] Play/Pause   [←/→] Seek ±5s   [ / ] Speed   [R] Reset   [F] Timing",
             20,
             30,
             arcade.color.GRAY,
@@ -231,31 +304,24 @@ class F1ReplayApp(arcade.Window):
 
         if symbol == arcade.key.SPACE:
             if self.client_playing:
-                self.api.pause()
+                self.stream.pause()
                 self.client_playing = False
             else:
-                self.api.play()
+                self.stream.play()
                 self.client_playing = True
 
         elif symbol == arcade.key.R:
-            self.api.reset()
+            self.stream.reset()
             self.client_playing = False
-            self.drivers.clear()
+            self._clear_drivers()
 
         elif symbol == arcade.key.RIGHT:
-            self.api.seek(
-                self.clock_state["current_time_ms"] + SEEK_DELTA_MS
-            )
-            self.drivers.clear()
+            self.stream.seek(self.stream.time_ms + SEEK_DELTA_MS)
+            self._clear_drivers()
 
         elif symbol == arcade.key.LEFT:
-            self.api.seek(
-                max(
-                    0,
-                    self.clock_state["current_time_ms"] - SEEK_DELTA_MS
-                )
-            )
-            self.drivers.clear()
+            self.stream.seek(max(0, self.stream.time_ms - SEEK_DELTA_MS))
+            self._clear_drivers()
 
         # 🔥 SPEED CONTROLS
         elif symbol == arcade.key.BRACKETRIGHT:
@@ -264,16 +330,44 @@ class F1ReplayApp(arcade.Window):
         elif symbol == arcade.key.BRACKETLEFT:
             self.playback_speed = max(self.playback_speed / 2, 0.25)
 
+        elif symbol == arcade.key.F:
+            self.show_timings = not self.show_timings
+
+    def _clear_drivers(self):
+        self.drivers.clear()
+        self.target_frame_ms = None
+
+    def on_resize(self, width: int, height: int):
+        super().on_resize(width, height)
+
+        # Also fired while the window is being created
+        renderer = getattr(self, "track_renderer", None)
+
+        # Cached per window size: only new sizes recompute geometry
+        if renderer and renderer.points:
+            renderer.fit_to_view(width, height)
+            self._clear_drivers()
+
+    def on_close(self):
+        if self.stream:
+            self.stream.stop()
+        self.catalog.close()
+        print(
+            f"[timing] update {self.update_timer.summary()} | "
+            f"draw {self.draw_timer.summary()} | "
+            f"leaderboard {self.leaderboard_timer.summary()}"
+        )
+        super().on_close()
+
     # ==========================================================
     # Selection → backend wiring
     # ==========================================================
     def _start_selected_race(self):
         # Reset frontend state
         self.backend_ready = False
-        self.backend_init_attempted = False
         self.client_playing = False
         self.playback_speed = 4.0
-        self.drivers.clear()
+        self._clear_drivers()
         self.clock_state = None
         self.ui_race_time_hms = "00:00:00"
 
@@ -282,17 +376,45 @@ class F1ReplayApp(arcade.Window):
         self.selected_round = self.selector.round
         self.selected_session = self.selector.session
 
-        # Reload track for selected race
+        if self.stream:
+            self.stream.stop()
+
         self.track_renderer = TrackRenderer()
-        self.track_renderer.load_from_s3(
-            settings.CURATED_BUCKET,
+        self.track_future = None
+        self.track_error = None
+        self.track_retry_at = None
+
+        if settings.OFFLINE_REPLAY:
+            # Whole race from the bundle (disk cache or one download);
+            # the track comes with it, see on_update
+            self.stream = LocalReplay(
+                settings.REPLAY_API_BASE_URL,
+                self.selected_season,
+                self.selected_round,
+                self.selected_session,
+                settings.REPLAY_CACHE_DIR,
+            )
+            self.stream.start()
+            return
+
+        # Track for the selected race, loaded in the background
+        self._load_track()
+
+        # ✅ Fresh stream (empty buffer, new connection)
+        self.stream = ReplayStream(
+            settings.REPLAY_API_BASE_URL,
             self.selected_season,
             self.selected_round,
         )
-        self.track_renderer.fit_to_view(self.width, self.height)
+        self.stream.start()
+
 
-        # ✅ Recreate API client (NO extra params)
-        self.api = ReplayAPIClient(settings.REPLAY_API_BASE_URL)
+def _hms(time_ms: int) -> str:
+    total_seconds = time_ms // 1000
+    h = total_seconds // 3600
+    m = (total_seconds % 3600) // 60
+    s = total_seconds % 60
+    return f"{h:02d}:{m:02d}:{s:02d}"
 
 
 def main():
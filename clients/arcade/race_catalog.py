@@ -0,0 +1,112 @@
+# clients/arcade/race_catalog.py
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from clients.arcade.replay_api_client import ReplayAPIClient
+
+# Re-fetch the catalog this often while a race is loading on the server
+LOADING_POLL_S = 2.0
+
+
+class RaceCatalog:
+    """
+    The server's race catalog for the selector, fetched off the
+    render thread. Also sends prewarm requests so the server loads a
+    race while the user is still in the menu.
+
+    races: {season: {round: {session: info}}} once fetched, else None
+    (the selector keeps its built-in options).
+    """
+
+    def __init__(self, base_url: str):
+        self.api = ReplayAPIClient(base_url)
+
+        self.races: dict | None = None
+        self.last_error: str | None = None
+        # Bumped on every successful fetch (selector rebuilds its options)
+        self.revision = 0
+
+        self._lock = threading.Lock()
+        self._fetching = False
+        self._fetched_at = 0.0
+        self._executor = ThreadPoolExecutor(
+            max_workers=1,
+            thread_name_prefix="race-catalog",
+        )
+
+    # ==========================================================
+    # Render thread (never blocks)
+    # ==========================================================
+    def refresh(self):
+        with self._lock:
+            if self._fetching:
+                return
+            self._fetching = True
+        self._executor.submit(self._fetch)
+
+    def poll(self):
+        """
+        Keep load status fresh while any race is loading.
+        """
+        if time.monotonic() - self._fetched_at < LOADING_POLL_S:
+            return
+        if self.races is None or any(
+            info.get("status") == "loading"
+            for rounds in self.races.values()
+            for sessions in rounds.values()
+            for info in sessions.values()
+        ):
+            self.refresh()
+
+    def prewarm(self, season: int, round_: int, session: str):
+        if self.races is not None and self.info(season, round_, session) is None:
+            return
+        self._executor.submit(self._prewarm, season, round_, session)
+
+    def info(self, season: int, round_: int, session: str) -> dict | None:
+        if self.races is None:
+            return None
+        return self.races.get(season, {}).get(round_, {}).get(session)
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self.api.close()
+
+    # ==========================================================
+    # Worker thread
+    # ==========================================================
+    def _fetch(self):
+        try:
+            catalog = self.api.get_catalog()
+            self.races = {
+                s["season"]: {
+                    r["round"]: {x["session"]: x for x in r["sessions"]}
+                    for r in s["rounds"]
+                }
+                for s in catalog["seasons"]
+            }
+            self.last_error = None
+            self.revision += 1
+        except Exception as e:
+            print("[ERROR] race catalog:", e)
+            self.last_error = str(e)
+        finally:
+            self._fetched_at = time.monotonic()
+            with self._lock:
+                self._fetching = False
+
+    def _prewarm(self, season: int, round_: int, session: str):
+        try:
+            status = self.api.prewarm(season, round_, session)["status"]
+        except Exception as e:
+            print("[ERROR] prewarm:", e)
+            self.last_error = str(e)
+            return
+
+        info = self.info(season, round_, session)
+        if info is not None:
+            info["status"] = status
+            info["loaded"] = status == "loaded"
+            self.revision += 1
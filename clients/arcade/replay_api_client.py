@@ -1,12 +1,26 @@
 # clients/arcade/replay_api_client.py
 
 import requests
+from requests.adapters import HTTPAdapter
+
+# (connect, read) seconds; calls run on the stream worker, never
+# on the render thread, so a slow response only delays buffering
+DEFAULT_TIMEOUT = (1.0, 5.0)
 
 
 class ReplayAPIClient:
-    def __init__(self, base_url: str):
+    def __init__(self, base_url: str, timeout=DEFAULT_TIMEOUT):
         self.base_url = base_url.rstrip("/")
-        self.timeout = 0.5
+        self.timeout = timeout
+
+        # One keep-alive connection pool for every call
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=2)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def close(self):
+        self.session.close()
 
     # -------------------------
     # Internal helper
@@ -26,35 +40,35 @@ class ReplayAPIClient:
     # Clock
     # -------------------------
     def get_clock_state(self):
-        r = requests.get(
+        r = self.session.get(
             f"{self.base_url}/clock/state",
             timeout=self.timeout,
         )
         return self._safe_json(r)
 
     def play(self):
-        r = requests.post(
+        r = self.session.post(
             f"{self.base_url}/clock/play",
             timeout=self.timeout,
         )
         return self._safe_json(r)
 
     def pause(self):
-        r = requests.post(
+        r = self.session.post(
             f"{self.base_url}/clock/pause",
             timeout=self.timeout,
         )
         return self._safe_json(r)
 
     def reset(self):
-        r = requests.post(
+        r = self.session.post(
             f"{self.base_url}/clock/reset",
             timeout=self.timeout,
         )
         return self._safe_json(r)
 
     def tick(self, delta_ms: int = 1000):
-        r = requests.post(
+        r = self.session.post(
             f"{self.base_url}/clock/tick",
             params={"base_ms": delta_ms},
             timeout=self.timeout,
@@ -62,7 +76,7 @@ class ReplayAPIClient:
         return self._safe_json(r)
 
     def seek(self, target_time_ms: int):
-        r = requests.post(
+        r = self.session.post(
             f"{self.base_url}/clock/seek",
             params={"target_time_ms": target_time_ms},
             timeout=self.timeout,
@@ -73,8 +87,58 @@ class ReplayAPIClient:
     # Frames
     # -------------------------
     def get_frame(self):
-        r = requests.get(
+        r = self.session.get(
             f"{self.base_url}/replay/frame",
             timeout=self.timeout,
         )
         return self._safe_json(r)
+
+    def get_range(
+        self,
+        start_ms: int,
+        end_ms: int,
+        step_ms: int,
+        season: int | None = None,
+        round_: int | None = None,
+    ):
+        """
+        Frames at start_ms, start_ms + step_ms, ... <= end_ms
+        (the server's default race unless season / round_ are given).
+
+        Returns the whole response: {"frames", "sample_ms"}.
+        """
+        params = {
+            "start_ms": start_ms,
+            "end_ms": end_ms,
+            "step_ms": step_ms,
+        }
+        if season is not None and round_ is not None:
+            params.update(season=season, round=round_)
+
+        r = self.session.get(
+            f"{self.base_url}/replay/range",
+            params=params,
+            timeout=self.timeout,
+        )
+        return self._safe_json(r)
+
+    # -------------------------
+    # Races
+    # -------------------------
+    def get_catalog(self, refresh: bool = False):
+        r = self.session.get(
+            f"{self.base_url}/replay/catalog",
+            params={"refresh": refresh},
+            timeout=self.timeout,
+        )
+        return self._safe_json(r)
+
+    def prewarm(self, season: int, round_: int, session: str = "RACE"):
+        r = self.session.post(
+            f"{self.base_url}/replay/prewarm",
+            params={"season": season, "round": round_, "session": session},
+            timeout=self.timeout,
+        )
+        if r.status_code != 202:
+            raise RuntimeError(f"HTTP {r.status_code}: {r.text}")
+        return r.json()
@@ -0,0 +1,291 @@
+# clients/arcade/replay_bundle.py
+
+import json
+import os
+import re
+import threading
+from pathlib import Path
+
+import numpy as np
+import requests
+
+# Must match the server's BUNDLE_VERSION (part of the cache key)
+BUNDLE_VERSION = 2
+BUNDLE_STEP_MS = 250
+
+# (connect, read) seconds; a whole race is a few MB
+DOWNLOAD_TIMEOUT = (2.0, 120.0)
+DOWNLOAD_CHUNK_BYTES = 1 << 20
+
+
+def _cache_prefix(season: int, round_: int, session: str) -> str:
+    return f"{season}_{round_}_{session}_v{BUNDLE_VERSION}"
+
+
+def cached_bundle(
+    cache_dir: str,
+    season: int,
+    round_: int,
+    session: str,
+) -> tuple[Path, str] | None:
+    """
+    (path, ETag) of the race's bundle on disk, if any.
+    """
+    prefix = _cache_prefix(season, round_, session)
+    for path in sorted(Path(cache_dir).glob(f"{prefix}--*.npz")):
+        return path, path.stem[len(prefix) + 2:]
+    return None
+
+
+def fetch_bundle(
+    base_url: str,
+    season: int,
+    round_: int,
+    session: str,
+    cache_dir: str,
+) -> Path:
+    """
+    Bundle path, revalidated against the server by ETag: an unchanged
+    race is not downloaded again (304), a re-curated one replaces the
+    cached file. Without a server the cached bundle is used as is.
+
+    Written to a temp file and renamed, so a partial download
+    never looks like a cached bundle.
+    """
+    cached = cached_bundle(cache_dir, season, round_, session)
+    headers = {"If-None-Match": f'"{cached[1]}"'} if cached else {}
+
+    try:
+        r = requests.get(
+            f"{base_url.rstrip('/')}/replay/bundle",
+            params={"season": season, "round": round_, "step_ms": BUNDLE_STEP_MS},
+            headers=headers,
+            timeout=DOWNLOAD_TIMEOUT,
+            stream=True,
+        )
+    except requests.RequestException:
+        if cached:
+            return cached[0]
+        raise
+
+    with r:
+        if r.status_code == 304 and cached:
+            return cached[0]
+        if r.status_code != 200:
+            raise RuntimeError(f"HTTP {r.status_code}: {r.text}")
+
+        version = r.headers.get("X-Bundle-Version")
+        if version != str(BUNDLE_VERSION):
+            raise RuntimeError(
+                f"Bundle version {version} (client expects {BUNDLE_VERSION})"
+            )
+
+        # ETag as a file name part (quotes and separators dropped)
+        etag = re.sub(r"[^A-Za-z0-9._-]", "", r.headers.get("ETag", ""))
+        prefix = _cache_prefix(season, round_, session)
+        path = Path(cache_dir) / f"{prefix}--{etag}.npz"
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".part-{os.getpid()}")
+        try:
+            with open(tmp, "wb") as f:
+                for chunk in r.iter_content(DOWNLOAD_CHUNK_BYTES):
+                    f.write(chunk)
+            os.replace(tmp, path)
+        finally:
+            tmp.unlink(missing_ok=True)
+
+    if cached and cached[0] != path:
+        cached[0].unlink(missing_ok=True)
+    return path
+
+
+class ReplayBundle:
+    """
+    A whole race in memory: dense (driver, frame) position and
+    status grids every step_ms, plus roster and track. Frames are
+    built on demand in the same shape as the API's /replay/frame.
+    """
+
+    def __init__(self, path: Path):
+        with np.load(path, allow_pickle=False) as data:
+            self.meta = json.loads(bytes(data["meta"]).decode("utf-8"))
+            self.x = data["x"]
+            self.y = data["y"]
+            self.distance = data["distance"]
+            self.status = data["status"]
+            self.track = [tuple(p) for p in data["track"].tolist()]
+
+        if not self.track:
+            self.track = self._driver_path()
+
+        if self.meta["version"] != BUNDLE_VERSION:
+            raise ValueError(f"Unsupported bundle version {self.meta['version']}")
+
+        self.roster = self.meta["roster"]
+        self.status_labels = self.meta["statuses"]
+        self.start_ms = int(self.meta["start_ms"])
+        self.step_ms = int(self.meta["step_ms"])
+        self.count = int(self.meta["frames"])
+        self.end_ms = self.start_ms + (self.count - 1) * self.step_ms
+
+    def _driver_path(self, max_points: int = 2_000) -> list:
+        """
+        Fallback track (no centerline in the bundle): the path of the
+        driver with the most samples.
+        """
+        valid = ~np.isnan(self.x)
+        if not valid.any():
+            return []
+
+        row = int(np.argmax(valid.sum(axis=1)))
+        cols = np.flatnonzero(valid[row])
+        cols = cols[:: max(1, len(cols) // max_points)]
+        return list(zip(self.x[row, cols].tolist(), self.y[row, cols].tolist()))
+
+    def frame(self, i: int) -> dict:
+        x = self.x[:, i]
+        y = self.y[:, i]
+        distance = self.distance[:, i]
+        status = self.status[:, i]
+
+        # Race order: furthest first; drivers without a sample yet skipped
+        order = [
+            r for r in np.argsort(-distance, kind="stable")
+            if not np.isnan(x[r])
+        ]
+
+        return {
+            "time_ms": self.start_ms + i * self.step_ms,
+            "phase": "OFFLINE",
+            "driver_states": [
+                {
+                    "driver_id": self.roster[r]["driver_id"],
+                    "driver_code": self.roster[r]["driver_code"],
+                    "team": self.roster[r]["team"],
+                    "x": float(x[r]),
+                    "y": float(y[r]),
+                    "distance": float(distance[r]),
+                    "status": self.status_labels[status[r]],
+                }
+                for r in order
+            ],
+        }
+
+    def bracket(self, time_ms: int) -> tuple[dict | None, dict | None]:
+        """
+        (frame at or before time_ms, next frame), like FrameBuffer.bracket.
+        """
+        i = (time_ms - self.start_ms) // self.step_ms
+        before = self.frame(i) if 0 <= i < self.count else None
+        after = self.frame(i + 1) if -1 <= i < self.count - 1 else None
+        return before, after
+
+
+class LocalReplay:
+    """
+    Offline drop-in for ReplayStream: the bundle is downloaded (or
+    read from the disk cache) once on a background thread, then play,
+    seek and speed changes are purely local, with zero requests.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        season: int,
+        round_: int,
+        session: str,
+        cache_dir: str,
+    ):
+        self.base_url = base_url
+        self.season = season
+        self.round = round_
+        self.session = session
+        self.cache_dir = cache_dir
+
+        self.bundle: ReplayBundle | None = None
+
+        self.time_ms = 0
+        self.playing = False
+        self.speed = 1.0
+
+        self.clock_state: dict | None = {"phase": "DOWNLOADING"}
+        self.last_error: str | None = None
+
+        # Frames memoized per index (the render loop asks repeatedly)
+        self._last_bracket = (None, (None, None))
+
+    # ==========================================================
+    # Lifecycle
+    # ==========================================================
+    def start(self):
+        threading.Thread(
+            target=self._load,
+            name="replay-bundle",
+            daemon=True,
+        ).start()
+
+    def stop(self):
+        pass
+
+    def _load(self):
+        try:
+            path = fetch_bundle(
+                self.base_url,
+                self.season,
+                self.round,
+                self.session,
+                self.cache_dir,
+            )
+            bundle = ReplayBundle(path)
+        except Exception as e:
+            print("[ERROR] replay bundle:", e)
+            self.last_error = str(e)
+            self.clock_state = {"phase": "OFFLINE (unavailable)"}
+            return
+
+        self.time_ms = max(self.time_ms, bundle.start_ms)
+        self.bundle = bundle
+        self.clock_state = {"phase": "OFFLINE"}
+
+    # ==========================================================
+    # Playback (same interface as ReplayStream)
+    # ==========================================================
+    def play(self):
+        self.playing = True
+
+    def pause(self):
+        self.playing = False
+
+    def reset(self):
+        self.playing = False
+        self.time_ms = self.bundle.start_ms if self.bundle else 0
+
+    def seek(self, time_ms: int):
+        self.time_ms = self._clamp(int(time_ms))
+
+    def advance(self, delta_ms: int):
+        if self.playing and delta_ms > 0 and self.bundle:
+            self.time_ms = self._clamp(self.time_ms + delta_ms)
+
+    def frames(self) -> tuple[dict | None, dict | None]:
+        if self.bundle is None:
+            return None, None
+
+        i = (self.time_ms - self.bundle.start_ms) // self.bundle.step_ms
+        cached_i, frames = self._last_bracket
+        if cached_i != i:
+            frames = self.bundle.bracket(self.time_ms)
+            self._last_bracket = (i, frames)
+        return frames
+
+    @property
+    def buffered_ms(self) -> int:
+        if self.bundle is None:
+            return 0
+        return max(0, self.bundle.end_ms - self.time_ms)
+
+    def _clamp(self, time_ms: int) -> int:
+        if self.bundle is None:
+            return max(0, time_ms)
+        return min(max(time_ms, self.bundle.start_ms), self.bundle.end_ms)
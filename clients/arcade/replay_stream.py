@@ -0,0 +1,324 @@
+# clients/arcade/replay_stream.py
+
+import bisect
+import queue
+import threading
+import time
+
+from clients.arcade.fetch_scheduler import FetchScheduler
+from clients.arcade.replay_api_client import ReplayAPIClient
+
+# Server /replay/range returns at most 2000 frames per request
+MAX_BATCH_FRAMES = 2_000
+
+# Frames kept behind the playhead (interpolation start point)
+KEEP_BEHIND_MS = 2_000
+
+# Worker cadence: command latency, retry after an error
+POLL_INTERVAL_S = 0.05
+RETRY_DELAY_S = 0.5
+
+
+class FrameBuffer:
+    """
+    Time-indexed jitter buffer of replay frames.
+
+    The network worker inserts frames (any order, any batch size);
+    the render thread looks them up by replay time without blocking
+    on the network. Lookups only hold the lock for a bisect.
+
+    epoch is bumped by clear() (seek / reset); a batch fetched for an
+    older epoch is refused under the same lock, so it can never land
+    in the buffer after the clear.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._times: list[int] = []
+        self._frames: dict[int, dict] = {}
+        self.epoch = 0
+
+    def insert(self, frames: list[dict], epoch: int | None = None) -> bool:
+        """
+        False (nothing inserted) if the buffer was cleared since epoch.
+        """
+        with self._lock:
+            if epoch is not None and epoch != self.epoch:
+                return False
+            for frame in frames:
+                t = int(frame["time_ms"])
+                if t not in self._frames:
+                    bisect.insort(self._times, t)
+                self._frames[t] = frame
+            return True
+
+    def bracket(self, time_ms: int) -> tuple[dict | None, dict | None]:
+        """
+        (latest frame at or before time_ms, first frame after it).
+        """
+        with self._lock:
+            i = bisect.bisect_right(self._times, time_ms)
+            before = self._frames[self._times[i - 1]] if i > 0 else None
+            after = self._frames[self._times[i]] if i < len(self._times) else None
+            return before, after
+
+    def horizon(self) -> int | None:
+        """
+        Latest buffered replay time (None when empty).
+        """
+        with self._lock:
+            return self._times[-1] if self._times else None
+
+    def drop_before(self, time_ms: int):
+        with self._lock:
+            i = bisect.bisect_left(self._times, time_ms)
+            for t in self._times[:i]:
+                del self._frames[t]
+            del self._times[:i]
+
+    def drop_after(self, time_ms: int):
+        with self._lock:
+            i = bisect.bisect_right(self._times, time_ms)
+            for t in self._times[i:]:
+                del self._frames[t]
+            del self._times[i:]
+
+    def clear(self):
+        with self._lock:
+            self.epoch += 1
+            self._times.clear()
+            self._frames.clear()
+
+    def __len__(self) -> int:
+        return len(self._times)
+
+
+class ReplayStream:
+    """
+    Owns ALL API traffic for the arcade client, on one background
+    thread with a keep-alive session.
+
+    The render thread only calls the non-blocking methods below:
+    controls are queued, the playhead advances locally, frames come
+    from the jitter buffer. The worker applies queued commands,
+    pushes coalesced clock ticks to the server, and keeps the buffer
+    filled ahead of the playhead with /replay/range batches; frame
+    spacing, lead and refill point come from the FetchScheduler
+    (latency, data rate, playback speed).
+
+    If the buffer runs dry the playhead waits for it instead of
+    running ahead of the data.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        season: int | None = None,
+        round_: int | None = None,
+    ):
+        self.api = ReplayAPIClient(base_url)
+        self.buffer = FrameBuffer()
+        self.scheduler = FetchScheduler()
+
+        # Race to fetch (None: the server's default race)
+        self.season = season
+        self.round = round_
+
+        # Render-thread state (read by the worker)
+        self.time_ms = 0
+        self.playing = False
+        self.speed = 1.0
+
+        # Latest server snapshot / error, for the HUD
+        self.clock_state: dict | None = None
+        self.last_error: str | None = None
+
+        self._commands: queue.Queue = queue.Queue()
+        self._pending_tick_ms = 0
+        self._tick_lock = threading.Lock()
+        # Frame spacing of the latest batch in the buffer
+        self._buffered_step_ms = 0
+
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run,
+            name="replay-stream",
+            daemon=True,
+        )
+
+    # ==========================================================
+    # Render thread (never blocks on the network)
+    # ==========================================================
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._commands.put(None)
+
+    def play(self):
+        self.playing = True
+        self._commands.put(("play",))
+
+    def pause(self):
+        self.playing = False
+        self._commands.put(("pause",))
+
+    def reset(self):
+        self.playing = False
+        self._jump(0)
+        self._commands.put(("reset",))
+
+    def seek(self, time_ms: int):
+        time_ms = max(0, int(time_ms))
+        self._jump(time_ms)
+        self._commands.put(("seek", time_ms))
+
+    def advance(self, delta_ms: int):
+        """
+        Move the playhead (when playing and data is buffered).
+        """
+        if not self.playing or delta_ms <= 0:
+            return
+
+        horizon = self.buffer.horizon()
+        if horizon is None or horizon <= self.time_ms:
+            # Underrun: wait for data
+            return
+
+        step = min(delta_ms, horizon - self.time_ms)
+        self.time_ms += step
+
+        with self._tick_lock:
+            self._pending_tick_ms += step
+
+    def frames(self) -> tuple[dict | None, dict | None]:
+        """
+        Buffered frames around the playhead (see FrameBuffer.bracket).
+        """
+        return self.buffer.bracket(self.time_ms)
+
+    @property
+    def buffered_ms(self) -> int:
+        horizon = self.buffer.horizon()
+        return 0 if horizon is None else max(0, horizon - self.time_ms)
+
+    def _jump(self, time_ms: int):
+        # Playhead first: a worker that sees the new buffer epoch
+        # also sees the new playhead (see _fill_buffer)
+        self.time_ms = time_ms
+        # Discards batches in flight for the old position
+        self.buffer.clear()
+        with self._tick_lock:
+            self._pending_tick_ms = 0
+
+    # ==========================================================
+    # Worker thread
+    # ==========================================================
+    def _run(self):
+        last_sync = 0.0
+
+        while not self._stop.is_set():
+            try:
+                self._drain_commands()
+                if self._stop.is_set():
+                    break
+
+                now = time.monotonic()
+                interval = self.scheduler.clock_interval_s(self.playing)
+                if now - last_sync >= interval:
+                    self._sync_clock()
+                    last_sync = now
+
+                self._fill_buffer()
+                self.last_error = None
+
+            except Exception as e:
+                self.last_error = str(e)
+                print("[ERROR] replay stream:", e)
+                self._stop.wait(RETRY_DELAY_S)
+
+        self.api.close()
+
+    def _drain_commands(self):
+        try:
+            command = self._commands.get(timeout=POLL_INTERVAL_S)
+        except queue.Empty:
+            return
+
+        while command is not None:
+            name, *args = command
+            self.clock_state = getattr(self.api, name)(*args)
+
+            try:
+                command = self._commands.get_nowait()
+            except queue.Empty:
+                return
+
+    def _sync_clock(self):
+        """
+        Push the playhead's progress to the server clock in one tick
+        (instead of one request per rendered frame).
+        """
+        with self._tick_lock:
+            delta_ms = self._pending_tick_ms
+            self._pending_tick_ms = 0
+
+        try:
+            self.clock_state = (
+                self.api.tick(delta_ms) if delta_ms > 0
+                else self.api.get_clock_state()
+            )
+        except Exception:
+            with self._tick_lock:
+                self._pending_tick_ms += delta_ms
+            raise
+
+    def _fill_buffer(self):
+        speed, playing = self.speed, self.playing
+        # Epoch before playhead (see _jump)
+        epoch = self.buffer.epoch
+        playhead = self.time_ms
+
+        self.buffer.drop_before(playhead - KEEP_BEHIND_MS)
+
+        step_ms = self.scheduler.step_ms()
+
+        # Step got finer (the server reported a denser data rate):
+        # frames buffered at a much coarser step would play back as
+        # long straight-line hops, refetch them finer
+        if self._buffered_step_ms >= 2 * step_ms:
+            self.buffer.drop_after(playhead + self._buffered_step_ms)
+            self._buffered_step_ms = step_ms
+
+        # Refill only once enough of the buffer has played out
+        horizon = self.buffer.horizon()
+        ahead_ms = None if horizon is None else horizon - playhead
+        if ahead_ms is not None and ahead_ms >= self.scheduler.refill_below_ms(speed, playing):
+            return
+
+        start_ms = (
+            horizon + step_ms if horizon is not None
+            else playhead - playhead % step_ms
+        )
+        end_ms = max(start_ms, playhead + self.scheduler.lead_ms(speed, playing))
+        end_ms = min(end_ms, start_ms + (MAX_BATCH_FRAMES - 1) * step_ms)
+
+        sent = time.monotonic()
+        batch = self.api.get_range(
+            start_ms,
+            end_ms,
+            step_ms,
+            season=self.season,
+            round_=self.round,
+        )
+        frames = batch["frames"]
+        self.scheduler.observe(
+            time.monotonic() - sent,
+            len(frames),
+            batch.get("sample_ms"),
+        )
+
+        # Refused after a seek / reset while the request was in flight
+        if frames and self.buffer.insert(frames, epoch):
+            self._buffered_step_ms = step_ms
@@ -1,13 +1,26 @@
 from __future__ import annotations
 
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass
-from io import BytesIO
-from typing import List, Tuple
+from pathlib import Path
+from typing import Dict, List, Tuple
 
 import boto3
+import numpy as np
 import pyarrow as pa
 import pyarrow.parquet as pq
 
+from clients.arcade.config import settings
+
+# Parallel object downloads per track
+MAX_FETCH_WORKERS = 8
+
+TRACK_COLUMNS = ["point_index", "x", "y"]
+
 
 class S3PartitionNotFound(Exception):
     pass
@@ -19,32 +32,78 @@ class TrackPoint:
     y: float
 
 
-def _list_parquet_keys(bucket: str, prefix: str) -> list[str]:
-    s3 = boto3.client("s3")
+# One client for every call (boto3 clients are thread-safe)
+_s3 = None
+_s3_lock = threading.Lock()
+
+# Background loads (see load_track_async)
+_loader = ThreadPoolExecutor(max_workers=1, thread_name_prefix="track-loader")
+
+
+def _client():
+    global _s3
+    with _s3_lock:
+        if _s3 is None:
+            _s3 = boto3.client("s3")
+        return _s3
+
+
+def _cache_root(cache_dir: str | None) -> Path:
+    return Path(cache_dir or settings.REPLAY_CACHE_DIR) / "tracks"
 
-    keys: list[str] = []
-    paginator = s3.get_paginator("list_objects_v2")
+
+def _digest(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def _list_parquet_objects(bucket: str, prefix: str) -> Dict[str, str]:
+    """
+    {key: etag} of every parquet object under the prefix.
+    """
+    objects: Dict[str, str] = {}
+    paginator = _client().get_paginator("list_objects_v2")
     for page in paginator.paginate(Bucket=bucket, Prefix=prefix):
         for obj in page.get("Contents", []):
             key = obj["Key"]
             if key.endswith(".parquet"):
-                keys.append(key)
+                objects[key] = obj["ETag"].strip('"')
+
+    return objects
+
 
-    return keys
+def _list_with_fallback(bucket: str, prefix: str, root: Path) -> Dict[str, str]:
+    """
+    Listing (the ETag check) with the last successful listing of
+    this prefix as a fallback, so cached tracks open offline.
+    """
+    index = root / "index" / f"{_digest(f'{bucket}/{prefix}')}.json"
 
+    try:
+        objects = _list_parquet_objects(bucket, prefix)
+    except Exception:
+        if not index.exists():
+            raise
+        return json.loads(index.read_text())
 
-def _read_parquet_tables(bucket: str, keys: list[str]) -> pa.Table:
-    s3 = boto3.client("s3")
-    tables: list[pa.Table] = []
+    index.parent.mkdir(parents=True, exist_ok=True)
+    index.write_text(json.dumps(objects))
+    return objects
 
-    for key in keys:
-        body = s3.get_object(Bucket=bucket, Key=key)["Body"].read()
-        table = pq.read_table(BytesIO(body))
-        tables.append(table)
 
-    if not tables:
-        return pa.table({})
-    return pa.concat_tables(tables, promote=True)
+def _cached_object(bucket: str, key: str, etag: str, root: Path) -> Path:
+    """
+    Local copy of one object, keyed by ETag: a changed object gets a
+    new file, an unchanged one is never downloaded again.
+    """
+    path = root / "objects" / f"{_digest(f'{bucket}/{key}')}-{etag}.parquet"
+    if path.exists():
+        return path
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(f".part-{os.getpid()}-{threading.get_ident()}")
+    _client().download_file(bucket, key, str(tmp))
+    os.replace(tmp, path)
+    return path
 
 
 def load_track_from_s3(
@@ -52,29 +111,56 @@ def load_track_from_s3(
     season: int,
     round_: int,
     dataset: str = "track_geometry",
+    cache_dir: str | None = None,
 ) -> List[Tuple[float, float]]:
     """
     Returns ordered track points [(x,y), ...] from:
       s3://{bucket}/{dataset}/season={season}/round={round_}/part-*.parquet
+
+    Objects are cached on disk by ETag and fetched concurrently;
+    Arrow columns go straight to NumPy.
     """
     prefix = f"{dataset}/season={season}/round={round_}/"
-    keys = _list_parquet_keys(bucket=bucket, prefix=prefix)
+    root = _cache_root(cache_dir)
 
-    if not keys:
+    objects = _list_with_fallback(bucket, prefix, root)
+    if not objects:
         raise S3PartitionNotFound(f"No parquet found under s3://{bucket}/{prefix}")
 
-    table = _read_parquet_tables(bucket=bucket, keys=keys)
+    with ThreadPoolExecutor(max_workers=min(MAX_FETCH_WORKERS, len(objects))) as pool:
+        paths = list(pool.map(
+            lambda item: _cached_object(bucket, item[0], item[1], root),
+            sorted(objects.items()),
+        ))
+
+    tables = []
+    for path in paths:
+        table = pq.read_table(path)
+        missing = set(TRACK_COLUMNS) - set(table.column_names)
+        if missing:
+            raise ValueError(f"Track parquet missing columns: {sorted(missing)}")
+        tables.append(table.select(TRACK_COLUMNS))
+
+    table = pa.concat_tables(tables, promote_options="permissive")
 
     if table.num_rows == 0:
         raise S3PartitionNotFound(f"Empty parquet under s3://{bucket}/{prefix}")
 
-    # Convert to pandas only after we have the combined table
-    df = table.to_pandas()
+    order = np.argsort(table["point_index"].to_numpy(), kind="stable")
+    x = table["x"].to_numpy().astype(np.float64)[order]
+    y = table["y"].to_numpy().astype(np.float64)[order]
 
-    required = {"x", "y", "point_index"}
-    missing = required - set(df.columns)
-    if missing:
-        raise ValueError(f"Track parquet missing columns: {sorted(missing)}")
+    return list(zip(x.tolist(), y.tolist()))
 
-    df = df.sort_values("point_index").reset_index(drop=True)
-    return [(float(r["x"]), float(r["y"])) for _, r in df.iterrows()]
+
+def load_track_async(
+    bucket: str,
+    season: int,
+    round_: int,
+    dataset: str = "track_geometry",
+) -> Future:
+    """
+    load_track_from_s3 on a background thread (keeps the window
+    responsive while switching races).
+    """
+    return _loader.submit(load_track_from_s3, bucket, season, round_, dataset)
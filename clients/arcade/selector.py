@@ -1,5 +1,10 @@
 import arcade
 
+# Options until the server catalog arrives (or if it never does)
+FALLBACK_SEASONS = [2023]
+FALLBACK_ROUNDS = list(range(1, 23))
+FALLBACK_SESSIONS = ["RACE"]
+
 
 class Dropdown:
     def __init__(self, label: str, options: list, selected_idx: int = 0):
@@ -7,6 +12,8 @@ class Dropdown:
         self.options = options
         self.selected_idx = selected_idx
         self.open = False
+        # Display text per option (default: the value itself)
+        self.format = str
 
     @property
     def value(self):
@@ -15,16 +22,29 @@ class Dropdown:
     def move(self, delta: int):
         self.selected_idx = (self.selected_idx + delta) % len(self.options)
 
+    def set_options(self, options: list):
+        """
+        Replace the options, keeping the current value when still offered.
+        """
+        current = self.value
+        self.options = options
+        self.selected_idx = options.index(current) if current in options else 0
+
 
 class ReplaySelector:
-    def __init__(self):
+    def __init__(self, catalog=None):
         self.active = True
 
+        # Server race catalog (clients.arcade.race_catalog.RaceCatalog)
+        self.catalog = catalog
+        self._catalog_revision = None
+
         self.dropdowns = [
-            Dropdown("Season", [2023]),
-            Dropdown("Round", list(range(1, 23))),
-            Dropdown("Session", ["RACE"]),
+            Dropdown("Season", list(FALLBACK_SEASONS)),
+            Dropdown("Round", list(FALLBACK_ROUNDS)),
+            Dropdown("Session", list(FALLBACK_SESSIONS)),
         ]
+        self.dropdowns[1].format = self._round_label
 
         self.cursor = 0  # which dropdown / button is focused
         self.start_idx = len(self.dropdowns)  # START button index
@@ -44,6 +64,59 @@ class ReplaySelector:
     def session(self):
         return self.dropdowns[2].value
 
+    # --------------------------------------------------
+    # Catalog
+    # --------------------------------------------------
+    def _sync_catalog(self):
+        """
+        Offer only races the server has data for (once known).
+        """
+        if self.catalog is None:
+            return
+
+        self.catalog.poll()
+
+        if self.catalog.revision == self._catalog_revision:
+            return
+        self._catalog_revision = self.catalog.revision
+
+        races = self.catalog.races
+        if not races:
+            return
+
+        self.dropdowns[0].set_options(sorted(races))
+        self._sync_rounds()
+
+    def _sync_rounds(self):
+        if self.catalog is None or not self.catalog.races:
+            return
+
+        rounds = self.catalog.races.get(self.season, {})
+        if not rounds:
+            return
+
+        self.dropdowns[1].set_options(sorted(rounds))
+        sessions = sorted({s for r in rounds.values() for s in r})
+        self.dropdowns[2].set_options(sessions or list(FALLBACK_SESSIONS))
+
+    def _round_label(self, round_) -> str:
+        info = (
+            self.catalog.info(self.season, round_, self.session)
+            if self.catalog
+            else None
+        )
+        if info is None:
+            return str(round_)
+
+        label = f"{round_}  ({info['bytes'] / 1e6:.0f} MB"
+        if info.get("status") in ("loaded", "loading"):
+            label += f", {info['status']}"
+        return label + ")"
+
+    def _prewarm_selection(self):
+        if self.catalog is not None:
+            self.catalog.prewarm(self.season, self.round, self.session)
+
     # --------------------------------------------------
     # Input
     # --------------------------------------------------
@@ -64,6 +137,13 @@ class ReplaySelector:
                 current.move(1)
             elif symbol in (arcade.key.ENTER, arcade.key.ESCAPE):
                 current.open = False
+                if current is self.dropdowns[0]:
+                    self._sync_rounds()
+                # Server starts loading while the user is still here;
+                # only for a confirmed round (each prewarm is a full
+                # race load on the server)
+                if current is self.dropdowns[1] and symbol == arcade.key.ENTER:
+                    self._prewarm_selection()
             return
 
         # -------------------------------
@@ -77,6 +157,7 @@ class ReplaySelector:
 
         elif symbol == arcade.key.ENTER:
             if self.cursor == self.start_idx:
+                self._prewarm_selection()
                 self.active = False  # START
             else:
                 current.open = True
@@ -85,6 +166,8 @@ class ReplaySelector:
     # Draw
     # --------------------------------------------------
     def draw(self, width, height):
+        self._sync_catalog()
+
         center_x = width / 2
         start_y = height - 140
 
@@ -106,7 +189,7 @@ class ReplaySelector:
             )
 
             arcade.draw_text(
-                f"{dropdown.label}: {dropdown.value}",
+                f"{dropdown.label}: {dropdown.format(dropdown.value)}",
                 center_x,
                 y,
                 label_color,
@@ -123,7 +206,7 @@ class ReplaySelector:
                         else arcade.color.LIGHT_GRAY
                     )
                     arcade.draw_text(
-                        f"- {opt}",
+                        f"- {dropdown.format(opt)}",
                         center_x,
                         oy,
                         color,
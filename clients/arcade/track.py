@@ -1,9 +1,15 @@
 import arcade
-from typing import List, Tuple
-import math
+from typing import Dict, List, Tuple
+
+import numpy as np
 
 from clients.arcade.s3_track_loader import load_track_from_s3
 
+# Screen geometry per (track, window size): race restarts and
+# resizes back to a known size reuse it instead of recomputing
+_GEOMETRY_CACHE: Dict[tuple, tuple] = {}
+_GEOMETRY_CACHE_SIZE = 8
+
 
 class TrackRenderer:
     # 🔥 Wider track for better visibility
@@ -13,6 +19,10 @@ class TrackRenderer:
     SIDE_PADDING = 60
     BOTTOM_PADDING = 60
 
+    OUTER_COLOR = arcade.color.LIGHT_GRAY
+    INNER_COLOR = arcade.color.GRAY
+    LINE_WIDTH = 4
+
     def __init__(self):
         self.points: List[Tuple[float, float]] = []
         self._transform = None
@@ -22,6 +32,14 @@ class TrackRenderer:
         self.outer: List[Tuple[float, float]] = []
         self.surface: List[Tuple[float, float]] = []
 
+        # Boundaries as one prebuilt GPU batch (built on first draw)
+        self._shapes = None
+
+        # NumPy copy of points + its cache key, per points list
+        self._xy_source = None
+        self._xy = None
+        self._xy_key = None
+
     # -------------------------
     # Data loading
     # -------------------------
@@ -30,6 +48,14 @@ class TrackRenderer:
         if not self.points:
             raise ValueError("Empty track geometry")
 
+    def load_points(self, points: List[Tuple[float, float]]):
+        """
+        Track from an already downloaded source (offline bundle).
+        """
+        self.points = list(points)
+        if not self.points:
+            raise ValueError("Empty track geometry")
+
     # -------------------------
     # Layout / transform
     # -------------------------
@@ -41,15 +67,40 @@ class TrackRenderer:
             - self.BOTTOM_PADDING
         )
 
-        self._compute_transform(drawable_width, drawable_height)
-        self._build_boundaries()
+        if self._xy_source is not self.points:
+            self._xy = np.asarray(self.points, dtype=np.float64)
+            self._xy_key = (hash(self._xy.tobytes()), len(self._xy))
+            self._xy_source = self.points
+
+        pts = self._xy
+        key = (
+            *self._xy_key,
+            self.TRACK_HALF_WIDTH,
+            int(window_width),
+            int(window_height),
+        )
+
+        cached = _GEOMETRY_CACHE.get(key)
+        if cached is None:
+            transform = self._compute_transform(pts, drawable_width, drawable_height)
+            inner, outer = self._build_boundaries(pts, transform)
+            cached = (transform, inner, outer)
+
+            if len(_GEOMETRY_CACHE) >= _GEOMETRY_CACHE_SIZE:
+                _GEOMETRY_CACHE.pop(next(iter(_GEOMETRY_CACHE)))
+            _GEOMETRY_CACHE[key] = cached
 
-    def _compute_transform(self, drawable_w: float, drawable_h: float):
-        xs = [p[0] for p in self.points]
-        ys = [p[1] for p in self.points]
+        self._transform, self.inner, self.outer = cached
+        self._shapes = None
 
-        min_x, max_x = min(xs), max(xs)
-        min_y, max_y = min(ys), max(ys)
+    def _compute_transform(
+        self,
+        pts: np.ndarray,
+        drawable_w: float,
+        drawable_h: float,
+    ) -> Tuple[float, float, float]:
+        min_x, min_y = pts.min(axis=0)
+        max_x, max_y = pts.max(axis=0)
 
         scale = min(
             drawable_w / (max_x - min_x),
@@ -70,7 +121,7 @@ class TrackRenderer:
             - min_y * scale
         )
 
-        self._transform = (scale, offset_x, offset_y)
+        return float(scale), float(offset_x), float(offset_y)
 
     def to_screen(self, x: float, y: float):
         scale, ox, oy = self._transform
@@ -79,54 +130,57 @@ class TrackRenderer:
     # -------------------------
     # Geometry
     # -------------------------
-    def _build_boundaries(self):
-        n = len(self.points)
-        inner = []
-        outer = []
-
-        for i in range(n):
-            p_prev = self.points[i - 1]
-            p_curr = self.points[i]
-            p_next = self.points[(i + 1) % n]
-
-            dx = p_next[0] - p_prev[0]
-            dy = p_next[1] - p_prev[1]
-            length = math.hypot(dx, dy)
-            if length == 0:
-                continue
-
-            # Normal vector
-            nx = -dy / length
-            ny = dx / length
-
-            ix = p_curr[0] - nx * self.TRACK_HALF_WIDTH
-            iy = p_curr[1] - ny * self.TRACK_HALF_WIDTH
-            ox = p_curr[0] + nx * self.TRACK_HALF_WIDTH
-            oy = p_curr[1] + ny * self.TRACK_HALF_WIDTH
-
-            inner.append(self.to_screen(ix, iy))
-            outer.append(self.to_screen(ox, oy))
-
-        self.inner = inner
-        self.outer = outer
+    def _build_boundaries(
+        self,
+        pts: np.ndarray,
+        transform: Tuple[float, float, float],
+    ) -> Tuple[List[List[float]], List[List[float]]]:
+        """
+        Inner / outer edges in screen space, all points at once:
+        normal at each point from its neighbours (closed loop),
+        offset by TRACK_HALF_WIDTH, then transformed.
+        """
+        d = np.roll(pts, -1, axis=0) - np.roll(pts, 1, axis=0)
+        length = np.hypot(d[:, 0], d[:, 1])
+        keep = length > 0
+
+        normal = np.column_stack((-d[keep, 1], d[keep, 0])) / length[keep, None]
+        offset = normal * self.TRACK_HALF_WIDTH
+
+        scale, ox, oy = transform
+        origin = np.array([ox, oy])
+        inner = (pts[keep] - offset) * scale + origin
+        outer = (pts[keep] + offset) * scale + origin
+
+        return inner.tolist(), outer.tolist()
 
     # -------------------------
     # Rendering
     # -------------------------
+    def _build_shapes(self):
+        shapes = arcade.ShapeElementList()
+        shapes.append(
+            arcade.create_line_strip(
+                self.outer + [self.outer[0]],
+                self.OUTER_COLOR,
+                self.LINE_WIDTH,
+            )
+        )
+        shapes.append(
+            arcade.create_line_strip(
+                self.inner + [self.inner[0]],
+                self.INNER_COLOR,
+                self.LINE_WIDTH,
+            )
+        )
+        return shapes
+
     def draw(self):
         if not self.inner or not self.outer:
             return
 
-        # 🧱 Outer boundary
-        arcade.draw_line_strip(
-            self.outer + [self.outer[0]],
-            arcade.color.LIGHT_GRAY,
-            4,
-        )
+        # Vertices uploaded once; each frame is a single batched draw
+        if self._shapes is None:
+            self._shapes = self._build_shapes()
 
-        # 🧱 Inner boundary
-        arcade.draw_line_strip(
-            self.inner + [self.inner[0]],
-            arcade.color.GRAY,
-            4,
-        )
+        self._shapes.draw()
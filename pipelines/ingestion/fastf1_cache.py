@@ -0,0 +1,230 @@
+"""
+Shared FastF1 Cache
+-------------------
+One FastF1 cache for every ingestion stage:
+
+- single root:   $FASTF1_CACHE_DIR (default: pipelines/ingestion/fastf1_cache,
+                 independent of the working directory)
+- byte cap:      $FASTF1_CACHE_MAX_BYTES (default 20 GiB), enforced by
+                 evicting least-recently-used SESSIONS after each load
+- concurrency:   fcntl locks, so parallel worker processes never load
+                 (download / pickle) the same session at once, and a
+                 session being loaded is never evicted
+
+FastF1 layout under the root:
+  {year}/{event}/{session}/*.ff1pkl   <- one evictable unit per session
+  fastf1_http_cache.sqlite            <- HTTP cache (counted, not evicted)
+"""
+
+import fcntl
+import os
+import shutil
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, List, Tuple
+
+import fastf1
+
+# -------------------------
+# Configuration
+# -------------------------
+CACHE_ROOT = Path(
+    os.environ.get("FASTF1_CACHE_DIR", Path(__file__).parent / "fastf1_cache")
+)
+CACHE_MAX_BYTES = int(os.environ.get("FASTF1_CACHE_MAX_BYTES", 20 * 1024 ** 3))
+
+LOCK_DIR_NAME = ".locks"
+# Touched on every load; its mtime is the session's LRU timestamp
+LAST_USED_MARKER = ".last_used"
+EVICTION_LOCK = "_eviction"
+# Unmarked session directories (older caches) are only evicted once idle
+UNMARKED_GRACE_S = 3600
+
+
+def configure(
+    root: str | Path | None = None,
+    max_bytes: int | None = None,
+) -> None:
+    """
+    Override root / cap (e.g. from a CLI) before any session is loaded.
+    Exported to the environment so worker processes inherit it.
+    """
+    global CACHE_ROOT, CACHE_MAX_BYTES
+
+    if root is not None:
+        CACHE_ROOT = Path(root)
+        os.environ["FASTF1_CACHE_DIR"] = str(CACHE_ROOT)
+    if max_bytes is not None:
+        CACHE_MAX_BYTES = int(max_bytes)
+        os.environ["FASTF1_CACHE_MAX_BYTES"] = str(CACHE_MAX_BYTES)
+
+
+def enable_cache() -> None:
+    CACHE_ROOT.mkdir(parents=True, exist_ok=True)
+    fastf1.Cache.enable_cache(str(CACHE_ROOT))
+
+
+# -------------------------
+# Locks
+# -------------------------
+def _lock_path(name: str) -> Path:
+    lock_dir = CACHE_ROOT / LOCK_DIR_NAME
+    lock_dir.mkdir(parents=True, exist_ok=True)
+    return lock_dir / f"{name}.lock"
+
+
+@contextmanager
+def cache_lock(name: str, blocking: bool = True) -> Iterator[bool]:
+    """
+    Cross-process lock on a cache entry. Yields False (without
+    waiting) when blocking=False and another process holds it.
+    """
+    with open(_lock_path(name), "w") as lock_file:
+        flags = fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB
+        try:
+            fcntl.flock(lock_file, flags)
+        except BlockingIOError:
+            yield False
+            return
+
+        try:
+            yield True
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def session_lock_name(season: int, round_no: int, session_type: str) -> str:
+    return f"{season}_{round_no}_{session_type}"
+
+
+# -------------------------
+# Loading
+# -------------------------
+def load_session(season: int, round_no: int, session_type: str, **load_kwargs):
+    """
+    fastf1.get_session + load through the shared cache.
+    load_kwargs go to Session.load (laps=, telemetry=, ...).
+    """
+    enable_cache()
+    lock_name = session_lock_name(season, round_no, session_type)
+
+    with cache_lock(lock_name):
+        session = fastf1.get_session(season, round_no, session_type)
+        # Marked before loading, so eviction always finds the lock
+        _mark_used(session, lock_name)
+        session.load(**load_kwargs)
+
+    evict()
+    return session
+
+
+def get_event_schedule(season: int, **kwargs):
+    enable_cache()
+    with cache_lock(f"schedule_{season}"):
+        return fastf1.get_event_schedule(season, **kwargs)
+
+
+def _session_dir(session) -> Path | None:
+    api_path = getattr(session, "api_path", None)
+    if not api_path:
+        return None
+    # "/static/2023/2023-03-05_Bahrain_Grand_Prix/2023-03-05_Race/"
+    return CACHE_ROOT / api_path.strip("/").removeprefix("static/")
+
+
+def _mark_used(session, lock_name: str) -> None:
+    session_dir = _session_dir(session)
+    if session_dir is None:
+        return
+
+    session_dir.mkdir(parents=True, exist_ok=True)
+    marker = session_dir / LAST_USED_MARKER
+    # Rewritten on every load (mtime = LRU timestamp); the content
+    # names the lock that guards this directory during eviction
+    marker.write_text(lock_name)
+
+
+# -------------------------
+# Eviction
+# -------------------------
+def _dir_size(path: Path) -> int:
+    total = 0
+    for f in path.rglob("*"):
+        try:
+            if f.is_file():
+                total += f.stat().st_size
+        except FileNotFoundError:
+            # Removed by another process meanwhile
+            continue
+    return total
+
+
+def cached_sessions() -> List[Tuple[float, int, Path]]:
+    """
+    (last_used, bytes, path) per cached session, oldest first.
+    """
+    sessions = []
+    for session_dir in CACHE_ROOT.glob("*/*/*"):
+        if not session_dir.is_dir() or session_dir.parts[-3] == LOCK_DIR_NAME:
+            continue
+        marker = session_dir / LAST_USED_MARKER
+        last_used = (
+            marker.stat().st_mtime if marker.exists()
+            else session_dir.stat().st_mtime
+        )
+        sessions.append((last_used, _dir_size(session_dir), session_dir))
+    return sorted(sessions)
+
+
+def cache_size() -> int:
+    if not CACHE_ROOT.exists():
+        return 0
+    return _dir_size(CACHE_ROOT)
+
+
+def evict(max_bytes: int | None = None) -> int:
+    """
+    Delete least-recently-used sessions until the cache fits the cap.
+    Sessions whose lock is held (being loaded) are skipped. Only one
+    process evicts at a time; others return immediately.
+    Returns bytes freed.
+    """
+    limit = CACHE_MAX_BYTES if max_bytes is None else max_bytes
+
+    with cache_lock(EVICTION_LOCK, blocking=False) as acquired:
+        if not acquired:
+            return 0
+
+        total = cache_size()
+        freed = 0
+
+        for last_used, size, session_dir in cached_sessions():
+            if total - freed <= limit:
+                break
+
+            marker = session_dir / LAST_USED_MARKER
+            lock_name = marker.read_text() if marker.exists() else None
+
+            if lock_name is None:
+                if time.time() - last_used < UNMARKED_GRACE_S:
+                    continue
+                shutil.rmtree(session_dir, ignore_errors=True)
+                freed += size
+                continue
+
+            with cache_lock(lock_name, blocking=False) as free:
+                if not free:
+                    continue
+                shutil.rmtree(session_dir, ignore_errors=True)
+                freed += size
+
+        # Drop empty event / year directories
+        for parent in [*CACHE_ROOT.glob("*/*"), *CACHE_ROOT.glob("*")]:
+            if parent.name == LOCK_DIR_NAME or not parent.is_dir():
+                continue
+            if not any(parent.iterdir()):
+                parent.rmdir()
+
+        return freed
+
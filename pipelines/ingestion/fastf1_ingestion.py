@@ -4,26 +4,38 @@ FastF1 Ingestion Script
 Ingests raw F1 data for a given season using the FastF1 library
 and stores it in Amazon S3 (raw layer).
 
+Each race session is loaded ONCE (results only, rounds in parallel);
+races, drivers and constructors are all derived from that load.
+
 Execution: Local
 Target Bucket: f1-replay-raw-goutham
-Data Format: JSONLines (newline-delimited JSON)
+Data Format: JSONLines (newline-delimited JSON), gzip
 """
 
-import json
+import argparse
+import hashlib
 import os
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timezone
-from typing import List, Dict
+from typing import List, Dict, Optional
 
 import boto3
-import fastf1
 import pandas as pd
 
+from fastf1_cache import enable_cache, get_event_schedule, load_session
+from manifest import is_current, write_manifest
+from s3_writer import S3JsonLinesWriter, compressed_key
+
 # -------------------------
 # Configuration
 # -------------------------
 RAW_BUCKET = "f1-replay-raw-goutham"
+RAW_COMPRESSION = "gzip"
 SEASON = 2023
-FASTF1_CACHE_DIR = "fastf1_cache"
+MAX_WORKERS = os.cpu_count() or 1
+MANIFEST_DATASET = "season_metadata"
+# Bump when the output format changes (invalidates manifests)
+STAGE_VERSION = 1
 
 # -------------------------
 # AWS Client
@@ -40,99 +52,160 @@ def add_ingestion_metadata(record: Dict) -> Dict:
     return record
 
 
-def upload_jsonlines_to_s3(records: List[Dict], s3_key: str) -> None:
+def upload_jsonlines_to_s3(records: List[Dict], s3_key: str) -> S3JsonLinesWriter:
     """
-    Upload records as newline-delimited JSON (JSONLines).
+    Stream records as newline-delimited JSON (JSONLines).
     """
-    body = "\n".join(json.dumps(r, default=str) for r in records)
+    with S3JsonLinesWriter(
+        s3,
+        RAW_BUCKET,
+        compressed_key(s3_key, RAW_COMPRESSION),
+        compression=RAW_COMPRESSION,
+    ) as writer:
+        writer.write_records(records)
 
-    s3.put_object(
-        Bucket=RAW_BUCKET,
-        Key=s3_key,
-        Body=body.encode("utf-8"),
-        ContentType="application/json"
-    )
+    return writer
+
+
+def completed_rounds(schedule_df: pd.DataFrame) -> List[int]:
+    """
+    Rounds whose event date has passed (i.e. can have results).
+    """
+    now = pd.Timestamp.now(tz="UTC").tz_localize(None)
+    done = schedule_df[
+        (schedule_df["RoundNumber"] > 0)
+        & (pd.to_datetime(schedule_df["EventDate"]) <= now)
+    ]
+    return sorted(int(r) for r in done["RoundNumber"])
+
+
+# -------------------------
+# Per-round extraction
+# -------------------------
+def extract_round(season: int, round_no: int) -> Optional[Dict]:
+    """
+    Load ONE race session (results only) and extract everything the
+    season metadata needs from it. Runs inside a worker process.
+    Returns None when the round has no results (e.g. not raced yet).
+    """
+    try:
+        # Results only: no laps, telemetry, weather or messages
+        session = load_session(
+            season,
+            round_no,
+            "R",
+            laps=False,
+            telemetry=False,
+            weather=False,
+            messages=False,
+        )
+        results_df = session.results
+    except Exception:
+        return None
+
+    if results_df is None or results_df.empty:
+        return None
+
+    drivers = []
+    for driver in results_df.to_dict(orient="records"):
+        if not driver.get("DriverId"):
+            continue
+        drivers.append({
+            "driver_id": driver.get("DriverId"),
+            "driver_number": driver.get("DriverNumber"),
+            "driver_code": driver.get("Abbreviation"),
+            "driver_name": driver.get("FullName"),
+            "team_name": driver.get("TeamName")
+        })
+
+    return {
+        "round": round_no,
+        "race_session_date": str(session.date),
+        "drivers": drivers,
+        "constructors": sorted(results_df["TeamName"].dropna().unique()),
+    }
+
+
+def extract_season(
+    season: int,
+    schedule_df: pd.DataFrame,
+    workers: int = MAX_WORKERS,
+) -> List[Dict]:
+    """
+    Extract every round (in parallel unless workers=1),
+    returned in round order.
+    """
+    rounds = [
+        int(r) for r in schedule_df["RoundNumber"]
+        if int(r) > 0
+    ]
+
+    if workers <= 1:
+        extracted = [extract_round(season, r) for r in rounds]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            extracted = list(
+                pool.map(extract_round, [season] * len(rounds), rounds)
+            )
+
+    return [r for r in extracted if r is not None]
 
 
 # -------------------------
 # Ingestion Functions
 # -------------------------
-def ingest_races(season: int) -> None:
+def ingest_races(
+    season: int,
+    schedule_df: pd.DataFrame,
+    rounds: List[Dict],
+) -> S3JsonLinesWriter:
     """
     Ingest race-level metadata.
     One dataset (table) per season.
     """
-    schedule_df = fastf1.get_event_schedule(season)
+    session_dates = {r["round"]: r["race_session_date"] for r in rounds}
 
     records = []
-    for _, row in schedule_df.iterrows():
-        record = add_ingestion_metadata(row.to_dict())
-        records.append(record)
+    for row in schedule_df.to_dict(orient="records"):
+        row["race_session_date"] = session_dates.get(int(row["RoundNumber"]))
+        records.append(add_ingestion_metadata(row))
 
     s3_key = f"races/season={season}/races_{season}.jsonl"
-    upload_jsonlines_to_s3(records, s3_key)
+    writer = upload_jsonlines_to_s3(records, s3_key)
 
     print(f"[RACES] Season {season}: {len(records)} records written")
+    return writer
 
 
-def ingest_drivers(season: int) -> None:
+def ingest_drivers(season: int, rounds: List[Dict]) -> S3JsonLinesWriter:
     """
     Ingest unique drivers for the season.
     """
     drivers = {}
 
-    schedule_df = fastf1.get_event_schedule(season)
-
-    for _, row in schedule_df.iterrows():
-        round_no = int(row["RoundNumber"])
-
-        try:
-            session = fastf1.get_session(season, round_no, "R")
-            session.load()
-
-            results_df = session.results
-
-            for _, driver in results_df.iterrows():
-                driver_id = driver.get("DriverId")
-                if not driver_id or driver_id in drivers:
-                    continue
-
-                drivers[driver_id] = add_ingestion_metadata({
-                    "driver_id": driver_id,
-                    "driver_number": driver.get("DriverNumber"),
-                    "driver_code": driver.get("Abbreviation"),
-                    "driver_name": driver.get("FullName"),
-                    "team_name": driver.get("TeamName")
-                })
-
-        except Exception:
-            continue
+    for r in rounds:
+        for driver in r["drivers"]:
+            if driver["driver_id"] in drivers:
+                continue
+            drivers[driver["driver_id"]] = add_ingestion_metadata(dict(driver))
 
     records = list(drivers.values())
 
     s3_key = f"drivers/season={season}/drivers_{season}.jsonl"
-    upload_jsonlines_to_s3(records, s3_key)
+    writer = upload_jsonlines_to_s3(records, s3_key)
 
     print(f"[DRIVERS] Season {season}: {len(records)} records written")
+    return writer
 
 
-def ingest_constructors(season: int) -> None:
+def ingest_constructors(season: int, rounds: List[Dict]) -> S3JsonLinesWriter:
     """
     Ingest constructors (teams).
     """
     constructors = set()
 
-    schedule_df = fastf1.get_event_schedule(season)
-
-    for _, row in schedule_df.iterrows():
-        round_no = int(row["RoundNumber"])
-
-        try:
-            session = fastf1.get_session(season, round_no, "R")
-            session.load()
-            constructors.update(session.results["TeamName"].dropna().unique())
-        except Exception:
-            continue
+    for r in rounds:
+        constructors.update(r["constructors"])
 
     records = [
         add_ingestion_metadata({"constructor_name": team})
@@ -140,25 +213,87 @@ def ingest_constructors(season: int) -> None:
     ]
 
     s3_key = f"constructors/season={season}/constructors_{season}.jsonl"
-    upload_jsonlines_to_s3(records, s3_key)
+    writer = upload_jsonlines_to_s3(records, s3_key)
 
     print(f"[CONSTRUCTORS] Season {season}: {len(records)} records written")
+    return writer
+
+
+# -------------------------
+# Core logic
+# -------------------------
+def ingest_season(
+    season: int,
+    force: bool = False,
+    workers: int = MAX_WORKERS,
+) -> Optional[int]:
+    """
+    Ingest races, drivers and constructors for one season.
+    Returns records written, or None if the manifest already
+    covers every completed round.
+    """
+    enable_cache()
+
+    schedule_df = get_event_schedule(season)
+    completed = completed_rounds(schedule_df)
+
+    manifest = is_current(s3, RAW_BUCKET, MANIFEST_DATASET, season, STAGE_VERSION)
+    if (
+        not force
+        and manifest is not None
+        and set(completed) <= set(manifest.get("rounds", []))
+    ):
+        return None
+
+    # One light session load per round, shared by all datasets
+    rounds = extract_season(season, schedule_df, workers)
+    print(f"Loaded results for {len(rounds)} rounds")
+
+    writers = [
+        ingest_races(season, schedule_df, rounds),
+        ingest_drivers(season, rounds),
+        ingest_constructors(season, rounds),
+    ]
+
+    write_manifest(
+        s3,
+        RAW_BUCKET,
+        MANIFEST_DATASET,
+        season,
+        STAGE_VERSION,
+        row_count=sum(w.records_written for w in writers),
+        content_hash=hashlib.sha256(
+            "".join(w.content_hash for w in writers).encode()
+        ).hexdigest(),
+        output_keys=[w.key for w in writers],
+        # Only rounds that loaded: failed ones are retried next run
+        rounds=[r["round"] for r in rounds],
+    )
+
+    return sum(w.records_written for w in writers)
 
 
 # -------------------------
 # Main
 # -------------------------
 def main() -> None:
-    os.makedirs(FASTF1_CACHE_DIR, exist_ok=True)
-    fastf1.Cache.enable_cache(FASTF1_CACHE_DIR)
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--season", type=int, default=SEASON)
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Re-ingest even if the manifest covers every completed round",
+    )
+    args = parser.parse_args()
+    season = args.season
 
     print("Starting FastF1 ingestion")
-    print(f"Season: {SEASON}")
+    print(f"Season: {season}")
     print(f"Target bucket: {RAW_BUCKET}")
 
-    ingest_races(SEASON)
-    ingest_drivers(SEASON)
-    ingest_constructors(SEASON)
+    if ingest_season(season, force=args.force) is None:
+        print(f"Season {season} metadata already current, skipping")
+        return
 
     print("FastF1 ingestion completed successfully")
 
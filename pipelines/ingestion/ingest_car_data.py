@@ -0,0 +1,210 @@
+"""
+Car Telemetry Ingestion Script (RAW)
+------------------------------------
+Extracts per-driver car channels (speed, RPM, throttle, brake, gear,
+DRS) from FastF1 car_data and writes them to S3 RAW as one sorted,
+compressed Parquet file per session.
+
+Same selection / parallelism as ingest_telemetry.py (session_cli.py):
+  python ingest_car_data.py --season 2023 --rounds 1-5,8 --sessions R,Q
+
+Compact typed columns, sorted by (driver_number, timestamp_ms):
+  driver_number (int16), timestamp_ms (int64), speed (float32, km/h),
+  rpm (uint16), throttle (uint8, %), brake (uint8, 0/1),
+  gear (uint8), drs (uint8, raw FastF1 code)
+
+Execution: Local
+Target bucket: f1-replay-raw-goutham
+"""
+
+from datetime import datetime, timezone
+
+import boto3
+import numpy as np
+import pyarrow as pa
+
+from fastf1_cache import load_session
+from ingest_telemetry import write_parquet_to_s3
+from manifest import is_current, write_manifest
+from session_cli import run_sessions
+
+# ---------------------------------
+# Config
+# ---------------------------------
+RAW_BUCKET = "f1-replay-raw-goutham"
+DATASET = "telemetry_car"
+# Bump when the output format changes (invalidates manifests)
+STAGE_VERSION = 1
+
+SCHEMA = pa.schema([
+    ("driver_number", pa.int16()),
+    ("timestamp_ms", pa.int64()),
+    ("speed", pa.float32()),
+    ("rpm", pa.uint16()),
+    ("throttle", pa.uint8()),
+    ("brake", pa.uint8()),
+    ("gear", pa.uint8()),
+    ("drs", pa.uint8()),
+])
+
+# FastF1 column -> (curated column, valid range)
+CHANNELS = {
+    "Speed": ("speed", None),
+    "RPM": ("rpm", (0, 65_535)),
+    "Throttle": ("throttle", (0, 100)),
+    "Brake": ("brake", (0, 1)),
+    "nGear": ("gear", (0, 8)),
+    "DRS": ("drs", (0, 255)),
+}
+
+
+# ---------------------------------
+# Helpers
+# ---------------------------------
+def driver_columns(drv: str, car_df) -> dict | None:
+    """
+    Vectorized extraction of one driver's car channels.
+    Missing values become 0 (unsigned columns have no NaN).
+    """
+    if car_df is None or car_df.empty:
+        return None
+
+    car_df = car_df[car_df["Time"].notna()]
+    n = len(car_df)
+    if n == 0:
+        return None
+
+    columns = {
+        "driver_number": np.full(n, int(drv), dtype=np.int16),
+        "timestamp_ms": (
+            car_df["Time"].to_numpy()
+            .astype("timedelta64[ms]")
+            .astype(np.int64)
+        ),
+    }
+
+    for source, (name, bounds) in CHANNELS.items():
+        dtype = SCHEMA.field(name).type.to_pandas_dtype()
+
+        if source not in car_df.columns:
+            values = np.zeros(n)
+        else:
+            values = car_df[source].to_numpy(dtype=np.float64, na_value=np.nan)
+
+        if bounds is None:
+            columns[name] = values.astype(dtype)
+        else:
+            values = np.nan_to_num(values, nan=0.0)
+            columns[name] = np.clip(np.rint(values), *bounds).astype(dtype)
+
+    return columns
+
+
+def build_car_table(session, season: int, round_no: int) -> pa.Table:
+    """
+    One Arrow table for all drivers, sorted by (driver_number, timestamp_ms).
+    """
+    parts = [
+        driver_columns(drv, session.car_data.get(drv))
+        for drv in session.drivers
+    ]
+    parts = [p for p in parts if p is not None]
+
+    if not parts:
+        raise RuntimeError("No car telemetry extracted")
+
+    table = pa.table(
+        {
+            name: pa.array(np.concatenate([p[name] for p in parts]))
+            for name in SCHEMA.names
+        },
+        schema=SCHEMA,
+    )
+
+    table = table.sort_by([
+        ("driver_number", "ascending"),
+        ("timestamp_ms", "ascending"),
+    ])
+
+    return table.replace_schema_metadata({
+        "season": str(season),
+        "round": str(round_no),
+        "ingestion_timestamp_utc": datetime.now(timezone.utc).isoformat(),
+        "data_source": "fastf1",
+    })
+
+
+# ---------------------------------
+# Core logic
+# ---------------------------------
+def ingest_session(
+    season: int,
+    round_no: int,
+    session_type: str,
+    force: bool = False,
+) -> int | None:
+    """
+    Ingest one session. Runs inside a worker process.
+    Returns the number of samples written, or None if the
+    manifest says the session is already current.
+    """
+    s3 = boto3.client("s3")
+
+    if not force and is_current(
+        s3,
+        RAW_BUCKET,
+        DATASET,
+        season,
+        STAGE_VERSION,
+        round_no=round_no,
+        session=session_type,
+    ):
+        return None
+
+    # Telemetry only: no weather / race control messages
+    session = load_session(
+        season,
+        round_no,
+        session_type,
+        telemetry=True,
+        weather=False,
+        messages=False,
+    )
+
+    table = build_car_table(session, season, round_no)
+
+    s3_key = (
+        f"{DATASET}/"
+        f"season={season}/"
+        f"round={round_no}/"
+        f"session={session_type}/"
+        f"telemetry_car.parquet"
+    )
+
+    sink = write_parquet_to_s3(s3, table, s3_key)
+
+    write_manifest(
+        s3,
+        RAW_BUCKET,
+        DATASET,
+        season,
+        STAGE_VERSION,
+        row_count=table.num_rows,
+        content_hash=sink.content_hash,
+        output_keys=[s3_key],
+        round_no=round_no,
+        session=session_type,
+    )
+
+    return table.num_rows
+
+
+# ---------------------------------
+# Main
+# ---------------------------------
+def main() -> None:
+    run_sessions(ingest_session, "car data", f"s3://{RAW_BUCKET}/{DATASET}/")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,35 @@
-import fastf1
-import json
+"""
+Position Telemetry Ingestion Script (RAW)
+-----------------------------------------
+Extracts per-driver position telemetry (X/Y/Z) using FastF1 and writes
+it to S3 RAW as one sorted, compressed Parquet file per session.
+
+Runs any mix of seasons / rounds / sessions across a process pool:
+  python ingest_telemetry.py --season 2023 --rounds 1-5,8 --sessions R,Q
+  python ingest_telemetry.py --season 2021-2023 --workers 8
+
+Columns are built column-wise with Arrow (no per-row Python objects):
+  driver_number (int16), timestamp_ms (int64), x, y, z (float32)
+
+Constant values (season, round, ingestion timestamp, source) live in
+the S3 path and the Parquet key-value metadata, not in every row.
+
+Execution: Local
+Target bucket: f1-replay-raw-goutham
+"""
+
 import logging
-import boto3
 from datetime import datetime, timezone
-from pathlib import Path
+
+import boto3
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from fastf1_cache import load_session
+from manifest import is_current, write_manifest
+from s3_writer import S3MultipartWriter
+from session_cli import run_sessions
 
 # ---------------------------------
 # Silence FastF1 logging
@@ -14,79 +40,181 @@ logging.getLogger("fastf1.req").setLevel(logging.ERROR)
 # ---------------------------------
 # Config
 # ---------------------------------
-SEASON = 2023
-ROUND = 1
-SESSION = "R"
-
 RAW_BUCKET = "f1-replay-raw-goutham"
 DATASET = "telemetry_positions"
+# Bump when the output format changes (invalidates manifests)
+STAGE_VERSION = 1
 
-CACHE_DIR = Path(__file__).parent / "fastf1_cache"
-CACHE_DIR.mkdir(exist_ok=True)
+# Rows per Parquet row group (~1-2 MB compressed)
+ROW_GROUP_SIZE = 100_000
 
-fastf1.Cache.enable_cache(str(CACHE_DIR))
+SCHEMA = pa.schema([
+    ("driver_number", pa.int16()),
+    ("timestamp_ms", pa.int64()),
+    ("x", pa.float32()),
+    ("y", pa.float32()),
+    ("z", pa.float32()),
+])
 
-s3 = boto3.client("s3")
 
 # ---------------------------------
-# Load session (POSITION DATA)
+# Helpers
 # ---------------------------------
-session = fastf1.get_session(SEASON, ROUND, SESSION)
-session.load()   # ✅ correct
+def driver_columns(drv: str, pos_df) -> dict | None:
+    """
+    Vectorized extraction of one driver's position samples.
+    """
+    if pos_df is None or pos_df.empty:
+        return None
+
+    pos_df = pos_df[pos_df["Time"].notna()]
+    n = len(pos_df)
+    if n == 0:
+        return None
+
+    time_ms = (
+        pos_df["Time"].to_numpy()
+        .astype("timedelta64[ms]")
+        .astype(np.int64)
+    )
+
+    z = (
+        pos_df["Z"].to_numpy(dtype=np.float32)
+        if "Z" in pos_df.columns
+        else np.full(n, np.nan, dtype=np.float32)
+    )
+
+    return {
+        "driver_number": np.full(n, int(drv), dtype=np.int16),
+        "timestamp_ms": time_ms,
+        "x": pos_df["X"].to_numpy(dtype=np.float32),
+        "y": pos_df["Y"].to_numpy(dtype=np.float32),
+        "z": z,
+    }
+
+
+def build_position_table(session, season: int, round_no: int) -> pa.Table:
+    """
+    One Arrow table for all drivers, sorted by (driver_number, timestamp_ms).
+    """
+    parts = [
+        driver_columns(drv, session.pos_data.get(drv))
+        for drv in session.drivers
+    ]
+    parts = [p for p in parts if p is not None]
+
+    if not parts:
+        raise RuntimeError("No position telemetry extracted")
+
+    table = pa.table(
+        {
+            name: pa.array(np.concatenate([p[name] for p in parts]))
+            for name in SCHEMA.names
+        },
+        schema=SCHEMA,
+    )
+
+    table = table.sort_by([
+        ("driver_number", "ascending"),
+        ("timestamp_ms", "ascending"),
+    ])
+
+    return table.replace_schema_metadata({
+        "season": str(season),
+        "round": str(round_no),
+        "ingestion_timestamp_utc": datetime.now(timezone.utc).isoformat(),
+        "data_source": "fastf1",
+    })
+
+
+def write_parquet_to_s3(s3, table: pa.Table, s3_key: str) -> S3MultipartWriter:
+    """
+    Stream row groups straight to S3 through multipart upload
+    (memory bounded by one part, not the whole file).
+    """
+    with S3MultipartWriter(s3, RAW_BUCKET, s3_key) as sink:
+        pq.write_table(
+            table,
+            sink,
+            compression="zstd",
+            row_group_size=ROW_GROUP_SIZE,
+            write_statistics=True,
+        )
+
+    return sink
 
-drivers = session.drivers
 
 # ---------------------------------
-# Build JSONL records
+# Core logic
 # ---------------------------------
-records = []
-ingestion_ts = datetime.now(timezone.utc).isoformat()
-
-for drv in drivers:
-    pos_df = session.pos_data.get(drv)
-
-    if pos_df is None or pos_df.empty:
-        continue
-
-    pos_df = pos_df.reset_index()
+def ingest_session(
+    season: int,
+    round_no: int,
+    session_type: str,
+    force: bool = False,
+) -> int | None:
+    """
+    Ingest one session. Runs inside a worker process.
+    Returns the number of samples written, or None if the
+    manifest says the session is already current.
+    """
+    s3 = boto3.client("s3")
+
+    if not force and is_current(
+        s3,
+        RAW_BUCKET,
+        DATASET,
+        season,
+        STAGE_VERSION,
+        round_no=round_no,
+        session=session_type,
+    ):
+        return None
+
+    # Position data only: no weather / race control messages
+    session = load_session(
+        season,
+        round_no,
+        session_type,
+        telemetry=True,
+        weather=False,
+        messages=False,
+    )
+
+    table = build_position_table(session, season, round_no)
+
+    s3_key = (
+        f"{DATASET}/"
+        f"season={season}/"
+        f"round={round_no}/"
+        f"session={session_type}/"
+        f"telemetry_positions.parquet"
+    )
+
+    sink = write_parquet_to_s3(s3, table, s3_key)
+
+    write_manifest(
+        s3,
+        RAW_BUCKET,
+        DATASET,
+        season,
+        STAGE_VERSION,
+        row_count=table.num_rows,
+        content_hash=sink.content_hash,
+        output_keys=[s3_key],
+        round_no=round_no,
+        session=session_type,
+    )
+
+    return table.num_rows
 
-    for _, r in pos_df.iterrows():
-        records.append({
-            "season": SEASON,
-            "round": ROUND,
-            "driver_number": str(drv),
-            "timestamp_ms": int(r["Time"].total_seconds() * 1000),
-            "x": float(r["X"]),
-            "y": float(r["Y"]),
-            "z": float(r["Z"]) if "Z" in r else None,
-            "ingestion_timestamp_utc": ingestion_ts,
-            "data_source": "fastf1"
-        })
-
-if not records:
-    raise RuntimeError("No position telemetry extracted")
-
-payload = "\n".join(json.dumps(r) for r in records)
 
 # ---------------------------------
-# Upload to S3 (RAW)
+# Main
 # ---------------------------------
-s3_key = (
-    f"{DATASET}/"
-    f"season={SEASON}/"
-    f"round={ROUND}/"
-    f"telemetry_positions.jsonl"
-)
-
-s3.put_object(
-    Bucket=RAW_BUCKET,
-    Key=s3_key,
-    Body=payload.encode("utf-8"),
-    ContentType="application/json"
-)
-
-print(
-    f"✅ Position telemetry ingested: "
-    f"s3://{RAW_BUCKET}/{s3_key} "
-    f"({len(records)} records)"
-)
+def main() -> None:
+    run_sessions(ingest_session, "positions", f"s3://{RAW_BUCKET}/{DATASET}/")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,10 +2,12 @@
 Lap Times Ingestion Script (RAW)
 --------------------------------
 Fetches lap-level timing data using FastF1 and writes it to S3
-in JSONLines format for the RAW layer.
+as a typed Parquet lap table for the RAW layer.
 
-✔ Partition-safe for AWS Glue + Athena
-✔ No duplicate columns
+✔ Every timedelta is int64 milliseconds (null when unknown)
+✔ Compound / team / track status are dictionary-encoded
+✔ Pit in / out are boolean flags (times kept as ms)
+✔ Sorted by (driver_number, lap_number), ready for NumPy
 ✔ Season / round ONLY in S3 path
 
 Execution: Local
@@ -13,65 +15,186 @@ Target bucket: f1-replay-raw-goutham
 """
 
 import argparse
-import json
-import os
 from datetime import datetime, timezone
 
 import boto3
-import fastf1
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from fastf1_cache import load_session
+from manifest import is_current, write_manifest
+from s3_writer import S3MultipartWriter
 
 # -------------------------
 # Configuration
 # -------------------------
 RAW_BUCKET = "f1-replay-raw-goutham"
-CACHE_DIR = "pipelines/ingestion/fastf1_cache"
+DATASET = "lap_times"
+# Bump when the output format changes (invalidates manifests)
+STAGE_VERSION = 2
+
+# FastF1 timedelta columns -> int64 ms columns
+DURATION_COLUMNS = {
+    "LapTime": "lap_time_ms",
+    "LapStartTime": "lap_start_time_ms",
+    # "Time" is the session time at which the lap was completed
+    "Time": "lap_finish_time_ms",
+    "Sector1Time": "sector1_time_ms",
+    "Sector2Time": "sector2_time_ms",
+    "Sector3Time": "sector3_time_ms",
+    "Sector1SessionTime": "sector1_session_time_ms",
+    "Sector2SessionTime": "sector2_session_time_ms",
+    "Sector3SessionTime": "sector3_session_time_ms",
+    "PitInTime": "pit_in_time_ms",
+    "PitOutTime": "pit_out_time_ms",
+}
+
+DICTIONARY = pa.dictionary(pa.int8(), pa.string())
+
+SCHEMA = pa.schema(
+    [
+        ("driver_number", pa.int16()),
+        ("driver_code", DICTIONARY),
+        ("team", DICTIONARY),
+        ("lap_number", pa.int16()),
+        ("stint", pa.int8()),
+        ("position", pa.int8()),
+    ]
+    + [(name, pa.int64()) for name in DURATION_COLUMNS.values()]
+    + [
+        ("pit_in", pa.bool_()),
+        ("pit_out", pa.bool_()),
+        ("compound", DICTIONARY),
+        ("tyre_life", pa.int16()),
+        ("fresh_tyre", pa.bool_()),
+        ("track_status", DICTIONARY),
+        ("is_personal_best", pa.bool_()),
+        ("is_accurate", pa.bool_()),
+        ("deleted", pa.bool_()),
+    ]
+)
 
 s3 = boto3.client("s3")
 
 # -------------------------
 # Helpers
 # -------------------------
-def ensure_cache_dir(path: str) -> None:
-    os.makedirs(path, exist_ok=True)
-    fastf1.Cache.enable_cache(path)
+def _column(laps: pd.DataFrame, name: str) -> pd.Series:
+    if name in laps.columns:
+        return laps[name]
+    return pd.Series([None] * len(laps), index=laps.index, dtype=object)
 
 
-def add_ingestion_metadata(df: pd.DataFrame) -> pd.DataFrame:
+def duration_ms(values: pd.Series) -> pa.Array:
     """
-    Add metadata that is NOT part of partition keys.
+    Timedelta column -> int64 ms, NaT -> null.
     """
-    df["ingestion_timestamp_utc"] = datetime.now(timezone.utc).isoformat()
-    df["data_source"] = "fastf1"
-    return df
+    td = pd.to_timedelta(values)
+    missing = td.isna().to_numpy()
+    ms = td.to_numpy().astype("timedelta64[ms]").astype(np.int64)
+    return pa.array(ms, type=pa.int64(), mask=missing)
 
 
-def upload_jsonlines(df: pd.DataFrame, s3_key: str) -> None:
-    records = json.loads(
-        df.to_json(
-            orient="records",
-            date_format="iso",
-            default_handler=str
-        )
-    )
+def integers(values: pd.Series, type_: pa.DataType) -> pa.Array:
+    values = pd.to_numeric(values, errors="coerce")
+    missing = values.isna().to_numpy()
+    ints = values.fillna(0).to_numpy().astype(type_.to_pandas_dtype())
+    return pa.array(ints, type=type_, mask=missing)
 
-    body = "\n".join(json.dumps(r) for r in records)
 
-    s3.put_object(
-        Bucket=RAW_BUCKET,
-        Key=s3_key,
-        Body=body.encode("utf-8"),
-        ContentType="application/json"
+def flags(values: pd.Series) -> pa.Array:
+    """
+    Nullable booleans (FastF1 uses object columns with None).
+    """
+    missing = values.isna().to_numpy()
+    return pa.array(
+        values.fillna(False).astype(bool).to_numpy(),
+        type=pa.bool_(),
+        mask=missing,
     )
 
+
+def labels(values: pd.Series) -> pa.Array:
+    return pa.array(
+        values.astype(object).where(values.notna(), None),
+        type=pa.string(),
+    ).dictionary_encode()
+
+
+def build_lap_table(laps: pd.DataFrame, season: int, round_no: int) -> pa.Table:
+    """
+    FastF1 Laps -> typed Arrow table, sorted by (driver_number, lap_number).
+    """
+    laps = laps.loc[:, ~laps.columns.duplicated()]
+    laps = laps[laps["DriverNumber"].notna() & laps["LapNumber"].notna()]
+
+    columns = {
+        "driver_number": integers(laps["DriverNumber"], pa.int16()),
+        "driver_code": labels(_column(laps, "Driver")),
+        "team": labels(_column(laps, "Team")),
+        "lap_number": integers(laps["LapNumber"], pa.int16()),
+        "stint": integers(_column(laps, "Stint"), pa.int8()),
+        "position": integers(_column(laps, "Position"), pa.int8()),
+    }
+
+    for source, name in DURATION_COLUMNS.items():
+        columns[name] = duration_ms(_column(laps, source))
+
+    columns.update({
+        "pit_in": pa.array(_column(laps, "PitInTime").notna().to_numpy()),
+        "pit_out": pa.array(_column(laps, "PitOutTime").notna().to_numpy()),
+        "compound": labels(_column(laps, "Compound")),
+        "tyre_life": integers(_column(laps, "TyreLife"), pa.int16()),
+        "fresh_tyre": flags(_column(laps, "FreshTyre")),
+        "track_status": labels(_column(laps, "TrackStatus")),
+        "is_personal_best": flags(_column(laps, "IsPersonalBest")),
+        "is_accurate": flags(_column(laps, "IsAccurate")),
+        "deleted": flags(_column(laps, "Deleted")),
+    })
+
+    table = pa.table(columns).cast(SCHEMA)
+    table = table.sort_by([
+        ("driver_number", "ascending"),
+        ("lap_number", "ascending"),
+    ])
+
+    return table.replace_schema_metadata({
+        "season": str(season),
+        "round": str(round_no),
+        "ingestion_timestamp_utc": datetime.now(timezone.utc).isoformat(),
+        "data_source": "fastf1",
+    })
+
+
+def upload_parquet(table: pa.Table, s3_key: str) -> S3MultipartWriter:
+    with S3MultipartWriter(s3, RAW_BUCKET, s3_key) as sink:
+        pq.write_table(
+            table,
+            sink,
+            compression="zstd",
+            write_statistics=True,
+        )
+
+    return sink
+
 # -------------------------
 # Core logic
 # -------------------------
 def fetch_laps(season: int, round_no: int) -> pd.DataFrame:
     print(f"🚦 Fetching lap data | season={season}, round={round_no}")
 
-    session = fastf1.get_session(season, round_no, "R")
-    session.load()
+    # Lap timing only: no position / car telemetry
+    session = load_session(
+        season,
+        round_no,
+        "R",
+        laps=True,
+        telemetry=False,
+        weather=False,
+        messages=False,
+    )
 
     laps = session.laps
 
@@ -80,43 +203,67 @@ def fetch_laps(season: int, round_no: int) -> pd.DataFrame:
 
     return laps.reset_index(drop=True)
 
-# -------------------------
-# Main
-# -------------------------
-def main() -> None:
-    parser = argparse.ArgumentParser()
-    parser.add_argument("--season", type=int, required=True)
-    parser.add_argument("--round", type=int, required=True)
-    args = parser.parse_args()
-
-    ensure_cache_dir(CACHE_DIR)
+def ingest_round(season: int, round_no: int, force: bool = False) -> int | None:
+    """
+    Ingest one round's laps. Returns laps written, or None if the
+    manifest says the round is already current.
+    """
+    if not force and is_current(
+        s3, RAW_BUCKET, DATASET, season, STAGE_VERSION, round_no=round_no
+    ):
+        return None
 
-    laps_df = fetch_laps(args.season, args.round)
+    laps_df = fetch_laps(season, round_no)
     print(f"📦 Retrieved {len(laps_df)} laps")
 
-    # 🔒 SAFETY: drop any duplicate columns from FastF1
-    laps_df = laps_df.loc[:, ~laps_df.columns.duplicated()]
-
-    # 🚫 CRITICAL: remove partition columns from JSON if present
-    for col in ["season", "round"]:
-        if col in laps_df.columns:
-            laps_df.drop(columns=[col], inplace=True)
-
-    laps_df = add_ingestion_metadata(laps_df)
+    table = build_lap_table(laps_df, season, round_no)
 
     s3_key = (
-        f"lap_times/"
-        f"season={args.season}/"
-        f"round={args.round}/"
-        f"laps.jsonl"
+        f"{DATASET}/"
+        f"season={season}/"
+        f"round={round_no}/"
+        f"laps.parquet"
     )
 
-    upload_jsonlines(laps_df, s3_key)
+    sink = upload_parquet(table, s3_key)
+
+    write_manifest(
+        s3,
+        RAW_BUCKET,
+        DATASET,
+        season,
+        STAGE_VERSION,
+        row_count=table.num_rows,
+        content_hash=sink.content_hash,
+        output_keys=[s3_key],
+        round_no=round_no,
+    )
 
     print(
-        f"✅ Uploaded {len(laps_df)} lap records to "
+        f"✅ Uploaded {table.num_rows} lap records to "
         f"s3://{RAW_BUCKET}/{s3_key}"
     )
+    return table.num_rows
+
+# -------------------------
+# Main
+# -------------------------
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--season", type=int, required=True)
+    parser.add_argument("--round", type=int, required=True)
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Re-ingest even if the manifest says the round is current",
+    )
+    args = parser.parse_args()
+
+    if ingest_round(args.season, args.round, force=args.force) is None:
+        print(
+            f"⏭️  Lap times already current | "
+            f"season={args.season}, round={args.round}"
+        )
 
 
 if __name__ == "__main__":
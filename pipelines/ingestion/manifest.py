@@ -0,0 +1,132 @@
+"""
+Ingestion Manifests (RAW)
+-------------------------
+One small JSON manifest per dataset partition records what was written:
+
+  s3://{raw}/_manifests/{dataset}/season=S[/round=R][/session=X]/manifest.json
+
+  {
+    "dataset", "season", "round", "session",
+    "source_version",   # FastF1 version + stage output version
+    "row_count",
+    "content_hash",     # sha256 of the uncompressed bytes written
+    "output_keys",
+    "written_at_utc",
+    ...extra
+  }
+
+Stages check it BEFORE touching FastF1 and skip partitions that are
+already current (same source_version, outputs still present).
+"""
+
+import json
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+import fastf1
+
+MANIFEST_PREFIX = "_manifests"
+
+
+def source_version(stage_version: int) -> str:
+    """
+    Changes when FastF1 (the source) or the stage's output format does.
+    """
+    return f"fastf1={fastf1.__version__};stage=v{stage_version}"
+
+
+def manifest_key(
+    dataset: str,
+    season: int,
+    round_no: Optional[int] = None,
+    session: Optional[str] = None,
+) -> str:
+    key = f"{MANIFEST_PREFIX}/{dataset}/season={season}"
+    if round_no is not None:
+        key += f"/round={round_no}"
+    if session is not None:
+        key += f"/session={session}"
+    return f"{key}/manifest.json"
+
+
+def load_manifest(s3, bucket: str, key: str) -> Optional[Dict]:
+    try:
+        body = s3.get_object(Bucket=bucket, Key=key)["Body"].read()
+    except s3.exceptions.NoSuchKey:
+        return None
+
+    return json.loads(body)
+
+
+def _exists(s3, bucket: str, key: str) -> bool:
+    try:
+        s3.head_object(Bucket=bucket, Key=key)
+        return True
+    except Exception:
+        return False
+
+
+def is_current(
+    s3,
+    bucket: str,
+    dataset: str,
+    season: int,
+    stage_version: int,
+    round_no: Optional[int] = None,
+    session: Optional[str] = None,
+) -> Optional[Dict]:
+    """
+    The manifest if the partition is up to date, else None.
+    """
+    manifest = load_manifest(
+        s3,
+        bucket,
+        manifest_key(dataset, season, round_no, session),
+    )
+
+    if manifest is None:
+        return None
+
+    if manifest.get("source_version") != source_version(stage_version):
+        return None
+
+    if not all(_exists(s3, bucket, k) for k in manifest.get("output_keys", [])):
+        return None
+
+    return manifest
+
+
+def write_manifest(
+    s3,
+    bucket: str,
+    dataset: str,
+    season: int,
+    stage_version: int,
+    row_count: int,
+    content_hash: str,
+    output_keys: List[str],
+    round_no: Optional[int] = None,
+    session: Optional[str] = None,
+    **extra,
+) -> Dict:
+    manifest = {
+        "dataset": dataset,
+        "season": season,
+        "round": round_no,
+        "session": session,
+        "source_version": source_version(stage_version),
+        "row_count": row_count,
+        "content_hash": content_hash,
+        "output_keys": output_keys,
+        "written_at_utc": datetime.now(timezone.utc).isoformat(),
+        **extra,
+    }
+
+    s3.put_object(
+        Bucket=bucket,
+        Key=manifest_key(dataset, season, round_no, session),
+        Body=json.dumps(manifest, indent=2).encode("utf-8"),
+        ContentType="application/json",
+    )
+
+    return manifest
@@ -0,0 +1,508 @@
+"""
+Ingestion Orchestrator
+----------------------
+One entry point for the whole pipeline, raw and curated:
+
+  metadata (season)      races / drivers / constructors
+  telemetry (round)      position telemetry, per session type
+  car_data (round)       car channels, per session type
+  laps (round)           typed lap table
+  track (round)          single-lap track geometry
+  curated                raw -> curated, per partition, after its inputs:
+                           metadata  -> drivers, races
+                           telemetry -> telemetry_positions
+                           car_data  -> telemetry_car
+                           laps      -> lap_times
+                           track     -> track_centerline, track_geometry
+
+Rounds come from the season schedule (completed rounds only).
+Independent tasks run concurrently in worker processes, admitted
+only while they fit three budgets:
+
+  --cpus        tasks running at once
+  --memory-gb   sum of per-stage memory estimates (STAGE_MEMORY_MB)
+  --network     tasks downloading from FastF1 at once
+
+A backfill is one command:
+  python orchestrate.py --season 2021-2023
+  python orchestrate.py --season 2023 --rounds 1-5 --stages laps,curated
+  python orchestrate.py --season 2023 --cpus 8 --memory-gb 24 --network 4
+
+Every stage skips partitions its manifest says are current (--force
+rebuilds). Per-stage timings are reported at the end.
+
+Execution: Local
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import fastf1_cache
+from session_cli import DEFAULT_SESSIONS, SESSION_TYPES, parse_int_list
+
+# -------------------------
+# Configuration
+# -------------------------
+STAGES = ["metadata", "telemetry", "car_data", "laps", "track", "curated"]
+
+# Rough peak RSS per task (FastF1 session loads dominate)
+STAGE_MEMORY_MB = {
+    "metadata": 1_500,
+    "telemetry": 3_000,
+    "car_data": 3_000,
+    "laps": 1_500,
+    "track": 3_000,
+    "curated": 1_000,
+}
+
+# Stages that may download from the FastF1 API (S3 traffic is not limited)
+NETWORK_STAGES = {"metadata", "telemetry", "car_data", "laps", "track"}
+
+# Raw stage -> curated datasets built from it
+CURATED_FROM = {
+    "metadata": ["drivers", "races"],
+    "telemetry": ["telemetry_positions"],
+    "car_data": ["telemetry_car"],
+    "laps": ["lap_times"],
+    "track": ["track"],
+}
+
+# Curated layer is built from the race session only
+CURATED_SESSION = "R"
+
+# Recycle workers so FastF1 session memory never accumulates
+MAX_TASKS_PER_WORKER = 4
+
+
+@dataclass
+class Task:
+    task_id: str
+    stage: str
+    season: int
+    round_no: Optional[int] = None
+    session: Optional[str] = None
+    dataset: Optional[str] = None
+    deps: List[str] = field(default_factory=list)
+
+    status: str = "pending"  # pending / running / done / current / failed / skipped
+    result: Optional[object] = None
+    error: Optional[str] = None
+    started: float = 0.0
+    finished: float = 0.0
+
+    @property
+    def memory_mb(self) -> int:
+        return STAGE_MEMORY_MB[self.stage]
+
+    @property
+    def network(self) -> bool:
+        return self.stage in NETWORK_STAGES
+
+
+# -------------------------
+# Worker entry point
+# -------------------------
+def run_task(
+    stage: str,
+    season: int,
+    round_no: Optional[int],
+    session: Optional[str],
+    dataset: Optional[str],
+    force: bool,
+):
+    """
+    Runs inside a worker process. Stage modules are imported here
+    so each worker only loads what it runs.
+    """
+    if stage == "metadata":
+        from fastf1_ingestion import ingest_season
+        # Already one task per season: no nested process pool
+        return ingest_season(season, force=force, workers=1)
+
+    if stage == "telemetry":
+        from ingest_telemetry import ingest_session
+        return ingest_session(season, round_no, session, force)
+
+    if stage == "car_data":
+        from ingest_car_data import ingest_session
+        return ingest_session(season, round_no, session, force)
+
+    if stage == "laps":
+        from laps_ingest import ingest_round
+        return ingest_round(season, round_no, force=force)
+
+    if stage == "track":
+        from track_geometry_ingest import ingest_round
+        return ingest_round(season, round_no, force=force)
+
+    if stage == "curated":
+        from raw_to_curated import run_partition
+        return run_partition(dataset, season, round_no)
+
+    raise ValueError(f"Unknown stage: {stage}")
+
+
+# -------------------------
+# DAG
+# -------------------------
+def season_round_list(season: int) -> List[int]:
+    from fastf1_ingestion import completed_rounds
+
+    return completed_rounds(fastf1_cache.get_event_schedule(season))
+
+
+def build_tasks(
+    seasons: List[int],
+    rounds: Optional[List[int]],
+    stages: List[str],
+    sessions: List[str],
+) -> Dict[str, Task]:
+    tasks: Dict[str, Task] = {}
+
+    # Curated partitions follow the raw stages in this run
+    # (a curated-only run rebuilds every dataset)
+    sources = [s for s in stages if s in CURATED_FROM] or list(CURATED_FROM)
+
+    def add(task: Task) -> Task:
+        # Only depend on tasks that are part of this run
+        task.deps = [d for d in task.deps if d in tasks]
+        tasks[task.task_id] = task
+        return task
+
+    for season in seasons:
+        if "metadata" in stages:
+            add(Task(f"metadata:{season}", "metadata", season))
+
+        if "curated" in stages and "metadata" in sources:
+            for dataset in CURATED_FROM["metadata"]:
+                add(Task(
+                    f"curated:{dataset}:{season}",
+                    "curated",
+                    season,
+                    dataset=dataset,
+                    deps=[f"metadata:{season}"],
+                ))
+
+        for round_no in rounds or season_round_list(season):
+            for stage in ("telemetry", "car_data"):
+                if stage not in stages:
+                    continue
+                for session in sessions:
+                    add(Task(
+                        f"{stage}:{season}:{round_no}:{session}",
+                        stage,
+                        season,
+                        round_no,
+                        session,
+                    ))
+
+            for stage in ("laps", "track"):
+                if stage in stages:
+                    add(Task(
+                        f"{stage}:{season}:{round_no}",
+                        stage,
+                        season,
+                        round_no,
+                    ))
+
+            if "curated" not in stages:
+                continue
+
+            for stage in ("telemetry", "car_data", "laps", "track"):
+                if stage not in sources:
+                    continue
+
+                source = f"{stage}:{season}:{round_no}"
+                if stage in ("telemetry", "car_data"):
+                    source += f":{CURATED_SESSION}"
+
+                for dataset in CURATED_FROM[stage]:
+                    add(Task(
+                        f"curated:{dataset}:{season}:{round_no}",
+                        "curated",
+                        season,
+                        round_no,
+                        dataset=dataset,
+                        deps=[source],
+                    ))
+
+    return tasks
+
+
+# -------------------------
+# Scheduler
+# -------------------------
+class Scheduler:
+    """
+    Runs the DAG on a process pool. A ready task (all deps done) is
+    submitted only while it fits the CPU / memory / network budgets;
+    a task larger than the whole memory budget still runs, alone.
+    """
+
+    def __init__(
+        self,
+        tasks: Dict[str, Task],
+        cpus: int,
+        memory_mb: int,
+        network: int,
+        force: bool,
+    ):
+        self.tasks = tasks
+        self.cpus = cpus
+        self.memory_mb = memory_mb
+        self.network = network
+        self.force = force
+
+    def _fits(self, task: Task, running: List[Task]) -> bool:
+        if len(running) >= self.cpus:
+            return False
+        if task.network and sum(t.network for t in running) >= self.network:
+            return False
+        used = sum(t.memory_mb for t in running)
+        return not running or used + task.memory_mb <= self.memory_mb
+
+    def _skip_blocked(self) -> None:
+        """
+        Skip every pending task downstream of a failure (transitively).
+        """
+        changed = True
+        while changed:
+            changed = False
+            for task in self.tasks.values():
+                if task.status != "pending":
+                    continue
+                if any(
+                    self.tasks[d].status in ("failed", "skipped")
+                    for d in task.deps
+                ):
+                    task.status = "skipped"
+                    task.error = "dependency failed"
+                    self._report(task)
+                    changed = True
+
+    def _ready(self) -> List[Task]:
+        self._skip_blocked()
+
+        ready = [
+            task for task in self.tasks.values()
+            if task.status == "pending"
+            and all(
+                self.tasks[d].status in ("done", "current")
+                for d in task.deps
+            )
+        ]
+
+        # Raw stages first (they unlock curated work), then in DAG order
+        return sorted(ready, key=lambda t: STAGES.index(t.stage))
+
+    def run(self) -> None:
+        running: Dict[object, Task] = {}
+
+        with ProcessPoolExecutor(
+            max_workers=self.cpus,
+            mp_context=multiprocessing.get_context("spawn"),
+            max_tasks_per_child=MAX_TASKS_PER_WORKER,
+        ) as pool:
+            while True:
+                for task in self._ready():
+                    if not self._fits(task, list(running.values())):
+                        continue
+                    task.status = "running"
+                    task.started = time.monotonic()
+                    future = pool.submit(
+                        run_task,
+                        task.stage,
+                        task.season,
+                        task.round_no,
+                        task.session,
+                        task.dataset,
+                        self.force,
+                    )
+                    running[future] = task
+
+                if not running:
+                    break
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    task = running.pop(future)
+                    task.finished = time.monotonic()
+                    try:
+                        task.result = future.result()
+                        task.status = "current" if task.result is None else "done"
+                    except Exception as e:
+                        task.status = "failed"
+                        task.error = str(e)
+                    self._report(task)
+
+    @staticmethod
+    def _report(task: Task) -> None:
+        icon = {"done": "✅", "current": "⏭️ ", "failed": "❌", "skipped": "⛔"}
+        if task.status == "skipped":
+            print(f"{icon['skipped']} {task.task_id}: skipped ({task.error})")
+            return
+
+        elapsed = task.finished - task.started
+        detail = (
+            task.error if task.status == "failed"
+            else "already current" if task.status == "current"
+            else f"{task.result}"
+        )
+        print(f"{icon[task.status]} {task.task_id} [{elapsed:.1f}s]: {detail}")
+
+
+def print_timings(tasks: Dict[str, Task], wall: float) -> None:
+    """
+    Per stage: task counts, summed task time and wall-clock span.
+    """
+    print()
+    print(
+        f"{'stage':<10} {'done':>5} {'current':>8} {'failed':>7} "
+        f"{'skipped':>8} {'task s':>9} {'span s':>8}"
+    )
+
+    for stage in STAGES:
+        group = [t for t in tasks.values() if t.stage == stage]
+        if not group:
+            continue
+
+        ran = [t for t in group if t.finished]
+        busy = sum(t.finished - t.started for t in ran)
+        span = (
+            max(t.finished for t in ran) - min(t.started for t in ran)
+            if ran else 0.0
+        )
+        counts = {
+            s: sum(t.status == s for t in group)
+            for s in ("done", "current", "failed", "skipped")
+        }
+
+        print(
+            f"{stage:<10} {counts['done']:>5} {counts['current']:>8} "
+            f"{counts['failed']:>7} {counts['skipped']:>8} "
+            f"{busy:>9.1f} {span:>8.1f}"
+        )
+
+    print(f"🏁 Total wall time {wall:.1f}s")
+
+
+def physical_memory_mb() -> int:
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") // 2 ** 20
+    except (ValueError, OSError, AttributeError):
+        return 8 * 1024
+
+
+# -------------------------
+# Main
+# -------------------------
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--season",
+        required=True,
+        help="Season or range, e.g. 2023 or 2021-2023",
+    )
+    parser.add_argument(
+        "--rounds",
+        default=None,
+        help="Round list, e.g. 1,3,5-8 (default: every completed round)",
+    )
+    parser.add_argument(
+        "--stages",
+        default=",".join(STAGES),
+        help=f"Stages to run (default: all of {','.join(STAGES)})",
+    )
+    parser.add_argument(
+        "--sessions",
+        default=",".join(DEFAULT_SESSIONS),
+        help="Session types for telemetry / car_data, e.g. R,Q",
+    )
+    parser.add_argument(
+        "--cpus",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Max tasks running at once",
+    )
+    parser.add_argument(
+        "--memory-gb",
+        type=float,
+        default=physical_memory_mb() * 0.75 / 1024,
+        help="Memory budget for running tasks (default: 75%% of RAM)",
+    )
+    parser.add_argument(
+        "--network",
+        type=int,
+        default=4,
+        help="Max concurrent FastF1 downloads",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=None,
+        help="Shared FastF1 cache root (default: $FASTF1_CACHE_DIR)",
+    )
+    parser.add_argument(
+        "--cache-max-gb",
+        type=float,
+        default=None,
+        help="FastF1 cache size cap (default: $FASTF1_CACHE_MAX_BYTES)",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Rebuild partitions the manifests say are current",
+    )
+    args = parser.parse_args()
+
+    if args.cpus < 1 or args.network < 1 or args.memory_gb <= 0:
+        parser.error("--cpus, --network and --memory-gb must be positive")
+
+    stages = [s.strip() for s in args.stages.split(",") if s.strip()]
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        parser.error(f"Unknown stages: {sorted(unknown)}")
+
+    sessions = [s.strip().upper() for s in args.sessions.split(",") if s.strip()]
+    unknown = set(sessions) - SESSION_TYPES
+    if unknown:
+        parser.error(f"Unknown session types: {sorted(unknown)}")
+
+    # Exported through the environment, so spawned workers inherit it
+    fastf1_cache.configure(
+        root=args.cache_dir,
+        max_bytes=(
+            int(args.cache_max_gb * 1024 ** 3)
+            if args.cache_max_gb is not None
+            else None
+        ),
+    )
+
+    tasks = build_tasks(
+        parse_int_list(args.season),
+        parse_int_list(args.rounds) if args.rounds else None,
+        stages,
+        sessions,
+    )
+
+    memory_mb = int(args.memory_gb * 1024)
+    print(
+        f"🚦 {len(tasks)} tasks | cpus={args.cpus} "
+        f"memory={memory_mb} MB network={args.network}"
+    )
+
+    started = time.monotonic()
+    Scheduler(tasks, args.cpus, memory_mb, args.network, args.force).run()
+    print_timings(tasks, time.monotonic() - started)
+
+    if any(t.status in ("failed", "skipped") for t in tasks.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
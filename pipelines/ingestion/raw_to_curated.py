@@ -0,0 +1,680 @@
+"""
+Raw -> Curated Transform (CURATED)
+----------------------------------
+Builds the curated layer the replay API reads, locally with Arrow
+(no Glue, no Spark):
+
+  telemetry_positions/season=S/round=R/part-0.parquet
+  telemetry_car/season=S/round=R/part-0.parquet
+  lap_times/season=S/round=R/part-0.parquet
+  track_centerline/season=S/round=R/part-0.parquet
+  track_geometry/season=S/round=R/part-0.parquet
+  drivers/season=S/part-0.parquet
+  races/season=S/part-0.parquet
+
+Every dataset has a fixed Arrow schema (types are enforced, not
+inferred), rows are sorted by the access keys, row groups are sized
+explicitly and written with statistics + dictionary encoding.
+
+Telemetry is laid out by time instead: one row group per
+TIME_WINDOW_MS of session time, sorted by (driver_number,
+timestamp_ms) inside the group, so a time-range read only touches the
+groups it overlaps. Each telemetry partition also gets a sidecar
+
+  telemetry_*/season=S/round=R/_index.json
+
+listing every row group's timestamp_ms range (the "_" prefix keeps it
+out of Arrow dataset discovery).
+Derived columns (cum_distance) are computed once here instead of on
+every API start.
+
+One partition per task, across a process pool:
+  python raw_to_curated.py --season 2023
+  python raw_to_curated.py --season 2021-2023 --rounds 1-5 --workers 8
+
+Execution: Local
+Source bucket: f1-replay-raw-goutham
+Target bucket: f1-replay-curated-goutham
+"""
+
+import argparse
+import gzip
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timezone
+from io import BytesIO
+from typing import Callable, Dict, List, Tuple
+
+import boto3
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.json as pa_json
+import pyarrow.parquet as pq
+
+from s3_writer import S3MultipartWriter
+from session_cli import parse_int_list
+
+# -------------------------
+# Configuration
+# -------------------------
+RAW_BUCKET = "f1-replay-raw-goutham"
+CURATED_BUCKET = "f1-replay-curated-goutham"
+
+# Curated telemetry is built from the race session only
+TELEMETRY_SESSION = "R"
+
+# Rows per Parquet row group, per dataset (telemetry: ~1-2 MB compressed)
+TELEMETRY_ROW_GROUP_SIZE = 100_000
+DEFAULT_ROW_GROUP_SIZE = 50_000
+
+# Telemetry row groups cover one window of session time each
+# (TELEMETRY_ROW_GROUP_SIZE still caps a group's rows)
+TIME_WINDOWED_DATASETS = {"telemetry_positions", "telemetry_car"}
+TIME_WINDOW_MS = 60_000
+TIME_INDEX_NAME = "_index.json"
+TIME_INDEX_VERSION = 1
+
+# Dictionary-encoded label (compound, team, track status, ...)
+LABEL = pa.dictionary(pa.int8(), pa.string())
+
+SCHEMAS = {
+    "telemetry_positions": pa.schema([
+        ("driver_number", pa.int16()),
+        ("timestamp_ms", pa.int64()),
+        ("x", pa.float32()),
+        ("y", pa.float32()),
+        ("z", pa.float32()),
+        ("cum_distance", pa.float32()),
+    ]),
+    "telemetry_car": pa.schema([
+        ("driver_number", pa.int16()),
+        ("timestamp_ms", pa.int64()),
+        ("speed", pa.float32()),
+        ("rpm", pa.uint16()),
+        ("throttle", pa.uint8()),
+        ("brake", pa.uint8()),
+        ("gear", pa.uint8()),
+        ("drs", pa.uint8()),
+    ]),
+    "lap_times": pa.schema([
+        ("driver_id", pa.string()),
+        ("driver_number", pa.int16()),
+        ("driver_code", LABEL),
+        ("team", LABEL),
+        ("lap_number", pa.int16()),
+        ("stint", pa.int8()),
+        ("position", pa.int8()),
+        ("lap_time_ms", pa.int64()),
+        ("lap_start_time_ms", pa.int64()),
+        ("lap_finish_time_ms", pa.int64()),
+        ("sector1_time_ms", pa.int64()),
+        ("sector2_time_ms", pa.int64()),
+        ("sector3_time_ms", pa.int64()),
+        ("sector1_session_time_ms", pa.int64()),
+        ("sector2_session_time_ms", pa.int64()),
+        ("sector3_session_time_ms", pa.int64()),
+        ("pit_in_time_ms", pa.int64()),
+        ("pit_out_time_ms", pa.int64()),
+        ("pit_in", pa.bool_()),
+        ("pit_out", pa.bool_()),
+        ("compound", LABEL),
+        ("tyre_life", pa.int16()),
+        ("fresh_tyre", pa.bool_()),
+        ("track_status", LABEL),
+        ("is_personal_best", pa.bool_()),
+        ("is_accurate", pa.bool_()),
+        ("deleted", pa.bool_()),
+    ]),
+    "track_centerline": pa.schema([
+        ("point_index", pa.int32()),
+        ("x", pa.float32()),
+        ("y", pa.float32()),
+    ]),
+    "drivers": pa.schema([
+        ("driver_number", pa.int16()),
+        ("driver_id", pa.string()),
+        ("driver_code", pa.string()),
+        ("driver_name", pa.string()),
+        ("team_name", pa.string()),
+    ]),
+    "races": pa.schema([
+        ("round", pa.int16()),
+        ("event_name", pa.string()),
+        ("official_event_name", pa.string()),
+        ("country", pa.string()),
+        ("location", pa.string()),
+        ("event_format", pa.string()),
+        ("event_date", pa.timestamp("ms")),
+        ("race_session_date", pa.timestamp("ms", tz="UTC")),
+    ]),
+}
+
+# track_geometry (arcade client) is the same table as track_centerline
+SCHEMAS["track_geometry"] = SCHEMAS["track_centerline"]
+
+SORT_KEYS = {
+    "telemetry_positions": ["driver_number", "timestamp_ms"],
+    "telemetry_car": ["driver_number", "timestamp_ms"],
+    "lap_times": ["driver_number", "lap_number"],
+    "track_centerline": ["point_index"],
+    "track_geometry": ["point_index"],
+    "drivers": ["driver_number"],
+    "races": ["round"],
+}
+
+# Low-cardinality columns worth dictionary-encoding
+DICTIONARY_COLUMNS = {
+    "telemetry_positions": ["driver_number"],
+    "telemetry_car": ["driver_number", "gear", "drs"],
+    "lap_times": ["driver_id", "driver_code", "team", "compound", "track_status"],
+    "drivers": ["team_name"],
+    "races": ["country", "event_format"],
+}
+
+ROUND_DATASETS = ["telemetry_positions", "telemetry_car", "lap_times", "track"]
+SEASON_DATASETS = ["drivers", "races"]
+
+
+# -------------------------
+# Raw readers
+# -------------------------
+def read_raw_parquet(s3, key: str) -> pa.Table:
+    body = s3.get_object(Bucket=RAW_BUCKET, Key=key)["Body"].read()
+    return pq.read_table(BytesIO(body))
+
+
+def read_raw_jsonl(s3, key: str, columns: Dict[str, pa.DataType]) -> pa.Table:
+    """
+    Gzip JSONLines -> Arrow, parsing only the listed columns with
+    the given types (everything else in the raw record is ignored).
+    """
+    body = s3.get_object(Bucket=RAW_BUCKET, Key=key)["Body"].read()
+    if key.endswith(".gz"):
+        body = gzip.decompress(body)
+
+    return pa_json.read_json(
+        BytesIO(body),
+        parse_options=pa_json.ParseOptions(
+            explicit_schema=pa.schema(list(columns.items())),
+            unexpected_field_behavior="ignore",
+        ),
+    )
+
+
+def list_rounds(s3, dataset: str, season: int) -> List[int]:
+    """
+    Rounds present in the raw layer for a dataset (round=R prefixes).
+    """
+    rounds = set()
+    paginator = s3.get_paginator("list_objects_v2")
+    for page in paginator.paginate(
+        Bucket=RAW_BUCKET,
+        Prefix=f"{dataset}/season={season}/",
+        Delimiter="/",
+    ):
+        for prefix in page.get("CommonPrefixes", []):
+            part = prefix["Prefix"].rstrip("/").rsplit("/", 1)[-1]
+            if part.startswith("round="):
+                rounds.add(int(part.split("=", 1)[1]))
+    return sorted(rounds)
+
+
+# -------------------------
+# Helpers
+# -------------------------
+def timestamps(column: pa.ChunkedArray, utc: bool) -> pa.Array:
+    ts = pd.to_datetime(column.to_pandas(), errors="coerce", utc=utc)
+    return pa.array(ts, type=pa.timestamp("ms", tz="UTC" if utc else None))
+
+
+def cumulative_distance(
+    driver_number: np.ndarray,
+    x: np.ndarray,
+    y: np.ndarray,
+) -> np.ndarray:
+    """
+    Vectorized cumulative XY distance, restarting at each driver.
+    Rows must already be sorted by (driver_number, timestamp_ms).
+    """
+    if len(x) == 0:
+        return np.zeros(0, dtype=np.float32)
+
+    x = x.astype(np.float64)
+    y = y.astype(np.float64)
+
+    step = np.concatenate(([0.0], np.hypot(np.diff(x), np.diff(y))))
+    new_driver = np.diff(driver_number, prepend=driver_number[0] - 1) != 0
+    step[new_driver] = 0.0
+
+    cum = np.cumsum(step)
+    starts = np.flatnonzero(new_driver)
+    offsets = np.repeat(cum[starts], np.diff(np.append(starts, len(cum))))
+
+    return (cum - offsets).astype(np.float32)
+
+
+def conform(table: pa.Table, dataset: str) -> pa.Table:
+    """
+    Cast to the curated schema (fails loudly on bad data) and
+    sort by the dataset's access keys.
+    """
+    schema = SCHEMAS[dataset]
+    table = table.select(schema.names).cast(schema)
+    return table.sort_by([(k, "ascending") for k in SORT_KEYS[dataset]])
+
+
+def curated_prefix(dataset: str, season: int, round_no: int | None = None) -> str:
+    prefix = f"{dataset}/season={season}"
+    if round_no is not None:
+        prefix += f"/round={round_no}"
+    return prefix
+
+
+def curated_key(dataset: str, season: int, round_no: int | None = None) -> str:
+    return f"{curated_prefix(dataset, season, round_no)}/part-0.parquet"
+
+
+def time_window_groups(table: pa.Table) -> Tuple[pa.Table, List[Tuple[int, int]]]:
+    """
+    Reorder telemetry by (time window, driver_number, timestamp_ms) and
+    return the (offset, length) of each row group: one per window,
+    split further only if a window exceeds TELEMETRY_ROW_GROUP_SIZE.
+    """
+    ts = table["timestamp_ms"].to_numpy()
+    window = ts // TIME_WINDOW_MS
+    order = np.lexsort((ts, table["driver_number"].to_numpy(), window))
+    table = table.take(pa.array(order))
+    window = window[order]
+
+    bounds = np.flatnonzero(np.diff(window)) + 1
+    starts = np.concatenate(([0], bounds)).astype(np.int64)
+    ends = np.append(bounds, len(window)).astype(np.int64)
+
+    groups = []
+    for start, end in zip(starts.tolist(), ends.tolist()):
+        for offset in range(start, end, TELEMETRY_ROW_GROUP_SIZE):
+            groups.append((offset, min(TELEMETRY_ROW_GROUP_SIZE, end - offset)))
+
+    return table, groups
+
+
+def write_time_index(
+    s3,
+    table: pa.Table,
+    groups: List[Tuple[int, int]],
+    dataset: str,
+    season: int,
+    round_no: int,
+) -> None:
+    """
+    Sidecar with each row group's timestamp_ms range, so readers can
+    pick row groups without fetching Parquet footers.
+    """
+    ts = table["timestamp_ms"].to_numpy()
+    file_name = curated_key(dataset, season, round_no).rsplit("/", 1)[-1]
+
+    index = {
+        "version": TIME_INDEX_VERSION,
+        "window_ms": TIME_WINDOW_MS,
+        "sort_keys": SORT_KEYS[dataset],
+        "row_groups": [
+            {
+                "file": file_name,
+                "row_group": i,
+                "num_rows": length,
+                "min_timestamp_ms": int(ts[offset:offset + length].min()),
+                "max_timestamp_ms": int(ts[offset:offset + length].max()),
+            }
+            for i, (offset, length) in enumerate(groups)
+        ],
+    }
+
+    s3.put_object(
+        Bucket=CURATED_BUCKET,
+        Key=f"{curated_prefix(dataset, season, round_no)}/{TIME_INDEX_NAME}",
+        Body=json.dumps(index, indent=2).encode("utf-8"),
+        ContentType="application/json",
+    )
+
+
+def write_curated(
+    s3,
+    table: pa.Table,
+    dataset: str,
+    season: int,
+    round_no: int | None = None,
+) -> int:
+    table = table.replace_schema_metadata({
+        "season": str(season),
+        "round": "" if round_no is None else str(round_no),
+        "transformed_at_utc": datetime.now(timezone.utc).isoformat(),
+    })
+
+    row_group_size = (
+        TELEMETRY_ROW_GROUP_SIZE
+        if dataset.startswith("telemetry_")
+        else DEFAULT_ROW_GROUP_SIZE
+    )
+
+    key = curated_key(dataset, season, round_no)
+
+    if dataset in TIME_WINDOWED_DATASETS:
+        table, groups = time_window_groups(table)
+        sorting = [
+            pq.SortingColumn(table.schema.get_field_index(name))
+            for name in SORT_KEYS[dataset]
+        ]
+
+        with S3MultipartWriter(s3, CURATED_BUCKET, key) as sink:
+            with pq.ParquetWriter(
+                sink,
+                table.schema,
+                compression="zstd",
+                write_statistics=True,
+                use_dictionary=DICTIONARY_COLUMNS.get(dataset, False),
+                sorting_columns=sorting,
+            ) as writer:
+                for offset, length in groups:
+                    writer.write_table(
+                        table.slice(offset, length), row_group_size=length
+                    )
+
+        write_time_index(s3, table, groups, dataset, season, round_no)
+        return table.num_rows
+
+    with S3MultipartWriter(s3, CURATED_BUCKET, key) as sink:
+        pq.write_table(
+            table,
+            sink,
+            compression="zstd",
+            row_group_size=row_group_size,
+            write_statistics=True,
+            use_dictionary=DICTIONARY_COLUMNS.get(dataset, False),
+        )
+
+    return table.num_rows
+
+
+# -------------------------
+# Transforms
+# -------------------------
+def transform_telemetry(s3, season: int, round_no: int) -> Dict[str, int]:
+    raw = read_raw_parquet(
+        s3,
+        f"telemetry_positions/season={season}/round={round_no}/"
+        f"session={TELEMETRY_SESSION}/telemetry_positions.parquet",
+    )
+
+    raw = raw.sort_by([
+        ("driver_number", "ascending"),
+        ("timestamp_ms", "ascending"),
+    ])
+
+    cum = cumulative_distance(
+        raw["driver_number"].to_numpy(),
+        raw["x"].to_numpy(),
+        raw["y"].to_numpy(),
+    )
+    table = conform(
+        raw.append_column("cum_distance", pa.array(cum)),
+        "telemetry_positions",
+    )
+
+    return {
+        "telemetry_positions": write_curated(
+            s3, table, "telemetry_positions", season, round_no
+        )
+    }
+
+
+def transform_car_data(s3, season: int, round_no: int) -> Dict[str, int]:
+    raw = read_raw_parquet(
+        s3,
+        f"telemetry_car/season={season}/round={round_no}/"
+        f"session={TELEMETRY_SESSION}/telemetry_car.parquet",
+    )
+
+    return {
+        "telemetry_car": write_curated(
+            s3, conform(raw, "telemetry_car"), "telemetry_car", season, round_no
+        )
+    }
+
+
+def transform_lap_times(s3, season: int, round_no: int) -> Dict[str, int]:
+    """
+    Raw laps are already typed (int64 ms, dictionary labels, pit
+    flags); curated adds the API's string driver_id.
+    """
+    raw = read_raw_parquet(
+        s3,
+        f"lap_times/season={season}/round={round_no}/laps.parquet",
+    )
+
+    table = raw.append_column(
+        "driver_id",
+        pc.cast(raw["driver_number"], pa.string()),
+    )
+
+    return {
+        "lap_times": write_curated(
+            s3, conform(table, "lap_times"), "lap_times", season, round_no
+        )
+    }
+
+
+def transform_track(s3, season: int, round_no: int) -> Dict[str, int]:
+    raw = read_raw_jsonl(
+        s3,
+        f"tracks/season={season}/round={round_no}/track_geometry.jsonl.gz",
+        {"point_index": pa.int64(), "X": pa.float64(), "Y": pa.float64()},
+    )
+
+    raw = raw.filter(pc.and_(pc.is_valid(raw["X"]), pc.is_valid(raw["Y"])))
+
+    table = pa.table({
+        "point_index": raw["point_index"],
+        "x": raw["X"],
+        "y": raw["Y"],
+    })
+
+    # Same points serve the API (centerline) and the client (geometry)
+    return {
+        dataset: write_curated(
+            s3, conform(table, dataset), dataset, season, round_no
+        )
+        for dataset in ("track_centerline", "track_geometry")
+    }
+
+
+def transform_drivers(s3, season: int) -> Dict[str, int]:
+    raw = read_raw_jsonl(
+        s3,
+        f"drivers/season={season}/drivers_{season}.jsonl.gz",
+        {
+            "driver_id": pa.string(),
+            "driver_number": pa.string(),
+            "driver_code": pa.string(),
+            "driver_name": pa.string(),
+            "team_name": pa.string(),
+        },
+    )
+
+    table = conform(raw.filter(pc.is_valid(raw["driver_number"])), "drivers")
+
+    # One row per car number (first team of the season wins)
+    numbers = table["driver_number"].to_numpy()
+    _, first = np.unique(numbers, return_index=True)
+    table = table.take(pa.array(first))
+
+    return {"drivers": write_curated(s3, table, "drivers", season)}
+
+
+def transform_races(s3, season: int) -> Dict[str, int]:
+    raw = read_raw_jsonl(
+        s3,
+        f"races/season={season}/races_{season}.jsonl.gz",
+        {
+            "RoundNumber": pa.int64(),
+            "EventName": pa.string(),
+            "OfficialEventName": pa.string(),
+            "Country": pa.string(),
+            "Location": pa.string(),
+            "EventFormat": pa.string(),
+            "EventDate": pa.string(),
+            "race_session_date": pa.string(),
+        },
+    )
+
+    # Round 0 = pre-season testing
+    raw = raw.filter(pc.greater(raw["RoundNumber"], 0))
+
+    table = pa.table({
+        "round": raw["RoundNumber"],
+        "event_name": raw["EventName"],
+        "official_event_name": raw["OfficialEventName"],
+        "country": raw["Country"],
+        "location": raw["Location"],
+        "event_format": raw["EventFormat"],
+        "event_date": timestamps(raw["EventDate"], utc=False),
+        "race_session_date": timestamps(raw["race_session_date"], utc=True),
+    })
+
+    return {"races": write_curated(s3, conform(table, "races"), "races", season)}
+
+
+ROUND_TRANSFORMS: Dict[str, Callable] = {
+    "telemetry_positions": transform_telemetry,
+    "telemetry_car": transform_car_data,
+    "lap_times": transform_lap_times,
+    "track": transform_track,
+}
+
+SEASON_TRANSFORMS: Dict[str, Callable] = {
+    "drivers": transform_drivers,
+    "races": transform_races,
+}
+
+# Raw dataset whose round=R prefixes drive each round transform
+RAW_ROUND_SOURCES = {
+    "telemetry_positions": "telemetry_positions",
+    "telemetry_car": "telemetry_car",
+    "lap_times": "lap_times",
+    "track": "tracks",
+}
+
+
+# -------------------------
+# Core logic
+# -------------------------
+def run_partition(
+    dataset: str,
+    season: int,
+    round_no: int | None = None,
+) -> Dict[str, int]:
+    """
+    Transform one partition. Runs inside a worker process.
+    Returns rows written per curated dataset.
+    """
+    s3 = boto3.client("s3")
+
+    if round_no is None:
+        return SEASON_TRANSFORMS[dataset](s3, season)
+
+    return ROUND_TRANSFORMS[dataset](s3, season, round_no)
+
+
+# -------------------------
+# Main
+# -------------------------
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--season",
+        required=True,
+        help="Season or range, e.g. 2023 or 2021-2023",
+    )
+    parser.add_argument(
+        "--rounds",
+        default=None,
+        help="Round list, e.g. 1,3,5-8 (default: every raw round)",
+    )
+    parser.add_argument(
+        "--datasets",
+        default=",".join(SEASON_DATASETS + ROUND_DATASETS),
+        help="Datasets to rebuild, e.g. telemetry_positions,drivers",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Max concurrent partitions",
+    )
+    args = parser.parse_args()
+
+    datasets = [d.strip() for d in args.datasets.split(",") if d.strip()]
+    unknown = set(datasets) - set(SEASON_DATASETS) - set(ROUND_DATASETS)
+    if unknown:
+        parser.error(f"Unknown datasets: {sorted(unknown)}")
+
+    s3 = boto3.client("s3")
+
+    tasks = []
+    for season in parse_int_list(args.season):
+        tasks.extend(
+            (dataset, season, None)
+            for dataset in datasets
+            if dataset in SEASON_TRANSFORMS
+        )
+
+        for dataset in datasets:
+            if dataset not in ROUND_TRANSFORMS:
+                continue
+            rounds = (
+                parse_int_list(args.rounds)
+                if args.rounds
+                else list_rounds(s3, RAW_ROUND_SOURCES[dataset], season)
+            )
+            tasks.extend((dataset, season, r) for r in rounds)
+
+    print(
+        f"🔧 Transforming {len(tasks)} partitions with {args.workers} workers "
+        f"s3://{RAW_BUCKET} → s3://{CURATED_BUCKET}"
+    )
+
+    started = time.monotonic()
+    failures = []
+
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = {pool.submit(run_partition, *task): task for task in tasks}
+
+        for future in as_completed(futures):
+            dataset, season, round_no = futures[future]
+            label = f"{dataset} season={season}"
+            if round_no is not None:
+                label += f" round={round_no}"
+
+            try:
+                written = future.result()
+                summary = ", ".join(f"{d}={n}" for d, n in written.items())
+                print(f"✅ {label}: {summary}")
+            except Exception as e:
+                failures.append(label)
+                print(f"❌ {label}: {e}")
+
+    print(
+        f"🏁 {len(tasks) - len(failures)}/{len(tasks)} partitions transformed "
+        f"in {time.monotonic() - started:.1f}s"
+    )
+
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
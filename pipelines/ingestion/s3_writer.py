@@ -0,0 +1,262 @@
+"""
+Streaming S3 Writers (RAW)
+--------------------------
+Shared by every ingestion stage so no stage builds a whole object
+in memory before uploading it.
+
+- S3MultipartWriter: binary file-like sink. Buffers one part at a time,
+  uploads it through S3 multipart (with per-request retries, aborted
+  if it cannot complete) and keeps memory bounded by the part size,
+  whatever the object size.
+  Small objects fall back to a single put_object.
+- S3JsonLinesWriter: JSONLines on top of it, serialized in chunks.
+
+Optional compression: "gzip" (stdlib) or "zstd" (needs `zstandard`).
+"""
+
+import hashlib
+import json
+import time
+import zlib
+from typing import Dict, Iterable
+
+import pandas as pd
+
+# S3 minimum part size is 5 MiB (except the last part)
+PART_SIZE = 8 * 1024 * 1024
+MAX_PART_RETRIES = 4
+
+# Rows serialized per chunk for DataFrames
+JSONL_CHUNK_ROWS = 50_000
+
+KEY_SUFFIXES = {None: "", "gzip": ".gz", "zstd": ".zst"}
+
+
+class _Compressor:
+    def __init__(self, compression: str | None):
+        self.compression = compression
+
+        if compression is None:
+            self._c = None
+        elif compression == "gzip":
+            self._c = zlib.compressobj(6, zlib.DEFLATED, 31)
+        elif compression == "zstd":
+            try:
+                import zstandard  # type: ignore
+            except ImportError as e:
+                raise RuntimeError(
+                    "zstd compression requires the 'zstandard' package"
+                ) from e
+            self._c = zstandard.ZstdCompressor(level=3).compressobj()
+        else:
+            raise ValueError(f"Unsupported compression: {compression}")
+
+    def compress(self, data: bytes) -> bytes:
+        return self._c.compress(data) if self._c else data
+
+    def flush(self) -> bytes:
+        return self._c.flush() if self._c else b""
+
+
+class S3MultipartWriter:
+    """
+    Write-only, file-like S3 object (usable as a pyarrow sink).
+    """
+
+    def __init__(
+        self,
+        s3,
+        bucket: str,
+        key: str,
+        content_type: str = "application/octet-stream",
+        compression: str | None = None,
+        part_size: int = PART_SIZE,
+    ):
+        self.s3 = s3
+        self.bucket = bucket
+        self.key = key
+        self.content_type = content_type
+        self.part_size = part_size
+
+        self._compressor = _Compressor(compression)
+        self._buffer = bytearray()
+        self._upload_id = None
+        self._parts = []
+        self._position = 0
+        self._sha256 = hashlib.sha256()
+        self.closed = False
+
+    # --------------------------------------------------
+    # File-like API
+    # --------------------------------------------------
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._position += len(data)
+        self._sha256.update(data)
+        self._buffer += self._compressor.compress(data)
+
+        while len(self._buffer) >= self.part_size:
+            self._upload_part(bytes(self._buffer[: self.part_size]))
+            del self._buffer[: self.part_size]
+
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    @property
+    def content_hash(self) -> str:
+        """
+        sha256 of the uncompressed bytes written so far.
+        """
+        return self._sha256.hexdigest()
+
+    def writable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return False
+
+    def readable(self) -> bool:
+        return False
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        if self.closed:
+            return
+
+        self._buffer += self._compressor.flush()
+
+        if self._upload_id is None:
+            # Small object: one request
+            self._retry(
+                self.s3.put_object,
+                Bucket=self.bucket,
+                Key=self.key,
+                Body=bytes(self._buffer),
+                ContentType=self.content_type,
+            )
+        else:
+            try:
+                if self._buffer:
+                    self._upload_part(bytes(self._buffer))
+
+                self._retry(
+                    self.s3.complete_multipart_upload,
+                    Bucket=self.bucket,
+                    Key=self.key,
+                    UploadId=self._upload_id,
+                    MultipartUpload={"Parts": self._parts},
+                )
+            except Exception:
+                # Uploaded parts are billed until the upload is aborted
+                self.abort()
+                raise
+
+        self._buffer = bytearray()
+        self.closed = True
+
+    def abort(self) -> None:
+        if self._upload_id is not None:
+            self.s3.abort_multipart_upload(
+                Bucket=self.bucket,
+                Key=self.key,
+                UploadId=self._upload_id,
+            )
+        self._buffer = bytearray()
+        self.closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+    # --------------------------------------------------
+    # Internals
+    # --------------------------------------------------
+    def _upload_part(self, body: bytes) -> None:
+        if self._upload_id is None:
+            self._upload_id = self.s3.create_multipart_upload(
+                Bucket=self.bucket,
+                Key=self.key,
+                ContentType=self.content_type,
+            )["UploadId"]
+
+        part_number = len(self._parts) + 1
+        response = self._retry(
+            self.s3.upload_part,
+            Bucket=self.bucket,
+            Key=self.key,
+            UploadId=self._upload_id,
+            PartNumber=part_number,
+            Body=body,
+        )
+        self._parts.append({"PartNumber": part_number, "ETag": response["ETag"]})
+
+    @staticmethod
+    def _retry(fn, **kwargs):
+        for attempt in range(MAX_PART_RETRIES):
+            try:
+                return fn(**kwargs)
+            except Exception:
+                if attempt == MAX_PART_RETRIES - 1:
+                    raise
+                time.sleep(2 ** attempt)
+
+
+class S3JsonLinesWriter(S3MultipartWriter):
+    """
+    Newline-delimited JSON, streamed to S3.
+    """
+
+    def __init__(self, s3, bucket: str, key: str, compression: str | None = None):
+        super().__init__(
+            s3,
+            bucket,
+            key,
+            content_type="application/json",
+            compression=compression,
+        )
+        self.records_written = 0
+
+    def write_records(self, records: Iterable[Dict]) -> None:
+        chunk = []
+        for r in records:
+            chunk.append(json.dumps(r, default=str))
+            if len(chunk) >= JSONL_CHUNK_ROWS:
+                self._write_lines(chunk)
+                chunk = []
+        if chunk:
+            self._write_lines(chunk)
+
+    def write_dataframe(self, df: pd.DataFrame) -> None:
+        for lo in range(0, len(df), JSONL_CHUNK_ROWS):
+            chunk = df.iloc[lo: lo + JSONL_CHUNK_ROWS]
+            body = chunk.to_json(
+                orient="records",
+                lines=True,
+                date_format="iso",
+                default_handler=str,
+            )
+            if not body.endswith("\n"):
+                body += "\n"
+            self.write(body.encode("utf-8"))
+            self.records_written += len(chunk)
+
+    def _write_lines(self, lines: list[str]) -> None:
+        self.write(("\n".join(lines) + "\n").encode("utf-8"))
+        self.records_written += len(lines)
+
+
+def compressed_key(key: str, compression: str | None) -> str:
+    """
+    laps.jsonl + gzip -> laps.jsonl.gz
+    """
+    return f"{key}{KEY_SUFFIXES[compression]}"
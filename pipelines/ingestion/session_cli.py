@@ -0,0 +1,144 @@
+"""
+Shared command line for per-session ingestion scripts
+-----------------------------------------------------
+Season / round / session selection and the process-pool fan-out used by
+ingest_telemetry.py and ingest_car_data.py:
+
+  python <script>.py --season 2023 --rounds 1-5,8 --sessions R,Q
+  python <script>.py --season 2021-2023 --workers 8
+
+A script passes its ingest_session(season, round_no, session_type, force)
+function, which returns records written or None when already current.
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Optional
+
+DEFAULT_SESSIONS = ["R"]
+SESSION_TYPES = {"R", "Q", "S", "SQ", "SS", "FP1", "FP2", "FP3"}
+
+IngestSession = Callable[[int, int, str, bool], Optional[int]]
+
+
+def parse_int_list(spec: str) -> list[int]:
+    """
+    "1,3,5-8" -> [1, 3, 5, 6, 7, 8]
+    """
+    values = []
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            lo, hi = part.split("-", 1)
+            values.extend(range(int(lo), int(hi) + 1))
+        else:
+            values.append(int(part))
+    return sorted(set(values))
+
+
+def season_rounds(season: int) -> list[int]:
+    # FastF1 only when rounds must be listed (curation uses this
+    # module without it)
+    from fastf1_cache import get_event_schedule
+
+    schedule = get_event_schedule(season, include_testing=False)
+    return sorted(int(r) for r in schedule["RoundNumber"] if int(r) > 0)
+
+
+def run_sessions(ingest_session: IngestSession, what: str, destination: str) -> None:
+    """
+    Parse the command line and run ingest_session for every selected
+    (season, round, session) across a process pool, reporting each
+    one. Exits 1 if any session failed.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--season",
+        required=True,
+        help="Season or range, e.g. 2023 or 2021-2023",
+    )
+    parser.add_argument(
+        "--rounds",
+        default=None,
+        help="Round list, e.g. 1,3,5-8 (default: every round)",
+    )
+    parser.add_argument(
+        "--sessions",
+        default=",".join(DEFAULT_SESSIONS),
+        help="Session types, e.g. R,Q,S",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Max concurrent sessions",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Re-ingest sessions the manifest says are current",
+    )
+    args = parser.parse_args()
+
+    sessions = [s.strip().upper() for s in args.sessions.split(",") if s.strip()]
+    unknown = set(sessions) - SESSION_TYPES
+    if unknown:
+        parser.error(f"Unknown session types: {sorted(unknown)}")
+
+    from fastf1_cache import enable_cache
+
+    enable_cache()
+
+    tasks = []
+    for season in parse_int_list(args.season):
+        rounds = (
+            parse_int_list(args.rounds)
+            if args.rounds
+            else season_rounds(season)
+        )
+        tasks.extend(
+            (season, round_no, session_type)
+            for round_no in rounds
+            for session_type in sessions
+        )
+
+    print(
+        f"🚦 Ingesting {what} for {len(tasks)} sessions "
+        f"with {args.workers} workers → {destination}"
+    )
+
+    started = time.monotonic()
+    failures = []
+
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = {
+            pool.submit(ingest_session, *task, args.force): task
+            for task in tasks
+        }
+
+        for future in as_completed(futures):
+            season, round_no, session_type = futures[future]
+            label = f"season={season} round={round_no} session={session_type}"
+
+            try:
+                rows = future.result()
+                if rows is None:
+                    print(f"⏭️  {label}: already current")
+                else:
+                    print(f"✅ {label}: {rows} records")
+            except Exception as e:
+                failures.append(label)
+                print(f"❌ {label}: {e}")
+
+    print(
+        f"🏁 {len(tasks) - len(failures)}/{len(tasks)} sessions ingested or current "
+        f"in {time.monotonic() - started:.1f}s"
+    )
+
+    if failures:
+        sys.exit(1)
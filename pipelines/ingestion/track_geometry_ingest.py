@@ -4,24 +4,44 @@ Track Geometry Ingestion Script (RAW)
 Extracts circuit track geometry using FastF1 position data
 and writes it to S3 RAW as JSONLines.
 
-Source: FastF1 position telemetry (single driver trace)
+One representative lap, not the whole race trace:
+- laps are cut at start/finish line crossings (every driver),
+- the cleanest lap of typical length and duration is kept,
+- it is resampled by arc length, closed exactly and simplified
+  with Douglas-Peucker to a few hundred points.
+
+Source: FastF1 position telemetry + lap timing
 Execution: Local
 Target bucket: f1-replay-raw-goutham
 """
 
 import argparse
-import json
 from datetime import datetime, timezone
 
 import boto3
-import fastf1
+import numpy as np
 import pandas as pd
 
+from fastf1_cache import load_session
+from manifest import is_current, write_manifest
+from s3_writer import S3JsonLinesWriter, compressed_key
+
 # -------------------------
 # Configuration
 # -------------------------
 RAW_BUCKET = "f1-replay-raw-goutham"
-CACHE_DIR = "pipelines/ingestion/fastf1_cache"
+RAW_COMPRESSION = "gzip"
+DATASET = "tracks"
+# Bump when the output format changes (invalidates manifests)
+STAGE_VERSION = 2
+
+# FastF1 position units are 1/10 m
+SF_RADIUS = 300.0           # max distance from the start/finish point
+RESAMPLE_SPACING = 20.0     # arc-length step before simplification
+SIMPLIFY_TOLERANCE = 10.0   # Douglas-Peucker tolerance
+MAX_SAMPLE_GAP_MS = 1_500   # laps with longer telemetry gaps are rejected
+LENGTH_TOLERANCE = 0.02     # vs median lap length (pit lane, cuts)
+DURATION_TOLERANCE = 1.15   # vs median lap time (pit stops, incidents)
 
 s3 = boto3.client("s3")
 
@@ -29,20 +49,227 @@ s3 = boto3.client("s3")
 # -------------------------
 # Helpers
 # -------------------------
-def enable_cache():
-    fastf1.Cache.enable_cache(CACHE_DIR)
+def upload_jsonlines(df: pd.DataFrame, s3_key: str) -> S3JsonLinesWriter:
+    with S3JsonLinesWriter(
+        s3,
+        RAW_BUCKET,
+        compressed_key(s3_key, RAW_COMPRESSION),
+        compression=RAW_COMPRESSION,
+    ) as writer:
+        writer.write_dataframe(df)
+
+    return writer
+
+
+# -------------------------
+# Lap extraction
+# -------------------------
+def driver_trace(pos_df: pd.DataFrame) -> tuple[np.ndarray, np.ndarray] | None:
+    """
+    On-track (session_time_ms, XY) samples of one driver, time ordered.
+    """
+    if pos_df is None or pos_df.empty:
+        return None
 
+    pos_df = pos_df.dropna(subset=["X", "Y", "SessionTime"])
+    if "Status" in pos_df.columns:
+        pos_df = pos_df[pos_df["Status"] == "OnTrack"]
+    pos_df = pos_df.sort_values("SessionTime")
 
-def upload_jsonlines(df: pd.DataFrame, s3_key: str) -> None:
-    records = df.to_dict(orient="records")
-    body = "\n".join(json.dumps(r) for r in records)
+    if len(pos_df) < 2:
+        return None
 
-    s3.put_object(
-        Bucket=RAW_BUCKET,
-        Key=s3_key,
-        Body=body.encode("utf-8"),
-        ContentType="application/json"
+    t = (
+        pos_df["SessionTime"].to_numpy()
+        .astype("timedelta64[ms]")
+        .astype(np.int64)
     )
+    xy = pos_df[["X", "Y"]].to_numpy(dtype=np.float64)
+    return t, xy
+
+
+def start_finish_line(session, traces: dict) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Start/finish point (median car position at the timed lap starts)
+    and the direction of travel through it.
+    """
+    laps = session.laps
+    laps = laps[(laps["LapNumber"] >= 2) & laps["LapStartTime"].notna()]
+
+    positions = []
+    directions = []
+    for drv, (t, xy) in traces.items():
+        starts = (
+            laps[laps["DriverNumber"] == drv]["LapStartTime"].to_numpy()
+            .astype("timedelta64[ms]")
+            .astype(np.int64)
+        )
+        i = np.searchsorted(t, starts)
+        i = i[(i > 0) & (i < len(t))]
+        positions.append(xy[i])
+        directions.append(xy[i] - xy[i - 1])
+
+    if not positions or not sum(len(p) for p in positions):
+        raise RuntimeError("Cannot locate start/finish line (no timed laps)")
+
+    point = np.median(np.concatenate(positions), axis=0)
+    direction = np.concatenate(directions).sum(axis=0)
+    return point, direction / np.hypot(*direction)
+
+
+def split_laps(
+    t: np.ndarray,
+    xy: np.ndarray,
+    sf_point: np.ndarray,
+    sf_dir: np.ndarray,
+) -> list[tuple[np.ndarray, np.ndarray]]:
+    """
+    Cut a trace at every start/finish crossing: the signed distance
+    along the direction of travel goes from < 0 to >= 0 while the car
+    is near the line. Crossing points are interpolated onto the line,
+    so consecutive laps share exact end points.
+    """
+    rel = xy - sf_point
+    along = rel @ sf_dir
+    across = np.abs(rel @ np.array([-sf_dir[1], sf_dir[0]]))
+
+    crossing = np.flatnonzero(
+        (along[:-1] < 0) & (along[1:] >= 0) & (across[1:] < SF_RADIUS)
+    )
+
+    laps = []
+    for a, b in zip(crossing[:-1], crossing[1:]):
+        fa = -along[a] / (along[a + 1] - along[a])
+        fb = -along[b] / (along[b + 1] - along[b])
+
+        start = xy[a] + fa * (xy[a + 1] - xy[a])
+        end = xy[b] + fb * (xy[b + 1] - xy[b])
+
+        laps.append((
+            t[a + 1: b + 1],
+            np.vstack([start, xy[a + 1: b + 1], end]),
+        ))
+
+    return laps
+
+
+def resample(xy: np.ndarray, spacing: float) -> np.ndarray:
+    """
+    Evenly spaced points by arc length (both end points kept).
+    """
+    seg = np.hypot(*np.diff(xy, axis=0).T)
+    arc = np.concatenate(([0.0], np.cumsum(seg)))
+
+    n = max(int(np.ceil(arc[-1] / spacing)), 2) + 1
+    s = np.linspace(0.0, arc[-1], n)
+    return np.column_stack([
+        np.interp(s, arc, xy[:, 0]),
+        np.interp(s, arc, xy[:, 1]),
+    ])
+
+
+def roughness(xy: np.ndarray) -> float:
+    """
+    Mean squared second difference of an evenly resampled path:
+    measurement jitter shows up as high-frequency wiggle.
+    """
+    return float(np.mean(np.sum(np.diff(xy, n=2, axis=0) ** 2, axis=1)))
+
+
+def close_loop(xy: np.ndarray) -> np.ndarray:
+    """
+    Spread the start/end mismatch linearly along the lap so the path
+    closes exactly, then drop the duplicated end point (consumers
+    treat the point list as a closed loop).
+    """
+    seg = np.hypot(*np.diff(xy, axis=0).T)
+    frac = np.concatenate(([0.0], np.cumsum(seg))) / seg.sum()
+    closed = xy - frac[:, None] * (xy[-1] - xy[0])
+    return closed[:-1]
+
+
+def douglas_peucker(xy: np.ndarray, tolerance: float) -> np.ndarray:
+    """
+    Indices of the points kept by Douglas-Peucker (iterative,
+    vectorized per span). Works with coincident end points.
+    """
+    keep = np.zeros(len(xy), dtype=bool)
+    keep[[0, -1]] = True
+    stack = [(0, len(xy) - 1)]
+
+    while stack:
+        lo, hi = stack.pop()
+        if hi - lo < 2:
+            continue
+
+        a, b = xy[lo], xy[hi]
+        pts = xy[lo + 1: hi]
+        chord = b - a
+        length = np.hypot(*chord)
+
+        if length > 0:
+            rel = pts - a
+            d = np.abs(chord[0] * rel[:, 1] - chord[1] * rel[:, 0]) / length
+        else:
+            d = np.hypot(*(pts - a).T)
+
+        i = int(np.argmax(d))
+        if d[i] > tolerance:
+            mid = lo + 1 + i
+            keep[mid] = True
+            stack.extend([(lo, mid), (mid, hi)])
+
+    return np.flatnonzero(keep)
+
+
+def representative_lap(session) -> tuple[str, np.ndarray]:
+    """
+    Cleanest full lap across all drivers: complete laps of typical
+    length and duration with no sampling gaps, least roughness wins.
+    """
+    traces = {}
+    for drv in session.drivers:
+        trace = driver_trace(session.pos_data.get(drv))
+        if trace is not None:
+            traces[drv] = trace
+
+    if not traces:
+        raise RuntimeError("Position data not available")
+
+    sf_point, sf_dir = start_finish_line(session, traces)
+
+    candidates = []
+    for drv, (t, xy) in traces.items():
+        for lap_t, lap_xy in split_laps(t, xy, sf_point, sf_dir):
+            if len(lap_t) < 2 or np.diff(lap_t).max() > MAX_SAMPLE_GAP_MS:
+                continue
+            length = float(np.hypot(*np.diff(lap_xy, axis=0).T).sum())
+            duration = int(lap_t[-1] - lap_t[0])
+            candidates.append((drv, lap_xy, length, duration))
+
+    if not candidates:
+        raise RuntimeError("No complete laps found in position data")
+
+    lengths = np.array([c[2] for c in candidates])
+    durations = np.array([c[3] for c in candidates])
+    typical = (
+        (np.abs(lengths / np.median(lengths) - 1) <= LENGTH_TOLERANCE)
+        & (durations <= np.median(durations) * DURATION_TOLERANCE)
+    )
+
+    best = None
+    for (drv, lap_xy, _, _), ok in zip(candidates, typical):
+        if not ok:
+            continue
+        resampled = resample(lap_xy, RESAMPLE_SPACING)
+        score = roughness(resampled)
+        if best is None or score < best[0]:
+            best = (score, drv, resampled)
+
+    if best is None:
+        raise RuntimeError("No representative lap found")
+
+    return best[1], best[2]
 
 
 # -------------------------
@@ -51,26 +278,35 @@ def upload_jsonlines(df: pd.DataFrame, s3_key: str) -> None:
 def fetch_track_geometry(season: int, round_no: int) -> pd.DataFrame:
     print(f"🏁 Fetching track geometry | season={season}, round={round_no}")
 
-    session = fastf1.get_session(season, round_no, "R")
-    session.load()
+    # Laps (start/finish timing) + position telemetry only
+    session = load_session(
+        season,
+        round_no,
+        "R",
+        laps=True,
+        telemetry=True,
+        weather=False,
+        messages=False,
+    )
 
-    pos_data = session.pos_data
-    if not pos_data or not isinstance(pos_data, dict):
+    if not session.pos_data or not isinstance(session.pos_data, dict):
         raise RuntimeError("Position data not available")
 
-    # Pick first driver deterministically
-    driver_id = sorted(pos_data.keys())[0]
-    driver_pos = pos_data[driver_id]
+    driver_id, lap_xy = representative_lap(session)
 
-    if driver_pos.empty:
-        raise RuntimeError("Selected driver has no position data")
+    loop = close_loop(lap_xy)
+    keep = douglas_peucker(np.vstack([loop, loop[:1]]), SIMPLIFY_TOLERANCE)
+    loop = loop[keep[:-1]]
 
-    # Order by time to trace full lap path
-    driver_pos = driver_pos.sort_values("SessionTime")
+    print(
+        f"🧭 Lap from driver {driver_id}: "
+        f"{len(lap_xy)} resampled → {len(loop)} points"
+    )
 
-    track_df = driver_pos[["X", "Y"]].dropna().reset_index(drop=True)
+    track_df = pd.DataFrame({"X": loop[:, 0], "Y": loop[:, 1]})
 
     track_df["point_index"] = track_df.index
+    track_df["source_driver_number"] = driver_id
     track_df["season"] = season
     track_df["round"] = round_no
     track_df["ingestion_timestamp_utc"] = datetime.now(timezone.utc).isoformat()
@@ -79,33 +315,66 @@ def fetch_track_geometry(season: int, round_no: int) -> pd.DataFrame:
     return track_df
 
 
-# -------------------------
-# Main
-# -------------------------
-def main():
-    parser = argparse.ArgumentParser()
-    parser.add_argument("--season", type=int, required=True)
-    parser.add_argument("--round", type=int, required=True)
-    args = parser.parse_args()
-
-    enable_cache()
+def ingest_round(season: int, round_no: int, force: bool = False) -> int | None:
+    """
+    Ingest one round's track geometry. Returns points written, or
+    None if the manifest says the round is already current.
+    """
+    if not force and is_current(
+        s3, RAW_BUCKET, DATASET, season, STAGE_VERSION, round_no=round_no
+    ):
+        return None
 
-    track_df = fetch_track_geometry(args.season, args.round)
+    track_df = fetch_track_geometry(season, round_no)
     print(f"📐 Retrieved {len(track_df)} track points")
 
     s3_key = (
-        f"tracks/"
-        f"season={args.season}/"
-        f"round={args.round}/"
+        f"{DATASET}/"
+        f"season={season}/"
+        f"round={round_no}/"
         f"track_geometry.jsonl"
     )
 
-    upload_jsonlines(track_df, s3_key)
+    writer = upload_jsonlines(track_df, s3_key)
+
+    write_manifest(
+        s3,
+        RAW_BUCKET,
+        DATASET,
+        season,
+        STAGE_VERSION,
+        row_count=writer.records_written,
+        content_hash=writer.content_hash,
+        output_keys=[writer.key],
+        round_no=round_no,
+    )
 
     print(
         f"✅ Uploaded track geometry to "
-        f"s3://{RAW_BUCKET}/{s3_key}"
+        f"s3://{RAW_BUCKET}/{compressed_key(s3_key, RAW_COMPRESSION)}"
+    )
+    return writer.records_written
+
+
+# -------------------------
+# Main
+# -------------------------
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--season", type=int, required=True)
+    parser.add_argument("--round", type=int, required=True)
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Re-ingest even if the manifest says the round is current",
     )
+    args = parser.parse_args()
+
+    if ingest_round(args.season, args.round, force=args.force) is None:
+        print(
+            f"⏭️  Track geometry already current | "
+            f"season={args.season}, round={args.round}"
+        )
 
 
 if __name__ == "__main__":
@@ -1,24 +1,290 @@
 # app/api/replay.py
 
-from fastapi import APIRouter
+from collections import OrderedDict
+
+from fastapi import APIRouter, Header, HTTPException, Query, Response
 from app.services.frame_builder import FrameBuilder
+from app.services.race_catalog import CATALOG_SESSIONS, RaceCatalog
+from app.services.race_registry import STATUS_LOADED, RaceRegistry
+from app.services.replay_bundle import (
+    BUNDLE_VERSION,
+    MIN_STEP_MS,
+    build_bundle,
+    bundle_etag,
+)
 from app.services.clock_registry import clock
+from app.services.telemetry_channel_builder import TelemetryChannelBuilder
+from app.storage.parquet_reader import S3PartitionNotFound
 from app.core.config import settings
 
 router = APIRouter(prefix="/replay")
 
-# FrameBuilder is initialized once (startup-safe)
-frame_builder = FrameBuilder(
+# Loaded races (FrameBuilders), built in the background on prewarm
+races = RaceRegistry(
     curated_bucket=settings.curated_bucket,
-    season=settings.default_season,
-    round=settings.default_round,
+    windowed=settings.windowed_telemetry,
+    pinned=[(settings.default_season, settings.default_round)],
 )
 
+# The default race is loaded at startup (startup-safe)
+frame_builder = races.get(settings.default_season, settings.default_round)
+
+# Races with curated data (cached partition listing)
+catalog = RaceCatalog(settings.curated_bucket)
+
+# Car channels are optional: loaded on first use, so a race
+# without car telemetry still serves positions
+_channel_builder: TelemetryChannelBuilder | None = None
+
+
+def get_channel_builder() -> TelemetryChannelBuilder:
+    global _channel_builder
+
+    if _channel_builder is None:
+        try:
+            _channel_builder = TelemetryChannelBuilder(
+                curated_bucket=settings.curated_bucket,
+                season=settings.default_season,
+                round=settings.default_round,
+            )
+        except (S3PartitionNotFound, FileNotFoundError) as e:
+            raise HTTPException(
+                status_code=404,
+                detail="Car telemetry not available for this race",
+            ) from e
+
+    return _channel_builder
+
+
+# Built bundles per (season, round, step_ms, etag), least recently
+# used evicted first
+_bundles: "OrderedDict[tuple, bytes]" = OrderedDict()
+MAX_CACHED_BUNDLES = 4
+
+
+def get_race(season: int | None, round: int | None) -> FrameBuilder:
+    """
+    FrameBuilder for the requested race (default race when omitted);
+    waits for a load already started by /replay/prewarm.
+    """
+    season = settings.default_season if season is None else season
+    round = settings.default_round if round is None else round
+
+    if _is_default(season, round):
+        return frame_builder
+
+    _require_catalogued(season, round)
+
+    try:
+        return races.get(season, round)
+    except (S3PartitionNotFound, FileNotFoundError, ValueError) as e:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Race season={season}, round={round} could not be loaded: {e}",
+        ) from e
+
+
+def _is_default(season: int, round: int) -> bool:
+    return (season, round) == (settings.default_season, settings.default_round)
+
+
+def _race_status(season: int, round: int) -> str:
+    # The default race stays in memory for the process lifetime
+    if _is_default(season, round):
+        return STATUS_LOADED
+    return races.status(season, round)
+
+
+def _require_catalogued(season: int, round: int, session: str = "RACE"):
+    try:
+        found = catalog.contains(season, round, session)
+    except Exception as e:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Race catalog unavailable: {e}",
+        ) from e
+
+    if not found:
+        raise HTTPException(
+            status_code=404,
+            detail=f"No curated data for season={season}, round={round}, session={session}",
+        )
+
+
+def _csv(value: str | None) -> list[str]:
+    if not value:
+        return []
+    return [v.strip() for v in value.split(",") if v.strip()]
+
+
+@router.get("/catalog")
+def get_catalog(refresh: bool = Query(False)):
+    """
+    Return the races with curated data: seasons, rounds, sessions,
+    their size and whether each is loaded in memory.
+    """
+    try:
+        partitions = catalog.partitions(refresh=refresh)
+    except Exception as e:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Race catalog unavailable: {e}",
+        ) from e
+
+    seasons: dict[int, list] = {}
+    for p in partitions:
+        status = _race_status(p["season"], p["round"])
+        seasons.setdefault(p["season"], []).append({
+            "round": p["round"],
+            "sessions": [
+                {
+                    "session": session,
+                    "bytes": p["bytes"],
+                    "files": p["files"],
+                    "loaded": status == STATUS_LOADED,
+                    "status": status,
+                }
+                for session in CATALOG_SESSIONS
+            ],
+        })
+
+    return {
+        "seasons": [
+            {"season": season, "rounds": rounds}
+            for season, rounds in sorted(seasons.items())
+        ],
+    }
+
+
+@router.post("/prewarm", status_code=202)
+def prewarm(
+    season: int = Query(...),
+    round: int = Query(...),
+    session: str = Query("RACE"),
+):
+    """
+    Start loading a race in the background (e.g. while the user is
+    still choosing it) so its first frames are served without delay.
+    """
+    _require_catalogued(season, round, session)
+
+    return {
+        "season": season,
+        "round": round,
+        "session": session,
+        "status": (
+            _race_status(season, round)
+            if _is_default(season, round)
+            else races.prewarm(season, round)
+        ),
+    }
+
 
 @router.get("/frame")
-def get_frame():
+def get_frame(
+    season: int | None = Query(None),
+    round: int | None = Query(None),
+):
     """
     Return a deterministic replay frame for the current simulation time.
     """
 
-    return frame_builder.build_frame()
+    return get_race(season, round).build_frame()
+
+
+@router.get("/range")
+def get_range(
+    start_ms: int = Query(..., ge=0),
+    end_ms: int = Query(..., ge=0),
+    step_ms: int = Query(1000, ge=1),
+    season: int | None = Query(None),
+    round: int | None = Query(None),
+):
+    """
+    Return replay frames from start_ms to end_ms every step_ms
+    (default race unless season / round are given).
+    """
+    race = get_race(season, round)
+
+    try:
+        frames = race.build_range(start_ms, end_ms, step_ms)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+
+    return {
+        "sample_ms": race.telemetry.sample_interval_ms(start_ms),
+        "frames": frames,
+    }
+
+
+@router.get("/channels")
+def get_channels(
+    start_ms: int = Query(..., ge=0),
+    end_ms: int = Query(..., ge=0),
+    channels: str | None = Query(None, description="e.g. speed,gear (default: all)"),
+    drivers: str | None = Query(None, description="Driver numbers, e.g. 1,44"),
+    step_ms: int | None = Query(None, ge=1),
+):
+    """
+    Return car telemetry channels per driver from start_ms to end_ms,
+    raw samples or time-aligned every step_ms.
+    """
+    builder = get_channel_builder()
+
+    try:
+        driver_numbers = [int(d) for d in _csv(drivers)] or None
+        data = builder.range(
+            start_ms,
+            end_ms,
+            channels=_csv(channels),
+            driver_numbers=driver_numbers,
+            step_ms=step_ms,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+
+    return {
+        "start_ms": start_ms,
+        "end_ms": end_ms,
+        "step_ms": step_ms,
+        "drivers": {str(d): v for d, v in data.items()},
+    }
+
+
+@router.get("/bundle")
+def get_bundle(
+    season: int = Query(...),
+    round: int = Query(...),
+    step_ms: int = Query(250, ge=MIN_STEP_MS),
+    if_none_match: str | None = Header(None),
+):
+    """
+    Return the whole race as a compressed .npz bundle (roster, track,
+    dense positions every step_ms) for offline playback.
+
+    The ETag changes with the race data; a client sending its cached
+    bundle's ETag in If-None-Match gets 304 when it is still current.
+    """
+    race = get_race(season, round)
+    etag = bundle_etag(race, step_ms)
+    headers = {"ETag": etag, "X-Bundle-Version": str(BUNDLE_VERSION)}
+
+    if if_none_match == etag:
+        return Response(status_code=304, headers=headers)
+
+    key = (season, round, step_ms, etag)
+    if key in _bundles:
+        _bundles.move_to_end(key)
+    else:
+        try:
+            _bundles[key] = build_bundle(race, step_ms)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e)) from e
+        while len(_bundles) > MAX_CACHED_BUNDLES:
+            _bundles.popitem(last=False)
+
+    return Response(
+        content=_bundles[key],
+        media_type="application/octet-stream",
+        headers=headers,
+    )
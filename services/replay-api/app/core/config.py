@@ -12,6 +12,17 @@ class Settings(BaseSettings):
     default_round: int = Field(
         default=1
     )
+    # Directory for state shared by all uvicorn/gunicorn workers
+    # (telemetry arrays + clock). Use tmpfs, e.g. /dev/shm/f1-replay.
+    # Unset = per-process state (single worker).
+    shared_store_dir: str | None = Field(
+        default=None
+    )
+    # Load telemetry in time chunks around the playhead instead of
+    # the whole race up front (bounded memory, fast first frame)
+    windowed_telemetry: bool = Field(
+        default=False
+    )
 
     class Config:
         env_prefix = ""
@@ -1,4 +1,10 @@
+from app.core.config import settings
+from app.services.clock_state import build_clock_state
 from app.services.simulation_clock import SimulationClock
 
 # Single global clock instance (authoritative)
-clock = SimulationClock()
+# Backed by shared memory when SHARED_STORE_DIR is set,
+# so every worker process sees the same clock.
+clock = SimulationClock(
+    state=build_clock_state(settings.shared_store_dir)
+)
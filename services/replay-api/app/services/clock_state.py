@@ -0,0 +1,152 @@
+# app/services/clock_state.py
+
+import fcntl
+import mmap
+import os
+import struct
+import threading
+from contextlib import contextmanager, nullcontext
+
+# current_time_ms (int64), playing (uint8), phase (ascii, NUL padded)
+_LAYOUT = struct.Struct("<qB32s")
+
+
+class LocalClockState:
+    """
+    Clock state held in process memory (single worker).
+    """
+
+    def __init__(self):
+        self.current_time_ms = 0
+        self.playing = False
+        self.phase = "PRE_RACE"
+
+    def locked(self):
+        return nullcontext()
+
+
+class SharedClockState:
+    """
+    Clock state in a tiny memory-mapped file shared by all workers.
+
+    Every worker reads the same page, so /clock/* and /replay/frame
+    agree no matter which worker serves the request. Mutations run
+    under an exclusive flock so tick() read-modify-write is atomic.
+
+    The file is opened lazily, once per process: flock excludes open
+    file descriptions, not processes, so workers forked from a
+    preloaded app (gunicorn --preload) must not share the parent's fd.
+    """
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._path = path
+
+        self._fd: int | None = None
+        self._mm: mmap.mmap | None = None
+        # flock only excludes other processes; threads share the fd
+        self._thread_lock = threading.Lock()
+
+        os.register_at_fork(after_in_child=self._after_fork)
+
+    @contextmanager
+    def locked(self):
+        with self._thread_lock:
+            fd = self._open()
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+
+    def _open(self) -> int:
+        """
+        This process's fd (and mapping); caller holds _thread_lock.
+        """
+        if self._fd is not None:
+            return self._fd
+
+        fd = os.open(self._path, os.O_RDWR | os.O_CREAT, 0o644)
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        try:
+            fresh = os.fstat(fd).st_size < _LAYOUT.size
+            if fresh:
+                os.ftruncate(fd, _LAYOUT.size)
+            mm = mmap.mmap(fd, _LAYOUT.size)
+            if fresh:
+                _LAYOUT.pack_into(mm, 0, 0, 0, b"PRE_RACE")
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+
+        self._fd, self._mm = fd, mm
+        return fd
+
+    def _mapping(self) -> mmap.mmap:
+        if self._mm is None:
+            with self._thread_lock:
+                self._open()
+        return self._mm
+
+    def _after_fork(self):
+        # The child re-opens its own fd on first use; closing the
+        # inherited copies leaves the parent's open
+        if self._mm is not None:
+            self._mm.close()
+        if self._fd is not None:
+            os.close(self._fd)
+        self._fd = None
+        self._mm = None
+        self._thread_lock = threading.Lock()
+
+    # --------------------------------------------------
+    # Fields
+    # --------------------------------------------------
+    @property
+    def current_time_ms(self) -> int:
+        return self._read()[0]
+
+    @current_time_ms.setter
+    def current_time_ms(self, value: int):
+        _, playing, phase = self._read()
+        self._write(value, playing, phase)
+
+    @property
+    def playing(self) -> bool:
+        return self._read()[1]
+
+    @playing.setter
+    def playing(self, value: bool):
+        time_ms, _, phase = self._read()
+        self._write(time_ms, value, phase)
+
+    @property
+    def phase(self) -> str:
+        return self._read()[2]
+
+    @phase.setter
+    def phase(self, value: str):
+        time_ms, playing, _ = self._read()
+        self._write(time_ms, playing, value)
+
+    # --------------------------------------------------
+    # Internals
+    # --------------------------------------------------
+    def _read(self):
+        time_ms, playing, phase = _LAYOUT.unpack_from(self._mapping(), 0)
+        return time_ms, bool(playing), phase.rstrip(b"\0").decode("ascii")
+
+    def _write(self, time_ms: int, playing: bool, phase: str):
+        _LAYOUT.pack_into(
+            self._mapping(),
+            0,
+            int(time_ms),
+            1 if playing else 0,
+            phase.encode("ascii")[:32],
+        )
+
+
+def build_clock_state(shared_store_dir: str | None):
+    if not shared_store_dir:
+        return LocalClockState()
+
+    return SharedClockState(os.path.join(shared_store_dir, "clock.state"))
@@ -0,0 +1,233 @@
+# app/services/driver_status.py
+
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from app.services.metadata_loader import MISSING_MS
+from app.services.telemetry_arrays import TelemetryArrays
+
+STATUS_RACING = "Racing"
+STATUS_PIT = "Pit"
+STATUS_OUT = "Out"
+
+# Code per status (index into STATUS_LABELS); 0 = no interval
+STATUS_LABELS = (STATUS_RACING, STATUS_PIT, STATUS_OUT)
+_CODES = {label: code for code, label in enumerate(STATUS_LABELS)}
+
+# Same key layout as TelemetryArrays: rank * stride + time
+_KEY_STRIDE = np.int64(1 << 40)
+_OPEN_END = np.int64((1 << 40) - 1)
+
+# Pit stop length when the lap data has a pit entry but no exit time
+DEFAULT_PIT_MS = 25_000
+
+# A car is stopped once it is within this distance of where it ended
+STATIONARY_M = 50.0
+
+# Telemetry-only retirements: stopped this long before the last car
+NO_LAPS_MARGIN_MS = 10 * 60_000
+
+Interval = Tuple[int, int, str]
+
+
+class DriverStatusTimeline:
+    """
+    Per-driver status intervals for a whole race, built once:
+
+        Pit  from pit entry to pit exit (lap data)
+        Out  from the moment a retired car stopped until the end
+
+    A driver who stopped before the winner took the chequered flag
+    (fewer laps, last lap finished before the flag) is a retirement.
+    The curated layer has no classification results, so this is the
+    DNF rule. Without lap data, cars whose telemetry stops well before
+    the session ends are treated as retired.
+
+    Intervals are sorted by (driver rank, start) under one int64 key,
+    so a frame's statuses are a single searchsorted.
+    """
+
+    def __init__(self, intervals: Dict[int, List[Interval]]):
+        self.driver_numbers = np.array(sorted(intervals), dtype=np.int64)
+
+        keys, ends, codes = [], [], []
+        for rank, driver in enumerate(self.driver_numbers):
+            for start, end, status in sorted(intervals[int(driver)]):
+                keys.append(rank * _KEY_STRIDE + start)
+                ends.append(end)
+                codes.append(_CODES[status])
+
+        self.sort_key = np.array(keys, dtype=np.int64)
+        self.ends = np.array(ends, dtype=np.int64)
+        self.codes = np.array(codes, dtype=np.int8)
+
+    def __len__(self) -> int:
+        return len(self.sort_key)
+
+    def codes_at(self, driver_numbers: np.ndarray, times_ms: np.ndarray) -> np.ndarray:
+        """
+        Status code per (driver, time) pair (broadcast), 0 = racing.
+        """
+        drivers = np.asarray(driver_numbers, dtype=np.int64)
+        times = np.asarray(times_ms, dtype=np.int64)
+
+        codes = np.zeros(np.broadcast(drivers, times).shape, dtype=np.int8)
+        if not len(self.sort_key):
+            return codes
+
+        rank = np.searchsorted(self.driver_numbers, drivers)
+        rank = np.minimum(rank, len(self.driver_numbers) - 1)
+        known = self.driver_numbers[rank] == drivers
+
+        queries = rank * _KEY_STRIDE + times
+        i = np.searchsorted(self.sort_key, queries, side="right") - 1
+        i_safe = np.maximum(i, 0)
+
+        # Latest interval starting at or before t, same driver, still open
+        hit = (
+            known
+            & (i >= 0)
+            & (self.sort_key[i_safe] // _KEY_STRIDE == rank)
+            & (times < self.ends[i_safe])
+        )
+        codes[hit] = self.codes[i_safe][hit]
+        return codes
+
+    def statuses_at(self, driver_numbers, time_ms: int) -> List[str]:
+        return [
+            STATUS_LABELS[c]
+            for c in self.codes_at(np.asarray(driver_numbers), time_ms)
+        ]
+
+    # --------------------------------------------------
+    # Build
+    # --------------------------------------------------
+    @classmethod
+    def build(
+        cls,
+        laps: Dict[str, np.ndarray] | None,
+        arrays: TelemetryArrays | None = None,
+        distance_column: str | None = None,
+    ) -> "DriverStatusTimeline":
+        """
+        laps: MetadataLoader.load_lap_times() columns (or None)
+        arrays: full-race telemetry, to time retirements (optional)
+        """
+        intervals: Dict[int, List[Interval]] = {}
+
+        stopped = {}
+        if arrays is not None and distance_column and len(arrays):
+            stopped = _stop_times(arrays, distance_column)
+
+        if laps is not None and len(laps["driver_number"]):
+            retired = _retirements_from_laps(laps, stopped)
+            for driver, pits in _pit_stops(laps).items():
+                intervals.setdefault(driver, []).extend(
+                    (start, end, STATUS_PIT) for start, end in pits
+                )
+        elif stopped:
+            session_end = max(stopped.values())
+            retired = {
+                d: t for d, t in stopped.items()
+                if t < session_end - NO_LAPS_MARGIN_MS
+            }
+        else:
+            retired = {}
+
+        for driver, out_ms in retired.items():
+            # Nothing after retirement but Out
+            kept = [
+                (start, min(end, out_ms), status)
+                for start, end, status in intervals.get(driver, [])
+                if start < out_ms
+            ]
+            intervals[driver] = kept + [(out_ms, int(_OPEN_END), STATUS_OUT)]
+
+        return cls(intervals)
+
+
+def _pit_stops(laps: Dict[str, np.ndarray]) -> Dict[int, List[Tuple[int, int]]]:
+    """
+    (entry, exit) per pit stop and driver. Entry is on the in-lap,
+    exit on a following out-lap; laps are sorted by (driver, lap).
+    """
+    stops: Dict[int, List[Tuple[int, int]]] = {}
+    drivers = laps["driver_number"]
+    missing = np.full(len(drivers), MISSING_MS, dtype=np.int64)
+
+    # Flag without a time: the in-lap ends in the pit lane
+    entry_ms = np.where(laps["pit_in"], laps["lap_finish_time_ms"], MISSING_MS)
+    if "pit_in_time_ms" in laps:
+        known = laps["pit_in_time_ms"] != MISSING_MS
+        entry_ms = np.where(known, laps["pit_in_time_ms"], entry_ms)
+    exit_ms = laps.get("pit_out_time_ms", missing)
+
+    for driver in np.unique(drivers):
+        rows = np.flatnonzero(drivers == driver)
+        entries = entry_ms[rows]
+        exits = exit_ms[rows]
+
+        entries = np.sort(entries[entries != MISSING_MS])
+        exits = np.sort(exits[exits != MISSING_MS])
+
+        for entry in entries:
+            j = np.searchsorted(exits, entry, side="right")
+            end = int(exits[j]) if j < len(exits) else int(entry) + DEFAULT_PIT_MS
+            stops.setdefault(int(driver), []).append((int(entry), end))
+
+    return stops
+
+
+def _retirements_from_laps(
+    laps: Dict[str, np.ndarray],
+    stopped: Dict[int, int],
+) -> Dict[int, int]:
+    """
+    Drivers whose last completed lap ended before the winner's finish,
+    with the time they stopped (telemetry) or their last lap finish.
+    """
+    drivers = laps["driver_number"]
+    finish = laps["lap_finish_time_ms"]
+    done = finish != MISSING_MS
+    if not done.any():
+        return {}
+
+    lap_number = laps["lap_number"]
+    winner_laps = lap_number[done].max()
+    flag_ms = finish[done & (lap_number == winner_laps)].min()
+
+    race_start = laps["lap_start_time_ms"]
+    race_start = int(race_start[race_start != MISSING_MS].min(initial=flag_ms))
+
+    retired = {}
+    for driver in np.unique(drivers):
+        mine = (drivers == driver) & done
+        last_finish = int(finish[mine].max()) if mine.any() else race_start
+
+        if last_finish >= flag_ms:
+            continue
+
+        retired[int(driver)] = max(stopped.get(int(driver), last_finish), last_finish)
+
+    return retired
+
+
+def _stop_times(arrays: TelemetryArrays, distance_column: str) -> Dict[int, int]:
+    """
+    Per driver: first sample within STATIONARY_M of the final position
+    along the race (when the car stopped moving for good).
+    """
+    distance = arrays[distance_column]
+    timestamp = arrays["timestamp_ms"]
+
+    stopped = {}
+    for driver, start, end in zip(arrays.driver_numbers, arrays.starts, arrays.ends):
+        d = distance[start:end]
+        if not len(d):
+            continue
+        moving = np.flatnonzero(d < d[-1] - STATIONARY_M)
+        first_still = moving[-1] + 1 if len(moving) else 0
+        stopped[int(driver)] = int(timestamp[start + first_still])
+
+    return stopped
@@ -1,29 +1,97 @@
 # app/services/frame_builder.py
 
+import logging
+import math
+
+import numpy as np
+
 from app.services.clock_registry import clock
+from app.services.driver_status import DriverStatusTimeline
+from app.services.gap_table import GapTable
 from app.services.telemetry_position_builder import TelemetryPositionBuilder
 from app.services.metadata_loader import MetadataLoader
+from app.storage.parquet_reader import S3PartitionNotFound
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on frames returned by one range request
+MAX_RANGE_FRAMES = 2_000
 
 
 class FrameBuilder:
     """
     Builds replay frames using telemetry ONLY.
     Frame order is authoritative (sorted by distance).
+    Distance is centerline race progress when the track
+    centerline is available (see TelemetryPositionBuilder).
     """
 
-    def __init__(self, curated_bucket: str, season: int, round: int):
-        self.telemetry = TelemetryPositionBuilder(
+    def __init__(
+        self,
+        curated_bucket: str,
+        season: int,
+        round: int,
+        windowed: bool = False,
+    ):
+        self.season = season
+        self.round = round
+
+        metadata = MetadataLoader(
             curated_bucket=curated_bucket,
             season=season,
             round=round,
         )
 
-        metadata = MetadataLoader(
+        # Real centerline only; the placeholder circle would
+        # produce meaningless projections
+        try:
+            centerline = metadata.load_track_centerline(
+                allow_placeholder=False
+            )
+        except ValueError:
+            centerline = None
+        self.centerline = centerline
+
+        # Lap timing: driver status, and windowed progress counts laps.
+        # Optional: without it the race only loses pit stops / DNFs
+        try:
+            laps = metadata.load_lap_times()
+        except (S3PartitionNotFound, FileNotFoundError, ValueError) as e:
+            logger.warning(
+                "No lap data for season=%s, round=%s (%s): "
+                "driver status without pit stops / DNFs",
+                season, round, e,
+            )
+            laps = None
+
+        self.telemetry = TelemetryPositionBuilder(
             curated_bucket=curated_bucket,
             season=season,
             round=round,
+            centerline=centerline,
+            laps=laps if windowed else None,
+            windowed=windowed,
+        )
+
+        # Pit / retirement intervals, once per race (retirements are
+        # timed from telemetry when the whole race is in memory)
+        self.status = DriverStatusTimeline.build(
+            laps,
+            arrays=self.telemetry.arrays,
+            distance_column=self.telemetry.distance_column,
         )
 
+        # Windowed: gaps come from the resident window (see _gaps_at)
+        self.gaps = None
+        self._window_gaps = (None, None)
+        if not windowed:
+            self.gaps = GapTable(
+                arrays=self.telemetry.arrays,
+                distance_column=self.telemetry.distance_column,
+                store_key=self.telemetry.store_key,
+                version=self.telemetry.data_version(),
+            )
+
         drivers_df = metadata.load_drivers()
 
         # 🔒 HARD ASSERT (fail fast, clear error)
@@ -44,20 +112,30 @@ class FrameBuilder:
                 "team": row["team_name"],
             }
 
+    def store_keys(self) -> list[str]:
+        """
+        Shared store entries of this race (freed when it is evicted).
+        """
+        return [self.telemetry.store_key, f"{self.telemetry.store_key}/gaps"]
+
     def build_frame(self) -> dict:
         if clock is None:
             raise RuntimeError("Clock not initialized")
 
-        time_ms = clock.current_time_ms
+        return self.build_frame_at(clock.current_time_ms)
+
+    def build_frame_at(self, time_ms: int) -> dict:
         telemetry_states = self.telemetry.build(time_ms)
 
         driver_states = []
+        driver_numbers = []
 
         for t in telemetry_states:
             meta = self.driver_lookup.get(t["driver_number"])
             if not meta:
                 continue
 
+            driver_numbers.append(t["driver_number"])
             driver_states.append({
                 "driver_id": meta["driver_id"],
                 "driver_code": meta["driver_code"],
@@ -65,16 +143,79 @@ class FrameBuilder:
                 "x": t["x"],
                 "y": t["y"],
                 "distance": t["distance"],
+                "lap": t.get("lap"),
+                "lap_distance": t.get("lap_distance"),
             })
 
         # 🔥 AUTHORITATIVE race order
-        driver_states.sort(
-            key=lambda d: d["distance"],
+        order = sorted(
+            range(len(driver_states)),
+            key=lambda i: driver_states[i]["distance"],
             reverse=True,
         )
+        driver_states = [driver_states[i] for i in order]
+
+        ordered_numbers = np.array(
+            [driver_numbers[i] for i in order],
+            dtype=np.int64,
+        )
+
+        # Gaps: interpolation lookups, no scan over telemetry
+        gap, interval = self._gaps_at(time_ms).gaps(
+            ordered_numbers,
+            np.array([d["distance"] for d in driver_states]),
+            time_ms,
+        )
+
+        # Status: one searchsorted over the race's interval index
+        statuses = self.status.statuses_at(ordered_numbers, time_ms)
+
+        for d, g, iv, st in zip(driver_states, gap, interval, statuses):
+            d["gap_to_leader_ms"] = None if math.isnan(g) else int(g)
+            d["interval_ms"] = None if math.isnan(iv) else int(iv)
+            d["status"] = st
 
         return {
             "time_ms": time_ms,
             "phase": "TELEMETRY",
             "driver_states": driver_states,
         }
+
+    def _gaps_at(self, time_ms: int) -> GapTable:
+        """
+        Whole-race gap table, or (windowed) one over the playhead's
+        window: gaps longer than the window's history are unknown.
+        """
+        if self.gaps is not None:
+            return self.gaps
+
+        view = self.telemetry.window.view_at(time_ms)
+        cached_view, table = self._window_gaps
+        if cached_view is not view:
+            table = GapTable(
+                arrays=view,
+                distance_column=self.telemetry.distance_column,
+                store_key=None,
+            )
+            self._window_gaps = (view, table)
+
+        return table
+
+    def build_range(self, start_ms: int, end_ms: int, step_ms: int) -> list[dict]:
+        """
+        Frames at start_ms, start_ms + step_ms, ... <= end_ms.
+        """
+        if end_ms < start_ms:
+            raise ValueError("end_ms must be >= start_ms")
+
+        count = (end_ms - start_ms) // step_ms + 1
+        if count > MAX_RANGE_FRAMES:
+            raise ValueError(
+                f"Range yields {count} frames (max {MAX_RANGE_FRAMES}); "
+                f"increase step_ms"
+            )
+
+        return [
+            self.build_frame_at(start_ms + i * step_ms)
+            for i in range(count)
+        ]
@@ -0,0 +1,141 @@
+# app/services/gap_table.py
+
+from typing import Dict, Tuple
+
+import numpy as np
+
+from app.services.store_registry import store
+from app.services.telemetry_arrays import TelemetryArrays
+
+# Distance between checkpoints (telemetry distance units)
+CHECKPOINT_SPACING = 50.0
+
+
+class GapTable:
+    """
+    Time at which each driver first reached fixed distance checkpoints
+    (the inverse of distance-vs-time), precomputed once per race.
+
+    At replay time T, with a driver at distance d:
+        gap_to_leader = T - (time the leader reached d)
+        interval      = T - (time the car ahead reached d)
+    Each is a constant-time interpolation between two checkpoints.
+
+    store_key=None builds a private table (e.g. over a short-lived
+    telemetry window) instead of a shared one; version is that of the
+    telemetry it is built from (see SharedArrayStore).
+    """
+
+    def __init__(
+        self,
+        arrays: TelemetryArrays,
+        distance_column: str,
+        store_key: str | None,
+        spacing: float = CHECKPOINT_SPACING,
+        version: str = "",
+    ):
+        self.spacing = spacing
+
+        def build():
+            return build_checkpoint_times(arrays, distance_column, spacing)
+
+        table = (
+            build() if store_key is None
+            else store.get_or_build(f"{store_key}/gaps", build, version)
+        )
+
+        self.driver_numbers = table["driver_numbers"]
+        self.times = table["times"]
+        self.origin = float(table["origin"][0])
+
+    def time_at(self, driver_numbers: np.ndarray, distances: np.ndarray) -> np.ndarray:
+        """
+        Time (ms) each given driver reached the given distance.
+        NaN where the driver never got there or no data.
+        """
+        rows = np.searchsorted(self.driver_numbers, driver_numbers)
+        rows = np.clip(rows, 0, len(self.driver_numbers) - 1)
+        known = self.driver_numbers[rows] == driver_numbers
+
+        pos = (np.asarray(distances, dtype=np.float64) - self.origin) / self.spacing
+        lo = np.floor(pos).astype(np.int64)
+        frac = pos - lo
+
+        n = self.times.shape[1]
+        inside = known & (lo >= 0) & (lo + 1 < n)
+        lo = np.clip(lo, 0, n - 2)
+
+        t = (
+            self.times[rows, lo] * (1.0 - frac)
+            + self.times[rows, lo + 1] * frac
+        )
+        return np.where(inside, t, np.nan)
+
+    def gaps(
+        self,
+        ordered_drivers: np.ndarray,
+        ordered_distances: np.ndarray,
+        time_ms: int,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Gap to leader and interval to car ahead (ms) for drivers
+        already in race order. NaN where unknown; interval of the
+        leader is NaN by definition.
+        """
+        if len(ordered_drivers) == 0:
+            empty = np.zeros(0)
+            return empty, empty
+
+        leader = np.full(len(ordered_drivers), ordered_drivers[0])
+        gap = time_ms - self.time_at(leader, ordered_distances)
+        gap[0] = 0.0
+
+        interval = np.full(len(ordered_drivers), np.nan)
+        interval[1:] = time_ms - self.time_at(
+            ordered_drivers[:-1],
+            ordered_distances[1:],
+        )
+
+        return np.maximum(gap, 0.0), np.maximum(interval, 0.0)
+
+
+def build_checkpoint_times(
+    arrays: TelemetryArrays,
+    distance_column: str,
+    spacing: float,
+) -> Dict[str, np.ndarray]:
+    distance = arrays[distance_column]
+    timestamp = arrays["timestamp_ms"]
+
+    if len(distance) == 0:
+        return {
+            "driver_numbers": arrays.driver_numbers,
+            "times": np.full((len(arrays.driver_numbers), 2), np.nan),
+            "origin": np.zeros(1),
+        }
+
+    origin = np.floor(float(distance.min()) / spacing) * spacing
+    n = int(np.ceil((float(distance.max()) - origin) / spacing)) + 2
+    checkpoints = origin + np.arange(n) * spacing
+
+    times = np.full((len(arrays.driver_numbers), n), np.nan)
+
+    for row, (lo, hi) in enumerate(zip(arrays.starts, arrays.ends)):
+        if hi == lo:
+            continue
+
+        # First time each distance was reached (ignores jitter backwards)
+        d, first = np.unique(
+            np.maximum.accumulate(distance[lo:hi]),
+            return_index=True,
+        )
+        t = timestamp[lo:hi][first].astype(np.float64)
+
+        reached = (checkpoints >= d[0]) & (checkpoints <= d[-1])
+        times[row, reached] = np.interp(checkpoints[reached], d, t)
+
+    return {
+        "driver_numbers": arrays.driver_numbers,
+        "times": times,
+        "origin": np.array([origin]),
+    }
@@ -1,17 +1,50 @@
 # app/services/metadata_loader.py
 
+from typing import Dict
+
+import numpy as np
+import pyarrow as pa
+
 from app.storage.parquet_reader import (
     ParquetReader,
     S3PartitionNotFound,
 )
 
+# Sentinel for unknown lap timings (session times are never negative)
+MISSING_MS = -1
+
+LAP_COLUMNS = (
+    "driver_number",
+    "lap_number",
+    "stint",
+    "lap_time_ms",
+    "lap_start_time_ms",
+    "lap_finish_time_ms",
+    "sector1_time_ms",
+    "sector2_time_ms",
+    "sector3_time_ms",
+    "pit_in",
+    "pit_out",
+    "compound",
+    "tyre_life",
+    "track_status",
+)
+
+# Loaded when present (older curated partitions lack them)
+OPTIONAL_LAP_COLUMNS = (
+    "pit_in_time_ms",
+    "pit_out_time_ms",
+)
+
 
 class MetadataLoader:
     """
-    Loads curated metadata from S3.
-    TELEMETRY-ONLY MODE:
-    - No lap windows
-    - No phase resolution
+    Loads curated metadata from S3:
+    - race and driver roster
+    - lap times as typed column arrays (optional; frames use them for
+      pit / retirement status and windowed race progress)
+    - track centerline
+    No phase resolution: the replay clock owns the race phase.
     """
 
     def __init__(self, curated_bucket: str, season: int, round: int):
@@ -69,11 +102,20 @@ class MetadataLoader:
         ]
 
     # --------------------------------------------------
-    # Lap times (optional, KEEP for future features)
+    # Lap times (optional: driver status, windowed progress)
     # --------------------------------------------------
-    def load_lap_times(self) -> list[dict]:
+    def load_lap_times(self) -> Dict[str, np.ndarray]:
+        """
+        Typed lap table as column arrays, sorted by
+        (driver_number, lap_number):
+        - *_ms columns: int64 ms, MISSING_MS where unknown
+        - other integers (stint, tyre_life): 0 where unknown
+        - pit_in / pit_out: bool
+        - compound / track_status: labels (object arrays)
+        - pit_in_time_ms / pit_out_time_ms when the partition has them
+        """
         try:
-            df = self.reader.read_partitioned_table(
+            table = self.reader.read_partitioned_arrow(
                 bucket=self.curated_bucket,
                 dataset="lap_times",
                 season=self.season,
@@ -84,29 +126,42 @@ class MetadataLoader:
                 f"Lap times not found for season={self.season}, round={self.round}"
             ) from e
 
-        required = {
-            "driver_id",
-            "lap_number",
-            "lap_start_time_ms",
-            "lap_finish_time_ms",
-        }
-        missing = required - set(df.columns)
+        missing = set(LAP_COLUMNS) - set(table.column_names)
         if missing:
             raise ValueError(f"Missing lap time columns: {missing}")
 
-        return df[
-            [
-                "driver_id",
-                "lap_number",
-                "lap_start_time_ms",
-                "lap_finish_time_ms",
-            ]
-        ].to_dict(orient="records")
+        names = LAP_COLUMNS + tuple(
+            name for name in OPTIONAL_LAP_COLUMNS
+            if name in table.column_names
+        )
+
+        columns = {}
+        for name in names:
+            col = table[name].combine_chunks()
+
+            if pa.types.is_dictionary(col.type) and not len(col.dictionary):
+                # All null: nothing to index into
+                columns[name] = np.full(len(col), None, dtype=object)
+            elif pa.types.is_dictionary(col.type):
+                # Decode once per distinct label, not per row
+                labels = col.dictionary.to_numpy(zero_copy_only=False)
+                codes = col.indices.fill_null(-1).to_numpy()
+                columns[name] = np.where(
+                    codes >= 0, labels[np.maximum(codes, 0)], None
+                )
+            elif pa.types.is_boolean(col.type):
+                columns[name] = col.fill_null(False).to_numpy(zero_copy_only=False)
+            elif name.endswith("_ms"):
+                columns[name] = col.fill_null(MISSING_MS).to_numpy()
+            else:
+                columns[name] = col.fill_null(0).to_numpy()
+
+        return columns
 
     # --------------------------------------------------
     # Track geometry
     # --------------------------------------------------
-    def load_track_centerline(self):
+    def load_track_centerline(self, allow_placeholder: bool = True):
         try:
             df = self.reader.read_partitioned_table(
                 bucket=self.curated_bucket,
@@ -114,7 +169,12 @@ class MetadataLoader:
                 season=self.season,
                 round=self.round,
             )
-        except S3PartitionNotFound:
+        except S3PartitionNotFound as e:
+            if not allow_placeholder:
+                raise ValueError(
+                    f"Track centerline not found for season={self.season}, round={self.round}"
+                ) from e
+
             # TEMP fallback
             return self._load_placeholder_centerline()
 
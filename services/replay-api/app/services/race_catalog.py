@@ -0,0 +1,70 @@
+# app/services/race_catalog.py
+
+import threading
+import time
+from typing import Dict, List, Tuple
+
+from app.storage.parquet_reader import ParquetReader
+
+# A race is available when its curated telemetry exists
+CATALOG_DATASET = "telemetry_positions"
+
+# Curated telemetry is built from the race session only
+CATALOG_SESSIONS = ("RACE",)
+
+# Listing reused for this long (new races appear after a refresh)
+CATALOG_TTL_S = 300.0
+
+
+class RaceCatalog:
+    """
+    Races with curated data, from one cached listing of the
+    telemetry partitions (sizes included, nothing is read).
+
+    A failed refresh keeps serving the previous listing.
+    """
+
+    def __init__(
+        self,
+        curated_bucket: str,
+        ttl_s: float = CATALOG_TTL_S,
+        reader: ParquetReader | None = None,
+    ):
+        self.curated_bucket = curated_bucket
+        self.ttl_s = ttl_s
+        self.reader = reader or ParquetReader()
+
+        self._lock = threading.Lock()
+        self._partitions: Dict[Tuple[int, int], dict] | None = None
+        self._listed_at = 0.0
+
+    def partitions(self, refresh: bool = False) -> List[dict]:
+        """
+        [{"season", "round", "bytes", "files"}], sorted.
+        """
+        with self._lock:
+            stale = time.monotonic() - self._listed_at > self.ttl_s
+            if self._partitions is None or stale or refresh:
+                try:
+                    listing = self.reader.list_partitions(
+                        bucket=self.curated_bucket,
+                        dataset=CATALOG_DATASET,
+                    )
+                except Exception:
+                    if self._partitions is None:
+                        raise
+                else:
+                    self._partitions = {
+                        (p["season"], p["round"]): p for p in listing
+                    }
+                    self._listed_at = time.monotonic()
+
+            return list(self._partitions.values())
+
+    def contains(self, season: int, round: int, session: str = "RACE") -> bool:
+        if session not in CATALOG_SESSIONS:
+            return False
+        return any(
+            (p["season"], p["round"]) == (season, round)
+            for p in self.partitions()
+        )
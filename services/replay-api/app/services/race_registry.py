@@ -0,0 +1,149 @@
+# app/services/race_registry.py
+
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Iterable, List, Set, Tuple
+
+from app.services.frame_builder import FrameBuilder
+from app.services.store_registry import store
+
+# Races kept in memory (least recently used evicted first)
+MAX_LOADED_RACES = 2
+
+# Race loads are memory / S3 heavy: one at a time
+LOAD_WORKERS = 1
+
+STATUS_COLD = "cold"
+STATUS_LOADING = "loading"
+STATUS_LOADED = "loaded"
+STATUS_FAILED = "failed"
+
+
+class RaceRegistry:
+    """
+    FrameBuilders per (season, round), built on a background thread.
+
+    prewarm() starts a load without waiting (clients call it from
+    the race menu); get() waits for the same load, so a prewarmed
+    race is served as soon as it is ready. A failed load is retried
+    on the next prewarm() / get().
+
+    Loads run one at a time, so a prewarm that has not started yet is
+    dropped when another race is prewarmed (the user moved on in the
+    menu); a load some get() is waiting for never is.
+
+    An evicted race also frees its shared store entries, so the store
+    holds about max_loaded races. pinned races (e.g. the default one,
+    held for the process lifetime) are never evicted.
+    """
+
+    def __init__(
+        self,
+        curated_bucket: str,
+        windowed: bool = False,
+        max_loaded: int = MAX_LOADED_RACES,
+        pinned: Iterable[Tuple[int, int]] = (),
+    ):
+        self.curated_bucket = curated_bucket
+        self.windowed = windowed
+        self.max_loaded = max_loaded
+        self.pinned = set(pinned)
+
+        self._lock = threading.Lock()
+        self._races: "OrderedDict[Tuple[int, int], Future]" = OrderedDict()
+        # Races loaded for prewarm() only (no get() yet)
+        self._prewarmed: Set[Tuple[int, int]] = set()
+        self._executor = ThreadPoolExecutor(
+            max_workers=LOAD_WORKERS,
+            thread_name_prefix="race-load",
+        )
+
+    def get(self, season: int, round: int) -> FrameBuilder:
+        future = self._submit(season, round)
+        try:
+            return future.result()
+        except Exception:
+            self._forget(season, round, future)
+            raise
+
+    def prewarm(self, season: int, round: int) -> str:
+        self._submit(season, round, prewarm=True)
+        return self.status(season, round)
+
+    def status(self, season: int, round: int) -> str:
+        with self._lock:
+            future = self._races.get((season, round))
+
+        if future is None:
+            return STATUS_COLD
+        if not future.done():
+            return STATUS_LOADING
+        return STATUS_FAILED if future.exception() else STATUS_LOADED
+
+    # --------------------------------------------------
+    # Internals
+    # --------------------------------------------------
+    def _submit(self, season: int, round: int, prewarm: bool = False) -> Future:
+        key = (season, round)
+
+        with self._lock:
+            if prewarm:
+                self._cancel_prewarms(keep=key)
+
+            future = self._races.get(key)
+            if future is None or (future.done() and future.exception()):
+                future = self._executor.submit(self._build, season, round)
+                self._races[key] = future
+                if prewarm:
+                    self._prewarmed.add(key)
+
+            if not prewarm:
+                self._prewarmed.discard(key)
+
+            self._races.move_to_end(key)
+            evicted = self._evict()
+
+        self._release(evicted)
+        return future
+
+    def _cancel_prewarms(self, keep: Tuple[int, int]):
+        for key in list(self._prewarmed):
+            if key == keep:
+                continue
+            # Running or finished loads are kept (cancel() is False)
+            if self._races[key].cancel():
+                del self._races[key]
+            self._prewarmed.discard(key)
+
+    def _evict(self) -> List[Future]:
+        # Only finished races; an in-flight load is never dropped
+        evicted = []
+        for key in list(self._races):
+            if len(self._races) <= self.max_loaded:
+                break
+            if key not in self.pinned and self._races[key].done():
+                evicted.append(self._races.pop(key))
+                self._prewarmed.discard(key)
+        return evicted
+
+    @staticmethod
+    def _release(evicted: List[Future]):
+        for future in evicted:
+            if future.exception() is None:
+                for key in future.result().store_keys():
+                    store.delete(key)
+
+    def _forget(self, season: int, round: int, future: Future):
+        with self._lock:
+            if self._races.get((season, round)) is future:
+                del self._races[(season, round)]
+                self._prewarmed.discard((season, round))
+
+    def _build(self, season: int, round: int) -> FrameBuilder:
+        return FrameBuilder(
+            curated_bucket=self.curated_bucket,
+            season=season,
+            round=round,
+            windowed=self.windowed,
+        )
@@ -0,0 +1,120 @@
+# app/services/replay_bundle.py
+
+import io
+import json
+from datetime import datetime, timezone
+
+import numpy as np
+
+from app.services.driver_status import STATUS_LABELS
+from app.services.frame_builder import FrameBuilder
+
+# Bump when the bundle layout changes (clients cache by version)
+BUNDLE_VERSION = 2
+
+# Session the API serves (curated telemetry is race-only)
+BUNDLE_SESSION = "RACE"
+
+MIN_STEP_MS = 100
+# Dense grid bound: drivers * frames
+MAX_BUNDLE_CELLS = 20_000_000
+
+
+def bundle_etag(frame_builder: FrameBuilder, step_ms: int) -> str:
+    """
+    Identifies a bundle's content: layout version, step and the
+    version of the race data it is built from, so clients revalidate
+    their disk cache when a race is re-curated.
+    """
+    data_version = frame_builder.telemetry.data_version()
+    return f'"v{BUNDLE_VERSION}-{step_ms}-{data_version}"'
+
+
+def build_bundle(frame_builder: FrameBuilder, step_ms: int) -> bytes:
+    """
+    Whole race as one compressed .npz for offline playback:
+
+        meta          uint8 JSON: version, season, round, session,
+                      start_ms, step_ms, frame count, roster,
+                      status labels
+        driver_number int16 (drivers,)
+        x, y          float32 (drivers, frames), NaN before a driver's
+                      first sample
+        distance      float32 (drivers, frames), race order key
+        status        int8 (drivers, frames), index into meta statuses
+        track         float32 (points, 2), track centerline (may be empty)
+
+    Frame i is the latest sample at or before start_ms + i * step_ms,
+    from the same sorted arrays that serve /replay/frame.
+    """
+    if step_ms < MIN_STEP_MS:
+        raise ValueError(f"step_ms must be >= {MIN_STEP_MS}")
+
+    telemetry = frame_builder.telemetry
+    arrays = telemetry.full_arrays()
+
+    timestamp = arrays["timestamp_ms"]
+    if len(timestamp) == 0:
+        raise ValueError("No telemetry to bundle")
+
+    start_ms = int(timestamp.min()) // step_ms * step_ms
+    end_ms = int(timestamp.max())
+    times = np.arange(start_ms, end_ms + 1, step_ms, dtype=np.int64)
+
+    cells = len(arrays.driver_numbers) * len(times)
+    if cells > MAX_BUNDLE_CELLS:
+        raise ValueError(
+            f"Bundle would hold {cells} samples (max {MAX_BUNDLE_CELLS}); "
+            f"increase step_ms"
+        )
+
+    # One searchsorted for every (driver, frame)
+    grid = arrays.grid_indices(times)
+    valid = grid >= 0
+    safe = np.where(valid, grid, 0)
+
+    def dense(column: str) -> np.ndarray:
+        values = np.asarray(arrays[column], dtype=np.float32)[safe]
+        return np.where(valid, values, np.float32(np.nan))
+
+    roster = [
+        {
+            "driver_number": int(d),
+            **frame_builder.driver_lookup.get(
+                int(d),
+                {"driver_id": str(int(d)), "driver_code": str(int(d)), "team": "Unknown"},
+            ),
+        }
+        for d in arrays.driver_numbers
+    ]
+
+    meta = {
+        "version": BUNDLE_VERSION,
+        "season": frame_builder.season,
+        "round": frame_builder.round,
+        "session": BUNDLE_SESSION,
+        "start_ms": start_ms,
+        "step_ms": step_ms,
+        "frames": len(times),
+        "roster": roster,
+        "statuses": list(STATUS_LABELS),
+        "built_at_utc": datetime.now(timezone.utc).isoformat(),
+    }
+
+    track = np.asarray(frame_builder.centerline or [], dtype=np.float32).reshape(-1, 2)
+
+    buf = io.BytesIO()
+    np.savez_compressed(
+        buf,
+        meta=np.frombuffer(json.dumps(meta).encode("utf-8"), dtype=np.uint8),
+        driver_number=arrays.driver_numbers.astype(np.int16),
+        x=dense("x"),
+        y=dense("y"),
+        distance=dense(telemetry.distance_column),
+        status=frame_builder.status.codes_at(
+            arrays.driver_numbers[:, None],
+            times[None, :],
+        ),
+        track=track,
+    )
+    return buf.getvalue()
@@ -1,51 +1,81 @@
+from app.services.clock_state import LocalClockState
+
+
 class SimulationClock:
-    def __init__(self, phase_resolver=None):
+    def __init__(self, phase_resolver=None, state=None):
         self.phase_resolver = phase_resolver
-        self.current_time_ms = 0
-        self.playing = False
-        self.phase = "PRE_RACE"
+        # Local (per-process) or shared across workers
+        self.state = state or LocalClockState()
+
+    # --------------------------------------------------
+    # State (delegated)
+    # --------------------------------------------------
+    @property
+    def current_time_ms(self) -> int:
+        return self.state.current_time_ms
 
+    @property
+    def playing(self) -> bool:
+        return self.state.playing
+
+    @property
+    def phase(self) -> str:
+        return self.state.phase
+
+    # --------------------------------------------------
+    # Controls
+    # --------------------------------------------------
     def play(self):
-        self.playing = True
+        with self.state.locked():
+            self.state.playing = True
 
     def pause(self):
-        self.playing = False
+        with self.state.locked():
+            self.state.playing = False
 
     def reset(self):
-        self.current_time_ms = 0
-        self.phase = "PRE_RACE"
-        self.playing = False
+        with self.state.locked():
+            self.state.current_time_ms = 0
+            self.state.phase = "PRE_RACE"
+            self.state.playing = False
 
     def seek(self, target_time_ms: int):
-        self.current_time_ms = max(0, target_time_ms)
+        with self.state.locked():
+            self.state.current_time_ms = max(0, target_time_ms)
 
-        if self.phase_resolver:
-            self.phase = self.phase_resolver.resolve_phase(
-                self.current_time_ms
-            )
+            if self.phase_resolver:
+                self.state.phase = self.phase_resolver.resolve_phase(
+                    self.state.current_time_ms
+                )
 
-        self.playing = True
+            self.state.playing = True
 
     def tick(self, delta_ms: int):
-        if not self.playing:
-            return
+        with self.state.locked():
+            if not self.state.playing:
+                return
 
-        self.current_time_ms += delta_ms
+            self.state.current_time_ms += delta_ms
 
-        if self.phase_resolver:
-            self.phase = self.phase_resolver.resolve_phase(
-                self.current_time_ms
-            )
+            if self.phase_resolver:
+                self.state.phase = self.phase_resolver.resolve_phase(
+                    self.state.current_time_ms
+                )
 
     def snapshot(self):
-        total_seconds = self.current_time_ms // 1000
+        with self.state.locked():
+            current_time_ms = self.state.current_time_ms
+            playing = self.state.playing
+            phase = self.state.phase
+
+        total_seconds = current_time_ms // 1000
         h = total_seconds // 3600
         m = (total_seconds % 3600) // 60
         s = total_seconds % 60
 
         return {
-            "current_time_ms": self.current_time_ms,
+            "current_time_ms": current_time_ms,
             "current_time_hms": f"{h:02d}:{m:02d}:{s:02d}",
-            "playing": self.playing,
-            "phase": self.phase,
+            "playing": playing,
+            "phase": phase,
         }
@@ -0,0 +1,6 @@
+from app.core.config import settings
+from app.storage.shared_array_store import SharedArrayStore
+
+# Single global array store
+# In-process unless SHARED_STORE_DIR is set (then mmap'd across workers)
+store = SharedArrayStore(settings.shared_store_dir)
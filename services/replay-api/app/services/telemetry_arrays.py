@@ -0,0 +1,139 @@
+# app/services/telemetry_arrays.py
+
+from typing import Dict, Tuple
+
+import numpy as np
+
+# Timestamps (ms since session start) stay far below this,
+# so driver rank * _KEY_STRIDE + timestamp_ms is a unique sortable key.
+_KEY_STRIDE = np.int64(1 << 40)
+
+
+class TelemetryArrays:
+    """
+    Column arrays sorted by (driver_number, timestamp_ms)
+    plus per-driver offsets.
+
+    Columns are plain numpy arrays or read-only memmaps
+    (shared across workers); nothing here copies them.
+    """
+
+    def __init__(self, columns: Dict[str, np.ndarray]):
+        required = {"driver_number", "timestamp_ms"}
+        missing = required - set(columns)
+        if missing:
+            raise ValueError(f"Missing telemetry columns: {missing}")
+
+        self.columns = columns
+
+        drivers = columns["driver_number"]
+        self.driver_numbers, self.starts = np.unique(
+            drivers,
+            return_index=True,
+        )
+        self.ends = np.append(self.starts[1:], len(drivers))
+
+        if "sort_key" in columns:
+            self.sort_key = columns["sort_key"]
+        else:
+            self.sort_key = build_sort_key(
+                drivers,
+                columns["timestamp_ms"],
+            )
+
+    def __len__(self) -> int:
+        return len(self.columns["timestamp_ms"])
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.columns[name]
+
+    def driver_slice(self, driver_number: int) -> slice:
+        i = np.searchsorted(self.driver_numbers, driver_number)
+        if i >= len(self.driver_numbers) or self.driver_numbers[i] != driver_number:
+            return slice(0, 0)
+        return slice(int(self.starts[i]), int(self.ends[i]))
+
+    def sample_indices(self, time_ms: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Latest sample at or before time_ms for every driver,
+        resolved with a single searchsorted call.
+
+        Returns (driver_numbers, row_indices) for drivers
+        that already have a sample.
+        """
+        ranks = np.arange(len(self.driver_numbers), dtype=np.int64)
+        queries = ranks * _KEY_STRIDE + np.int64(time_ms)
+
+        idx = np.searchsorted(self.sort_key, queries, side="right") - 1
+
+        valid = idx >= self.starts
+        return self.driver_numbers[valid], idx[valid]
+
+    def grid_indices(
+        self,
+        times_ms: np.ndarray,
+        ranks: np.ndarray | None = None,
+    ) -> np.ndarray:
+        """
+        Latest sample at or before each of times_ms, for every driver
+        (or only the driver ranks given), in one searchsorted call over
+        all (driver, time) queries.
+
+        Returns row indices shaped (len(ranks), len(times_ms)),
+        -1 where the driver has no sample yet.
+        """
+        times = np.asarray(times_ms, dtype=np.int64)
+        if ranks is None:
+            ranks = np.arange(len(self.driver_numbers), dtype=np.int64)
+        ranks = np.asarray(ranks, dtype=np.int64)
+        queries = ranks[:, None] * _KEY_STRIDE + times[None, :]
+
+        idx = np.searchsorted(self.sort_key, queries, side="right") - 1
+
+        return np.where(idx >= self.starts[ranks][:, None], idx, -1)
+
+    def range_indices(self, start_ms: int, end_ms: int) -> np.ndarray:
+        """
+        Row indices of every sample with start_ms <= timestamp_ms <= end_ms,
+        grouped by driver.
+        """
+        ranks = np.arange(len(self.driver_numbers), dtype=np.int64)
+        lo = np.searchsorted(
+            self.sort_key,
+            ranks * _KEY_STRIDE + np.int64(start_ms),
+            side="left",
+        )
+        hi = np.searchsorted(
+            self.sort_key,
+            ranks * _KEY_STRIDE + np.int64(end_ms),
+            side="right",
+        )
+
+        if not len(lo):
+            return np.empty(0, dtype=np.int64)
+
+        return np.concatenate(
+            [np.arange(a, b, dtype=np.int64) for a, b in zip(lo, hi)]
+        )
+
+
+def build_sort_key(
+    driver_number: np.ndarray,
+    timestamp_ms: np.ndarray,
+) -> np.ndarray:
+    """
+    Monotonic int64 key for arrays already sorted by
+    (driver_number, timestamp_ms).
+    """
+    _, ranks = np.unique(driver_number, return_inverse=True)
+    return ranks.astype(np.int64) * _KEY_STRIDE + timestamp_ms.astype(np.int64)
+
+
+def sort_columns(columns: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """
+    Sort every column by (driver_number, timestamp_ms) and add sort_key.
+    """
+    order = np.lexsort((columns["timestamp_ms"], columns["driver_number"]))
+    out = {name: np.ascontiguousarray(col[order]) for name, col in columns.items()}
+    out["sort_key"] = build_sort_key(out["driver_number"], out["timestamp_ms"])
+    return out
@@ -0,0 +1,179 @@
+# app/services/telemetry_channel_builder.py
+
+from typing import Dict, Iterable, List
+
+import numpy as np
+
+from app.services.store_registry import store
+from app.services.telemetry_arrays import TelemetryArrays, sort_columns
+from app.storage.parquet_reader import ParquetReader
+
+# Car channels in the curated telemetry_car dataset
+CHANNELS = ("speed", "rpm", "throttle", "brake", "gear", "drs")
+
+# Upper bound on (driver, sample) values returned by one range request
+MAX_RANGE_SAMPLES = 500_000
+
+
+class TelemetryChannelBuilder:
+    """
+    Car telemetry channels (speed, rpm, throttle, brake, gear, drs)
+    per driver_number, on the same sorted-array index as positions.
+
+    Every lookup resolves row indices once (one searchsorted for all
+    drivers) and then gathers any number of channels with them, so
+    extra channels cost a gather, not another search.
+    """
+
+    def __init__(self, curated_bucket: str, season: int, round: int):
+        self.reader = ParquetReader()
+        self.curated_bucket = curated_bucket
+        self.season = season
+        self.round = round
+
+        self.store_key = f"telemetry_car/season={season}/round={round}"
+        version = self.reader.partition_version(
+            bucket=curated_bucket,
+            dataset="telemetry_car",
+            season=season,
+            round=round,
+        )
+        self.arrays = TelemetryArrays(
+            store.get_or_build(self.store_key, self._load_arrays, version)
+        )
+
+    def _load_arrays(self) -> Dict[str, np.ndarray]:
+        table = self.reader.read_partitioned_arrow(
+            bucket=self.curated_bucket,
+            dataset="telemetry_car",
+            season=self.season,
+            round=self.round,
+        )
+
+        required = {"driver_number", "timestamp_ms", *CHANNELS}
+        missing = required - set(table.column_names)
+        if missing:
+            raise ValueError(f"Missing car telemetry columns: {missing}")
+
+        # Keep the compact curated dtypes (uint8 gear / drs, ...)
+        columns = {
+            name: table[name].to_numpy()
+            for name in ("timestamp_ms", *CHANNELS)
+        }
+        columns["driver_number"] = (
+            table["driver_number"].to_numpy().astype(np.int32)
+        )
+
+        return sort_columns(columns)
+
+    @staticmethod
+    def validate_channels(channels: Iterable[str]) -> List[str]:
+        channels = list(channels) or list(CHANNELS)
+        unknown = set(channels) - set(CHANNELS)
+        if unknown:
+            raise ValueError(
+                f"Unknown channels: {sorted(unknown)} (available: {list(CHANNELS)})"
+            )
+        return channels
+
+    def sample(self, time_ms: int, channels: Iterable[str] = ()) -> List[dict]:
+        """
+        Latest value of each channel at or before time_ms, per driver.
+        """
+        channels = self.validate_channels(channels)
+        drivers, idx = self.arrays.sample_indices(time_ms)
+
+        values = {name: self.arrays[name][idx].tolist() for name in channels}
+
+        return [
+            {
+                "driver_number": int(d),
+                **{name: values[name][i] for name in channels},
+            }
+            for i, d in enumerate(drivers)
+        ]
+
+    def range(
+        self,
+        start_ms: int,
+        end_ms: int,
+        channels: Iterable[str] = (),
+        driver_numbers: Iterable[int] | None = None,
+        step_ms: int | None = None,
+    ) -> Dict[int, Dict[str, list]]:
+        """
+        Channels per driver between start_ms and end_ms, column-wise:
+            {driver_number: {"timestamp_ms": [...], channel: [...]}}
+
+        step_ms=None returns every raw sample in the range; otherwise
+        values are time-aligned on start_ms, start_ms + step_ms, ...
+        (latest sample at or before each time, all drivers share the
+        same timestamps).
+        """
+        if end_ms < start_ms:
+            raise ValueError("end_ms must be >= start_ms")
+
+        channels = self.validate_channels(channels)
+        arrays = self.arrays
+
+        rows = np.arange(len(arrays.driver_numbers))
+        if driver_numbers is not None:
+            rows = rows[np.isin(arrays.driver_numbers, list(driver_numbers))]
+
+        if step_ms:
+            # Checked before allocating the grid
+            count = (end_ms - start_ms) // step_ms + 1
+            self._check_size(len(rows) * count)
+            times = np.arange(start_ms, end_ms + 1, step_ms, dtype=np.int64)
+            return self._aligned(times, rows, channels)
+
+        # Raw samples: one time window per selected driver
+        timestamp = arrays["timestamp_ms"]
+        slices = {}
+        for row in rows:
+            lo, hi = int(arrays.starts[row]), int(arrays.ends[row])
+            ts = timestamp[lo:hi]
+            slices[int(arrays.driver_numbers[row])] = slice(
+                lo + int(np.searchsorted(ts, start_ms, side="left")),
+                lo + int(np.searchsorted(ts, end_ms, side="right")),
+            )
+
+        self._check_size(sum(s.stop - s.start for s in slices.values()))
+
+        return {
+            driver: {
+                "timestamp_ms": timestamp[sel].tolist(),
+                **{name: arrays[name][sel].tolist() for name in channels},
+            }
+            for driver, sel in slices.items()
+        }
+
+    def _aligned(
+        self,
+        times: np.ndarray,
+        rows: np.ndarray,
+        channels: List[str],
+    ) -> Dict[int, Dict[str, list]]:
+        grid = self.arrays.grid_indices(times, rows)
+        valid = grid >= 0
+        safe = np.where(valid, grid, 0)
+
+        result = {}
+        for i, row in enumerate(rows):
+            ok = valid[i]
+            result[int(self.arrays.driver_numbers[row])] = {
+                "timestamp_ms": times[ok].tolist(),
+                **{
+                    name: self.arrays[name][safe[i][ok]].tolist()
+                    for name in channels
+                },
+            }
+        return result
+
+    @staticmethod
+    def _check_size(samples: int):
+        if samples > MAX_RANGE_SAMPLES:
+            raise ValueError(
+                f"Range yields {samples} samples (max {MAX_RANGE_SAMPLES}); "
+                f"narrow the range, pick drivers or set step_ms"
+            )
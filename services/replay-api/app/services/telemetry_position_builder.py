@@ -1,27 +1,143 @@
 # app/services/telemetry_position_builder.py
 
-from bisect import bisect_right
-from typing import Dict, List
+import hashlib
+from typing import Dict, List, Tuple
 
-import pandas as pd
+import numpy as np
 
+from app.services.metadata_loader import MISSING_MS
+from app.services.store_registry import store
+from app.services.telemetry_arrays import TelemetryArrays, sort_columns
+from app.services.telemetry_window import TelemetryWindow
+from app.services.track_projection import (
+    CenterlineIndex,
+    progress_from_laps,
+    unwrap_progress,
+)
 from app.storage.parquet_reader import ParquetReader
 
+# Columns read per chunk in windowed mode
+WINDOW_COLUMNS = ("driver_number", "timestamp_ms", "x", "y", "cum_distance")
+
 
 class TelemetryPositionBuilder:
     """
     Provides (x, y, distance) per driver_number for a given replay time.
-    Distance = cumulative telemetry distance (meters).
+
+    With a track centerline, every sample is projected onto it at load
+    time and distance = race progress along the track (laps * lap length
+    + distance along the lap). Without one, distance falls back to
+    cumulative telemetry distance (meters).
+
+    Arrays are built once per race and shared read-only
+    across worker processes (see SharedArrayStore).
+
+    windowed=True instead keeps only a sliding window of time chunks
+    around each playhead (see TelemetryWindow): the first frame costs
+    one chunk read whatever the race length, and memory is bounded.
+    Progress then needs lap timing (laps) to count completed laps;
+    without it distance is the curated cumulative distance.
     """
 
-    def __init__(self, curated_bucket: str, season: int, round: int):
+    def __init__(
+        self,
+        curated_bucket: str,
+        season: int,
+        round: int,
+        centerline: List[Tuple[float, float]] | None = None,
+        laps: Dict[str, np.ndarray] | None = None,
+        windowed: bool = False,
+    ):
         self.reader = ParquetReader()
-        self.df = self._load(curated_bucket, season, round)
+        self.curated_bucket = curated_bucket
+        self.season = season
+        self.round = round
+        self.windowed = windowed
 
-        self.by_driver: Dict[int, pd.DataFrame] = {}
-        self._index_and_compute_distance()
+        self.track = CenterlineIndex(centerline) if centerline else None
 
-    def _load(self, bucket: str, season: int, round: int) -> pd.DataFrame:
+        # Median time between a driver's samples (see sample_interval_ms)
+        self._sample_interval_ms: int | None = None
+        # Source data version of the shared arrays (see data_version)
+        self._data_version: str | None = None
+        self._centerline = centerline
+
+        self.store_key = f"telemetry_positions/season={season}/round={round}"
+        if self.track:
+            self.store_key += "/projected"
+
+        if windowed:
+            self._init_window(laps)
+            return
+
+        self.arrays = TelemetryArrays(
+            store.get_or_build(self.store_key, self._load_arrays, self.data_version())
+        )
+        self.projected = "progress" in self.arrays.columns
+        self.distance_column = "progress" if self.projected else "cum_distance"
+
+        # Zero-copy per-driver views into the shared arrays
+        self.by_driver: Dict[int, Dict[str, np.ndarray]] = {
+            int(d): {
+                name: col[self.arrays.driver_slice(d)]
+                for name, col in self.arrays.columns.items()
+            }
+            for d in self.arrays.driver_numbers
+        }
+
+    def _init_window(self, laps: Dict[str, np.ndarray] | None):
+        self.laps = None
+        if self.track and laps is not None:
+            known = laps["lap_start_time_ms"] != MISSING_MS
+            self.laps = {name: col[known] for name, col in laps.items()}
+
+        self.projected = self.laps is not None
+        self.distance_column = "progress" if self.projected else "cum_distance"
+
+        self.arrays = None
+        self.by_driver = {}
+        self.window = TelemetryWindow(self._load_chunk)
+
+    def _load_chunk(self, start_ms: int, end_ms: int) -> Dict[str, np.ndarray]:
+        """
+        One time chunk, sorted by (driver_number, timestamp_ms).
+        Distance must be absolute, so cum_distance comes from the
+        curated layer (a chunk cannot compute it from race start).
+        """
+        table = self.reader.read_time_range(
+            bucket=self.curated_bucket,
+            dataset="telemetry_positions",
+            season=self.season,
+            round=self.round,
+            start_ms=start_ms,
+            end_ms=end_ms,
+            columns=WINDOW_COLUMNS,
+        )
+
+        columns = sort_columns({
+            "driver_number": table["driver_number"].to_numpy().astype(np.int32),
+            "timestamp_ms": table["timestamp_ms"].to_numpy().astype(np.int64),
+            "x": table["x"].to_numpy().astype(np.float64),
+            "y": table["y"].to_numpy().astype(np.float64),
+            "cum_distance": table["cum_distance"].to_numpy().astype(np.float64),
+        })
+
+        if self.projected:
+            lap_distance, _ = self.track.project(columns["x"], columns["y"])
+            self._set_progress(
+                columns,
+                progress_from_laps(
+                    lap_distance,
+                    columns["driver_number"],
+                    columns["timestamp_ms"],
+                    self.track.length,
+                    self.laps,
+                ),
+            )
+
+        return columns
+
+    def _load(self, bucket: str, season: int, round: int):
         df = self.reader.read_partitioned_table(
             bucket=bucket,
             dataset="telemetry_positions",
@@ -36,49 +152,169 @@ class TelemetryPositionBuilder:
 
         return df
 
-    def _index_and_compute_distance(self):
+    def _load_arrays(self) -> Dict[str, np.ndarray]:
+        """
+        Load telemetry, sort by (driver_number, timestamp_ms)
+        and compute cumulative distance per driver (unless the
+        curated layer already carries it).
+        """
+        df = self._load(self.curated_bucket, self.season, self.round)
+
+        columns = {
+            "driver_number": df["driver_number"].to_numpy().astype(np.int32),
+            "timestamp_ms": df["timestamp_ms"].to_numpy().astype(np.int64),
+            "x": df["x"].to_numpy(dtype=np.float64),
+            "y": df["y"].to_numpy(dtype=np.float64),
+        }
+
+        # Precomputed by the raw -> curated transform when available
+        if "cum_distance" in df.columns:
+            columns["cum_distance"] = df["cum_distance"].to_numpy(dtype=np.float64)
+
+        columns = sort_columns(columns)
+
+        if "cum_distance" not in columns:
+            columns["cum_distance"] = self._cumulative_distance(columns)
+
+        if self.track:
+            self._project(columns)
+
+        return columns
+
+    def _project(self, columns: Dict[str, np.ndarray]):
         """
-        Pre-index telemetry and compute cumulative distance per driver.
+        Project every sample onto the centerline (vectorized) and
+        derive (lap, lap_distance, progress).
         """
-        for driver_number, group in self.df.groupby("driver_number"):
-            group = group.sort_values("timestamp_ms").reset_index(drop=True)
+        lap_distance, _ = self.track.project(columns["x"], columns["y"])
+
+        self._set_progress(
+            columns,
+            unwrap_progress(
+                lap_distance,
+                columns["driver_number"],
+                columns["timestamp_ms"],
+                self.track.length,
+            ),
+        )
+
+    def _set_progress(self, columns: Dict[str, np.ndarray], progress: np.ndarray):
+        lap = np.floor(progress / self.track.length)
 
-            dx = group["x"].diff()
-            dy = group["y"].diff()
-            dist = (dx ** 2 + dy ** 2).pow(0.5).fillna(0)
+        columns["progress"] = progress
+        columns["lap"] = lap.astype(np.int32)
+        columns["lap_distance"] = progress - lap * self.track.length
 
-            group["cum_distance"] = dist.cumsum()
+    @staticmethod
+    def _cumulative_distance(columns: Dict[str, np.ndarray]) -> np.ndarray:
+        """
+        Vectorized cumulative distance, restarting at each driver.
+        """
+        step = np.hypot(np.diff(columns["x"]), np.diff(columns["y"]))
+        step = np.concatenate(([0.0], step))
 
-            self.by_driver[int(driver_number)] = group
+        # No distance across driver boundaries
+        new_driver = np.diff(columns["driver_number"], prepend=-1) != 0
+        step[new_driver] = 0.0
+
+        cum = np.cumsum(step)
+        _, starts = np.unique(columns["driver_number"], return_index=True)
+        offsets = np.repeat(cum[starts], np.diff(np.append(starts, len(cum))))
+
+        return cum - offsets
+
+    def full_arrays(self) -> TelemetryArrays:
+        """
+        Whole-race arrays; windowed mode loads them on demand
+        (whole-race exports only, not per frame).
+        """
+        if self.arrays is not None:
+            return self.arrays
+        return TelemetryArrays(
+            store.get_or_build(self.store_key, self._load_arrays, self.data_version())
+        )
+
+    def data_version(self) -> str:
+        """
+        Version of the curated telemetry (and centerline, when
+        projected) the shared arrays are built from, so a re-curated
+        race is rebuilt instead of served from a stale store entry.
+        """
+        if self._data_version is None:
+            version = self.reader.partition_version(
+                bucket=self.curated_bucket,
+                dataset="telemetry_positions",
+                season=self.season,
+                round=self.round,
+            )
+            if self.track:
+                centerline = np.asarray(self._centerline, dtype=np.float64)
+                version += "-" + hashlib.sha256(centerline.tobytes()).hexdigest()[:16]
+            self._data_version = version
+
+        return self._data_version
+
+    def arrays_at(self, time_ms: int) -> TelemetryArrays:
+        if self.windowed:
+            return self.window.view_at(time_ms)
+        return self.arrays
+
+    def sample_interval_ms(self, time_ms: int = 0) -> int:
+        """
+        Typical time between two samples of one driver at full rate
+        (median), measured once per race; windowed mode measures it on
+        the view around time_ms. Clients use it to avoid requesting
+        frames closer together than the data changes.
+        """
+        if self._sample_interval_ms is None:
+            arrays = self.window.view_at(time_ms) if self.windowed else self.arrays
+            same_driver = np.diff(arrays["driver_number"]) == 0
+            gaps = np.diff(arrays["timestamp_ms"])[same_driver]
+            if not len(gaps):
+                return 0
+            self._sample_interval_ms = int(np.median(gaps))
+
+        return self._sample_interval_ms
 
     def build(self, time_ms: int) -> List[dict]:
         """
+        Latest full-rate sample per driver at or before time_ms.
+
         Returns list of:
         {
             driver_number,
             x,
             y,
-            distance
+            distance,
+            lap,            (projected only)
+            lap_distance    (projected only)
         }
         """
-        states = []
+        arrays = self.arrays_at(time_ms)
+        drivers, idx = arrays.sample_indices(time_ms)
 
-        for driver_number, df in self.by_driver.items():
-            ts = df["timestamp_ms"].values
-            idx = bisect_right(ts, time_ms) - 1
+        x = arrays["x"][idx]
+        y = arrays["y"][idx]
+        distance = arrays[self.distance_column][idx]
 
-            if idx < 0:
-                continue
+        if self.projected:
+            lap = arrays["lap"][idx]
+            lap_distance = arrays["lap_distance"][idx]
 
-            row = df.iloc[idx]
+        states = []
 
-            states.append({
-                "driver_number": driver_number,
-                "x": float(row["x"]),
-                "y": float(row["y"]),
-                "distance": float(row["cum_distance"]),
-            })
+        for i in range(len(idx)):
+            state = {
+                "driver_number": int(drivers[i]),
+                "x": float(x[i]),
+                "y": float(y[i]),
+                "distance": float(distance[i]),
+            }
 
-        return states
+            if self.projected:
+                state["lap"] = int(lap[i])
+                state["lap_distance"] = float(lap_distance[i])
+
+            states.append(state)
 
-    
\ No newline at end of file
+        return states
@@ -0,0 +1,157 @@
+# app/services/telemetry_window.py
+
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, List
+
+import numpy as np
+
+from app.services.telemetry_arrays import TelemetryArrays, sort_columns
+
+# Chunk length; matches the curated telemetry row-group window,
+# so one chunk is one row group read
+CHUNK_MS = 60_000
+
+# Chunks kept behind the playhead (history for "latest sample at or
+# before" lookups and gaps) and prefetched ahead of it
+CHUNKS_BEHIND = 2
+CHUNKS_AHEAD = 3
+
+# Hard cap on resident chunks per race, across all playheads
+MAX_RESIDENT_CHUNKS = 16
+
+# Merged (behind + current) views kept per race
+MAX_VIEWS = 4
+
+PREFETCH_WORKERS = 2
+
+ChunkLoader = Callable[[int, int], Dict[str, np.ndarray]]
+
+
+class TelemetryWindow:
+    """
+    A race's telemetry as lazily loaded time chunks
+    [i * chunk_ms, (i + 1) * chunk_ms), instead of one load of the
+    whole race.
+
+    view_at(time_ms) returns TelemetryArrays covering the playhead's
+    chunk plus CHUNKS_BEHIND chunks of history, loading only what is
+    missing, and schedules the next CHUNKS_AHEAD chunks in the
+    background. Resident chunks are evicted least-recently-used
+    beyond MAX_RESIDENT_CHUNKS, so memory is bounded by the window,
+    not the race length. Several playheads (clock, range requests)
+    can share one window; each keeps its own chunks warm.
+    """
+
+    def __init__(
+        self,
+        load_chunk: ChunkLoader,
+        chunk_ms: int = CHUNK_MS,
+        behind: int = CHUNKS_BEHIND,
+        ahead: int = CHUNKS_AHEAD,
+        max_chunks: int = MAX_RESIDENT_CHUNKS,
+    ):
+        if max_chunks < behind + ahead + 1:
+            raise ValueError("max_chunks must hold at least one full window")
+
+        self.load_chunk = load_chunk
+        self.chunk_ms = chunk_ms
+        self.behind = behind
+        self.ahead = ahead
+        self.max_chunks = max_chunks
+
+        self._lock = threading.Lock()
+        self._chunks: "OrderedDict[int, Dict[str, np.ndarray]]" = OrderedDict()
+        self._pending: Dict[int, Future] = {}
+        self._views: "OrderedDict[int, TelemetryArrays]" = OrderedDict()
+        self._pool = ThreadPoolExecutor(
+            max_workers=PREFETCH_WORKERS,
+            thread_name_prefix="telemetry-prefetch",
+        )
+
+    def chunk_index(self, time_ms: int) -> int:
+        return int(time_ms) // self.chunk_ms
+
+    def view_at(self, time_ms: int) -> TelemetryArrays:
+        """
+        Arrays for [start of chunk - behind, end of chunk), sorted by
+        (driver_number, timestamp_ms).
+        """
+        index = self.chunk_index(time_ms)
+        self.prefetch(range(index + 1, index + self.ahead + 1))
+
+        with self._lock:
+            view = self._views.get(index)
+            if view is not None:
+                self._views.move_to_end(index)
+                for i in self._window(index):
+                    if i in self._chunks:
+                        self._chunks.move_to_end(i)
+                return view
+
+        # Missing chunks load in parallel (first frame = one round trip)
+        futures = [self._submit(i) for i in self._window(index)]
+        view = TelemetryArrays(_merge([f.result() for f in futures]))
+
+        with self._lock:
+            self._views[index] = view
+            while len(self._views) > MAX_VIEWS:
+                self._views.popitem(last=False)
+
+        return view
+
+    def prefetch(self, indices) -> None:
+        for i in indices:
+            if i >= 0:
+                self._submit(i)
+
+    def resident_chunks(self) -> List[int]:
+        with self._lock:
+            return sorted(self._chunks)
+
+    def _window(self, index: int) -> List[int]:
+        return [i for i in range(index - self.behind, index + 1) if i >= 0]
+
+    def _submit(self, index: int) -> Future:
+        with self._lock:
+            if index in self._chunks:
+                self._chunks.move_to_end(index)
+                done: Future = Future()
+                done.set_result(self._chunks[index])
+                return done
+
+            future = self._pending.get(index)
+            if future is None:
+                future = self._pool.submit(self._load, index)
+                self._pending[index] = future
+            return future
+
+    def _load(self, index: int) -> Dict[str, np.ndarray]:
+        start = index * self.chunk_ms
+        try:
+            columns = self.load_chunk(start, start + self.chunk_ms - 1)
+        except Exception:
+            # Not cached: the next request for this chunk retries
+            with self._lock:
+                self._pending.pop(index, None)
+            raise
+
+        with self._lock:
+            self._pending.pop(index, None)
+            self._chunks[index] = columns
+            while len(self._chunks) > self.max_chunks:
+                self._chunks.popitem(last=False)
+
+        return columns
+
+
+def _merge(chunks: List[Dict[str, np.ndarray]]) -> Dict[str, np.ndarray]:
+    """
+    Concatenate chunks (each sorted by driver, time) and re-sort.
+    """
+    names = [n for n in chunks[0] if n != "sort_key"]
+    return sort_columns({
+        name: np.concatenate([chunk[name] for chunk in chunks])
+        for name in names
+    })
@@ -0,0 +1,316 @@
+# app/services/track_projection.py
+
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+# Samples projected per vectorized batch (bounds temporary memory)
+_CHUNK = 16_384
+# Points per batch when testing every segment (fallback path)
+_FALLBACK_CHUNK = 256
+# Longest run of consecutive samples treated as a projection glitch
+_MAX_GLITCH_RUN = 3
+
+
+class CenterlineIndex:
+    """
+    Spatial index over a closed track centerline.
+
+    Uniform grid of cells; each cell lists every segment within
+    search_radius of it. Projection of a point only tests the
+    candidate segments of its cell, falling back to all segments
+    for points outside the indexed area.
+
+    Arc length is precomputed per segment, so a projection maps
+    (x, y) -> distance along the lap in [0, length).
+    """
+
+    def __init__(
+        self,
+        points: List[Tuple[float, float]],
+        search_radius: float | None = None,
+    ):
+        pts = np.asarray(points, dtype=np.float64)
+        if len(pts) < 3:
+            raise ValueError("Centerline needs at least 3 points")
+
+        # Closed loop: segment i runs from point i to point i + 1 (mod n)
+        start = pts
+        end = np.roll(pts, -1, axis=0)
+        vec = end - start
+        seg_len = np.hypot(vec[:, 0], vec[:, 1])
+
+        keep = seg_len > 0
+        self.seg_start = start[keep]
+        self.seg_vec = vec[keep]
+        self.seg_len = seg_len[keep]
+        self.arc_start = np.concatenate(([0.0], np.cumsum(self.seg_len)[:-1]))
+        self.length = float(self.seg_len.sum())
+
+        self.search_radius = (
+            search_radius
+            if search_radius is not None
+            else self.length / 100
+        )
+
+        self._build_grid()
+
+    # --------------------------------------------------
+    # Grid
+    # --------------------------------------------------
+    def _build_grid(self):
+        r = self.search_radius
+        self.cell_size = r
+
+        seg_end = self.seg_start + self.seg_vec
+        lo = np.minimum(self.seg_start, seg_end) - r
+        hi = np.maximum(self.seg_start, seg_end) + r
+
+        self.origin = lo.min(axis=0)
+        cell_lo = np.floor((lo - self.origin) / r).astype(np.int64)
+        cell_hi = np.floor((hi - self.origin) / r).astype(np.int64)
+
+        self.shape = tuple(int(v) + 1 for v in cell_hi.max(axis=0))
+
+        buckets: Dict[int, list] = {}
+        for seg, (cl, ch) in enumerate(zip(cell_lo, cell_hi)):
+            for cx in range(cl[0], ch[0] + 1):
+                for cy in range(cl[1], ch[1] + 1):
+                    buckets.setdefault(cx * self.shape[1] + cy, []).append(seg)
+
+        width = max(len(v) for v in buckets.values())
+        cells = np.full((self.shape[0] * self.shape[1], width), -1, dtype=np.int64)
+        for cell, segs in buckets.items():
+            cells[cell, : len(segs)] = segs
+
+        self.cells = cells
+
+    def _cell_ids(self, xy: np.ndarray) -> np.ndarray:
+        c = np.floor((xy - self.origin) / self.cell_size).astype(np.int64)
+        inside = (
+            (c[:, 0] >= 0) & (c[:, 0] < self.shape[0])
+            & (c[:, 1] >= 0) & (c[:, 1] < self.shape[1])
+        )
+        ids = c[:, 0] * self.shape[1] + c[:, 1]
+        return np.where(inside, ids, -1)
+
+    # --------------------------------------------------
+    # Projection
+    # --------------------------------------------------
+    def project(self, x: np.ndarray, y: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Vectorized projection of points onto the centerline.
+
+        Returns (lap_distance, offset):
+        - lap_distance: arc length of the closest point, [0, length)
+        - offset: distance from the centerline
+        """
+        xy = np.column_stack((x, y)).astype(np.float64)
+        lap_distance = np.empty(len(xy))
+        offset = np.empty(len(xy))
+
+        for lo in range(0, len(xy), _CHUNK):
+            chunk = xy[lo: lo + _CHUNK]
+            d, o = self._project_chunk(chunk)
+            lap_distance[lo: lo + _CHUNK] = d
+            offset[lo: lo + _CHUNK] = o
+
+        return lap_distance, offset
+
+    def _project_chunk(self, xy: np.ndarray):
+        cell = self._cell_ids(xy)
+        candidates = np.where(
+            (cell >= 0)[:, None],
+            self.cells[np.maximum(cell, 0)],
+            -1,
+        )
+
+        d, o = self._nearest(xy, candidates)
+
+        # Outside the grid / no nearby segment: test every segment
+        lost = np.flatnonzero(~np.isfinite(o))
+        for lo in range(0, len(lost), _FALLBACK_CHUNK):
+            idx = lost[lo: lo + _FALLBACK_CHUNK]
+            everything = np.broadcast_to(
+                np.arange(len(self.seg_len)),
+                (len(idx), len(self.seg_len)),
+            )
+            d[idx], o[idx] = self._nearest(xy[idx], everything)
+
+        return d, o
+
+    def _nearest(self, xy: np.ndarray, candidates: np.ndarray):
+        valid = candidates >= 0
+        seg = np.where(valid, candidates, 0)
+
+        start = self.seg_start[seg]                     # (n, k, 2)
+        vec = self.seg_vec[seg]
+        rel = xy[:, None, :] - start
+
+        t = (rel * vec).sum(axis=2) / self.seg_len[seg] ** 2
+        t = np.clip(t, 0.0, 1.0)
+
+        foot = start + vec * t[..., None]
+        dist = np.hypot(*(xy[:, None, :] - foot).transpose(2, 0, 1))
+        dist = np.where(valid, dist, np.inf)
+
+        best = dist.argmin(axis=1)
+        rows = np.arange(len(xy))
+        best_seg = seg[rows, best]
+
+        lap_distance = (
+            self.arc_start[best_seg]
+            + t[rows, best] * self.seg_len[best_seg]
+        )
+        return lap_distance, dist[rows, best]
+
+
+def unwrap_progress(
+    lap_distance: np.ndarray,
+    driver_number: np.ndarray,
+    timestamp_ms: np.ndarray,
+    length: float,
+    jump_tolerance: float | None = None,
+) -> np.ndarray:
+    """
+    Turn per-sample lap distance into continuous race progress
+    (laps * length + lap_distance) for arrays sorted by
+    (driver_number, timestamp_ms).
+
+    - Short runs of samples that jump away along the track and come
+      straight back (projection onto the wrong branch at a bridge or
+      crossover) are dropped and re-interpolated over time.
+    - Between the remaining samples, a jump of more than half a lap
+      is a start/finish crossing.
+    - Cars first seen behind the line (second half of the lap)
+      start at negative progress, so the grid is level.
+    """
+    if jump_tolerance is None:
+        jump_tolerance = length * 0.05
+
+    n = len(lap_distance)
+    if n == 0:
+        return np.zeros(0)
+
+    def wrapped(delta):
+        return (delta + length / 2) % length - length / 2
+
+    # --------------------------------------------------
+    # Glitch runs: jump away at i, back next to i - 1 at i + k
+    # --------------------------------------------------
+    glitch = np.zeros(n, dtype=bool)
+    jump = np.zeros(n, dtype=bool)
+    jump[1:] = (
+        (np.abs(wrapped(np.diff(lap_distance))) > jump_tolerance)
+        & (driver_number[1:] == driver_number[:-1])
+    )
+
+    for k in range(1, _MAX_GLITCH_RUN + 1):
+        i = np.flatnonzero(jump[1: n - k]) + 1
+        back = (
+            (np.abs(wrapped(lap_distance[i + k] - lap_distance[i - 1])) <= jump_tolerance)
+            & (driver_number[i + k] == driver_number[i - 1])
+        )
+        for j in range(k):
+            glitch[i[back] + j] = True
+
+    # --------------------------------------------------
+    # Unwrap the trusted samples
+    # --------------------------------------------------
+    good = np.flatnonzero(~glitch)
+    d = lap_distance[good]
+    drv = driver_number[good]
+
+    new_driver = np.diff(drv, prepend=drv[:1] - 1) != 0
+
+    step = np.diff(d, prepend=0.0)
+    wraps = np.where(step < -length / 2, 1.0, 0.0) - np.where(step > length / 2, 1.0, 0.0)
+    wraps[new_driver] = np.where(d[new_driver] > length / 2, -1.0, 0.0)
+
+    # Lap count restarts per driver
+    cum_wraps = np.cumsum(wraps)
+    starts = np.flatnonzero(new_driver)
+    base = np.repeat(
+        cum_wraps[starts] - wraps[starts],
+        np.diff(np.append(starts, len(cum_wraps))),
+    )
+
+    progress = np.empty(n)
+    progress[good] = d + (cum_wraps - base) * length
+
+    # --------------------------------------------------
+    # Re-interpolate glitches from trusted neighbours
+    # --------------------------------------------------
+    bad = np.flatnonzero(glitch)
+    if len(bad):
+        # Offset each driver onto its own stretch of the time axis
+        # so interpolation never mixes drivers
+        _, rank = np.unique(driver_number, return_inverse=True)
+        t0 = timestamp_ms.min()
+        span = float(timestamp_ms.max() - t0 + 1)
+        t = rank * span + (timestamp_ms - t0)
+        progress[bad] = np.interp(t[bad], t[good], progress[good])
+
+    return progress
+
+
+def progress_from_laps(
+    lap_distance: np.ndarray,
+    driver_number: np.ndarray,
+    timestamp_ms: np.ndarray,
+    length: float,
+    laps: Dict[str, np.ndarray],
+) -> np.ndarray:
+    """
+    Race progress for samples that do not start at the beginning of
+    the race (a time window), where unwrap_progress cannot count
+    start/finish crossings.
+
+    Completed laps come from lap timing instead: the lap a sample
+    falls in is the driver's last lap started at or before it. Its
+    lap_distance is then shifted by whole laps to agree with the
+    fraction of the lap's duration already elapsed, which absorbs the
+    offset between the timing line and the centerline origin.
+
+    laps: driver_number, lap_number, lap_start_time_ms and
+    lap_finish_time_ms arrays, only laps with a known start.
+    Drivers without any lap timing keep the plain lap distance.
+    """
+    progress = np.asarray(lap_distance, dtype=np.float64).copy()
+
+    lap_driver = laps["driver_number"]
+    durations = laps["lap_finish_time_ms"] - laps["lap_start_time_ms"]
+    typical = float(np.median(durations[durations > 0])) if np.any(durations > 0) else 0.0
+
+    for driver in np.unique(driver_number):
+        rows = np.flatnonzero(driver_number == driver)
+        mine = np.flatnonzero(lap_driver == driver)
+        if not len(mine) or typical <= 0:
+            continue
+
+        order = mine[np.argsort(laps["lap_start_time_ms"][mine], kind="stable")]
+        starts = laps["lap_start_time_ms"][order].astype(np.float64)
+        numbers = laps["lap_number"][order].astype(np.float64)
+        finish = laps["lap_finish_time_ms"][order].astype(np.float64)
+        ends = np.where(finish > starts, finish, starts + typical)
+
+        ts = timestamp_ms[rows].astype(np.float64)
+        i = np.searchsorted(starts, ts, side="right") - 1
+        before = i < 0
+        i = np.maximum(i, 0)
+
+        # Before the first known start: end of the lap before it
+        # (the grid, ahead of lap 1, gets negative progress)
+        completed = numbers[i] - np.where(before, 2.0, 1.0)
+        fraction = np.where(
+            before,
+            1.0 - (starts[0] - ts) / typical,
+            (ts - starts[i]) / (ends[i] - starts[i]),
+        )
+        elapsed = np.clip(fraction, 0.0, 1.0) * length
+
+        d = progress[rows]
+        d += np.round((elapsed - d) / length) * length
+        progress[rows] = completed * length + d
+
+    return progress
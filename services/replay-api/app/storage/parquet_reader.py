@@ -1,7 +1,17 @@
+import hashlib
+import json
+from typing import Dict, List, Sequence
+
+import pyarrow as pa
 import pyarrow.dataset as ds
 import pyarrow.fs as fs
+import pyarrow.parquet as pq
 import pandas as pd
 
+# Sidecar written next to time-windowed curated telemetry:
+# {"row_groups": [{"file", "row_group", "min_timestamp_ms", "max_timestamp_ms", ...}]}
+TIME_INDEX_NAME = "_index.json"
+
 
 class S3PartitionNotFound(Exception):
     pass
@@ -10,6 +20,8 @@ class S3PartitionNotFound(Exception):
 class ParquetReader:
     def __init__(self):
         self.s3 = fs.S3FileSystem()
+        # Time indexes per partition path (immutable once written)
+        self._time_indexes: Dict[str, dict | None] = {}
 
     def _assert_prefix_exists(self, bucket: str, prefix: str):
         """
@@ -33,30 +45,104 @@ class ParquetReader:
                 f"S3 prefix does not exist: s3://{bucket}/{prefix}"
             )
 
-    def read_partitioned_table(
+    def _partition_path(
+        self,
+        bucket: str,
+        dataset: str,
+        season: int,
+        round: int | None,
+    ) -> str:
+        """
+        Validate the season / round partitions and return the
+        bucket-qualified path to read.
+        """
+        season_prefix = f"{dataset}/season={season}"
+        self._assert_prefix_exists(bucket, season_prefix)
+
+        if round is None:
+            return f"{bucket}/{season_prefix}"
+
+        round_prefix = f"{season_prefix}/round={round}"
+        self._assert_prefix_exists(bucket, round_prefix)
+        return f"{bucket}/{round_prefix}"
+
+    def list_partitions(self, *, bucket: str, dataset: str) -> List[dict]:
+        """
+        One entry per season / round partition of a curated dataset:
+        {"season", "round", "bytes", "files"}, from a single recursive
+        listing (no parquet is opened). Sorted by (season, round).
+        """
+        selector = fs.FileSelector(
+            base_dir=f"{bucket}/{dataset}",
+            allow_not_found=True,
+            recursive=True,
+        )
+
+        partitions: Dict[tuple, dict] = {}
+        for info in self.s3.get_file_info(selector):
+            if info.type != fs.FileType.File or not info.path.endswith(".parquet"):
+                continue
+
+            keys = dict(
+                part.split("=", 1)
+                for part in info.path.split("/")
+                if "=" in part
+            )
+            try:
+                season, round = int(keys["season"]), int(keys["round"])
+            except (KeyError, ValueError):
+                continue
+
+            entry = partitions.setdefault(
+                (season, round),
+                {"season": season, "round": round, "bytes": 0, "files": 0},
+            )
+            entry["bytes"] += info.size or 0
+            entry["files"] += 1
+
+        return [partitions[key] for key in sorted(partitions)]
+
+    def partition_version(
+        self,
+        *,
+        bucket: str,
+        dataset: str,
+        season: int,
+        round: int,
+    ) -> str:
+        """
+        Hash of every object in a season / round partition (path,
+        size, last-modified), from one listing: changes whenever the
+        partition is re-curated, so derived data can be keyed on it.
+        """
+        path = self._partition_path(bucket, dataset, season, round)
+        selector = fs.FileSelector(base_dir=path, recursive=True)
+
+        digest = hashlib.sha256()
+        for info in sorted(self.s3.get_file_info(selector), key=lambda i: i.path):
+            if info.type != fs.FileType.File:
+                continue
+            digest.update(f"{info.path}:{info.size}:{info.mtime_ns}\n".encode())
+
+        return digest.hexdigest()[:16]
+
+    def read_partitioned_arrow(
         self,
         *,
         bucket: str,
         dataset: str,
         season: int,
         round: int | None = None,
-    ) -> pd.DataFrame:
+    ) -> pa.Table:
         """
-        Reads curated parquet data scoped by season / round.
+        Reads curated parquet data scoped by season / round,
+        as an Arrow table (column types preserved).
         """
 
         # ----------------------------
         # Validate partitions
         # ----------------------------
-        season_prefix = f"{dataset}/season={season}"
-        self._assert_prefix_exists(bucket, season_prefix)
-
-        if round is not None:
-            round_prefix = f"{season_prefix}/round={round}"
-            self._assert_prefix_exists(bucket, round_prefix)
-            path = f"{bucket}/{round_prefix}"
-        else:
-            path = f"{bucket}/{season_prefix}"
+        path = self._partition_path(bucket, dataset, season, round)
 
         # ----------------------------
         # Read parquet dataset
@@ -74,4 +160,113 @@ class ParquetReader:
                 f"No parquet data found at s3://{path}"
             )
 
-        return table.to_pandas()
+        return table
+
+    def read_time_range(
+        self,
+        *,
+        bucket: str,
+        dataset: str,
+        season: int,
+        round: int,
+        start_ms: int,
+        end_ms: int,
+        columns: Sequence[str] | None = None,
+    ) -> pa.Table:
+        """
+        Rows with start_ms <= timestamp_ms <= end_ms from a curated
+        telemetry partition, reading only the row groups whose time
+        range overlaps the request.
+
+        Row groups are picked from the partition's _index.json when it
+        exists; otherwise Arrow prunes them with the Parquet min / max
+        statistics on timestamp_ms. May return an empty table.
+        """
+        if end_ms < start_ms:
+            raise ValueError("end_ms must be >= start_ms")
+
+        path = self._partition_path(bucket, dataset, season, round)
+        columns = list(columns) if columns is not None else None
+
+        time_filter = (
+            (ds.field("timestamp_ms") >= start_ms)
+            & (ds.field("timestamp_ms") <= end_ms)
+        )
+
+        index = self._read_time_index(path)
+        if index is None:
+            return ds.dataset(
+                path,
+                filesystem=self.s3,
+                format="parquet",
+            ).to_table(columns=columns, filter=time_filter)
+
+        row_groups: Dict[str, List[int]] = {}
+        for entry in index["row_groups"]:
+            if entry["max_timestamp_ms"] < start_ms:
+                continue
+            if entry["min_timestamp_ms"] > end_ms:
+                continue
+            row_groups.setdefault(entry["file"], []).append(entry["row_group"])
+
+        if not row_groups:
+            if not index["row_groups"]:
+                raise FileNotFoundError(f"No parquet data found at s3://{path}")
+
+            # Nothing overlaps: same columns, no rows
+            schema = pq.read_schema(
+                f"{path}/{index['row_groups'][0]['file']}",
+                filesystem=self.s3,
+            )
+            if columns is not None:
+                schema = pa.schema([schema.field(name) for name in columns])
+            return schema.empty_table()
+
+        parquet_format = ds.ParquetFileFormat()
+        fragments = [
+            parquet_format.make_fragment(
+                f"{path}/{file_name}",
+                filesystem=self.s3,
+                row_groups=groups,
+            )
+            for file_name, groups in sorted(row_groups.items())
+        ]
+
+        return ds.FileSystemDataset(
+            fragments,
+            schema=fragments[0].physical_schema,
+            format=parquet_format,
+            filesystem=self.s3,
+        ).to_table(columns=columns, filter=time_filter)
+
+    def _read_time_index(self, path: str) -> dict | None:
+        if path in self._time_indexes:
+            return self._time_indexes[path]
+
+        try:
+            with self.s3.open_input_stream(f"{path}/{TIME_INDEX_NAME}") as f:
+                index = json.loads(f.read())
+        except OSError:
+            # No sidecar (older layout): fall back to statistics
+            index = None
+
+        self._time_indexes[path] = index
+        return index
+
+    def read_partitioned_table(
+        self,
+        *,
+        bucket: str,
+        dataset: str,
+        season: int,
+        round: int | None = None,
+    ) -> pd.DataFrame:
+        """
+        Reads curated parquet data scoped by season / round.
+        """
+        return self.read_partitioned_arrow(
+            bucket=bucket,
+            dataset=dataset,
+            season=season,
+            round=round,
+        ).to_pandas()
@@ -0,0 +1,124 @@
+import fcntl
+import os
+import shutil
+from contextlib import contextmanager
+from typing import Callable, Dict
+
+import numpy as np
+
+# Bump when the on-disk array layout changes
+STORE_VERSION = 1
+
+_READY_MARKER = "_READY"
+
+
+class SharedArrayStore:
+    """
+    Read-only numpy arrays shared across worker processes.
+
+    The first worker to request a key builds the arrays under an
+    exclusive file lock and writes them as .npy files; every worker
+    (including the builder) then memory-maps the same files, so the
+    page cache holds ONE copy no matter how many workers run.
+
+    root=None keeps everything in process memory (single worker).
+    Point root at tmpfs (e.g. /dev/shm) for true shared memory.
+
+    Entries outlive the server, so each one records the version of
+    the data it was built from (e.g. a hash of the source objects);
+    asking for a key with a different version rebuilds it in place.
+    delete() frees an entry once no loaded race needs it.
+    """
+
+    def __init__(self, root: str | None):
+        self.root = (
+            os.path.join(root, f"v{STORE_VERSION}")
+            if root
+            else None
+        )
+
+        if self.root:
+            os.makedirs(self.root, exist_ok=True)
+
+    def get_or_build(
+        self,
+        key: str,
+        builder: Callable[[], Dict[str, np.ndarray]],
+        version: str = "",
+    ) -> Dict[str, np.ndarray]:
+        if self.root is None:
+            return builder()
+
+        path = self._path(key)
+
+        if self._ready(path, version):
+            try:
+                return self._open(path)
+            except FileNotFoundError:
+                # Deleted or rebuilt by another worker meanwhile
+                pass
+
+        with self._locked(path):
+            # Another worker may have finished while we waited
+            if not self._ready(path, version):
+                self._write(path, builder(), version)
+
+            return self._open(path)
+
+    def delete(self, key: str):
+        """
+        Drop an entry. Workers that mapped it keep their (unlinked)
+        pages until they let go; later requests rebuild it.
+        """
+        if self.root is None:
+            return
+
+        path = self._path(key)
+        with self._locked(path):
+            shutil.rmtree(path, ignore_errors=True)
+
+    # --------------------------------------------------
+    # Internals
+    # --------------------------------------------------
+    def _path(self, key: str) -> str:
+        safe = key.strip("/").replace("/", "__").replace("=", "-")
+        return os.path.join(self.root, safe)
+
+    @contextmanager
+    def _locked(self, path: str):
+        with open(f"{path}.lock", "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _ready(self, path: str, version: str) -> bool:
+        try:
+            with open(os.path.join(path, _READY_MARKER)) as f:
+                return f.read() == version
+        except FileNotFoundError:
+            return False
+
+    def _write(self, path: str, arrays: Dict[str, np.ndarray], version: str):
+        tmp = f"{path}.tmp-{os.getpid()}"
+        shutil.rmtree(tmp, ignore_errors=True)
+        shutil.rmtree(path, ignore_errors=True)
+        os.makedirs(tmp)
+
+        for name, arr in arrays.items():
+            np.save(os.path.join(tmp, f"{name}.npy"), np.ascontiguousarray(arr))
+
+        with open(os.path.join(tmp, _READY_MARKER), "w") as f:
+            f.write(version)
+        os.rename(tmp, path)
+
+    def _open(self, path: str) -> Dict[str, np.ndarray]:
+        arrays = {}
+        for fname in sorted(os.listdir(path)):
+            if fname.endswith(".npy"):
+                arrays[fname[:-4]] = np.load(
+                    os.path.join(path, fname),
+                    mmap_mode="r",
+                )
+        return arrays